@@ -0,0 +1,55 @@
+from django.db.models import F
+
+from .models import DashboardCounter
+
+COUNTER_NAMES = [
+    'customers',
+    'vehicles',
+    'jobcards',
+    'active_jobcards',
+    'completed_jobcards',
+    'quotations',
+]
+
+
+def compute_counts():
+    """Count every dashboard counter from scratch (one COUNT per counter)."""
+    from customers.models import Customer
+    from vehicles.models import Vehicle
+    from jobcards.models import JobCard
+    from quotations.models import Quotation
+
+    return {
+        'customers': Customer.objects.count(),
+        'vehicles': Vehicle.objects.count(),
+        'jobcards': JobCard.objects.count(),
+        'active_jobcards': JobCard.active.count(),
+        'completed_jobcards': JobCard.completed.count(),
+        'quotations': Quotation.objects.count(),
+    }
+
+
+def rebuild():
+    """Overwrite the stored counters with fresh counts and return them."""
+    counts = compute_counts()
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(name=name, value=value) for name, value in counts.items()],
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=['value'],
+    )
+    return counts
+
+
+def get_counts():
+    """Return all counters with a single query, rebuilding them if missing."""
+    counts = dict(DashboardCounter.objects.values_list('name', 'value'))
+    if any(name not in counts for name in COUNTER_NAMES):
+        counts = rebuild()
+    return counts
+
+
+def adjust(name, delta):
+    """Atomically add ``delta`` to a counter as part of the current transaction."""
+    if delta:
+        DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
@@ -0,0 +1,34 @@
+# core/db.py
+"""Transaction helpers for read-then-write blocks."""
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def write_atomic(using=None):
+    """``transaction.atomic()`` for blocks that read rows and then write them back.
+
+    On PostgreSQL the SELECT ... FOR UPDATE inside such a block takes the row
+    locks. SQLite ignores FOR UPDATE, and a plain (deferred) transaction only
+    asks for the write lock at its first write. Two blocks that have both
+    read then cannot both upgrade, and one fails with "database is locked".
+    Here the outermost block starts with BEGIN IMMEDIATE, so concurrent
+    writers queue on the lock (up to the busy timeout) before reading.
+    Nested blocks and other databases get a plain atomic().
+    """
+    connection = transaction.get_connection(using)
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
@@ -0,0 +1,113 @@
+import csv
+import tempfile
+
+from django import forms
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.views import View
+
+
+class ExportFilterForm(forms.Form):
+    FORMAT_CHOICES = [('csv', 'CSV'), ('xlsx', 'Excel (XLSX)')]
+
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    status = forms.CharField(max_length=50, required=False)
+    customer = forms.IntegerField(min_value=1, required=False)
+
+    def clean_format(self):
+        return self.cleaned_data.get('format') or 'csv'
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: write() hands each line straight back."""
+
+    def write(self, value):
+        return value
+
+
+class StreamingExportView(LoginRequiredMixin, View):
+    """Export a queryset row by row without materialising it.
+
+    Subclasses declare ``columns`` as ``(header, lookup)`` pairs and the
+    lookups used by the date range, status and customer filters. Rows are read
+    with ``values_list(...).iterator(chunk_size=...)`` (a server-side cursor on
+    PostgreSQL), so memory stays flat however many rows match. CSV is streamed
+    as it is produced; XLSX is written with openpyxl's write-only workbook to a
+    temporary file, since the zip container can only be finalised at the end.
+    Exports carry customer data, so they require a login like the list views.
+    """
+    columns = []
+    filename = 'export'
+    date_field = None
+    status_field = None
+    customer_field = None
+    chunk_size = 2000
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset, filters):
+        if filters['date_from'] and self.date_field:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': filters['date_from']})
+        if filters['date_to'] and self.date_field:
+            queryset = queryset.filter(**{f'{self.date_field}__lte': filters['date_to']})
+        if filters['status'] and self.status_field:
+            queryset = queryset.filter(**{self.status_field: filters['status']})
+        if filters['customer'] and self.customer_field:
+            queryset = queryset.filter(**{self.customer_field: filters['customer']})
+        return queryset
+
+    def format_row(self, row):
+        return row
+
+    def get(self, request, *args, **kwargs):
+        form = ExportFilterForm(request.GET)
+        if not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_text())
+
+        queryset = self.filter_queryset(self.get_queryset(), form.cleaned_data)
+        lookups = [lookup for _, lookup in self.columns]
+        rows = (
+            self.format_row(row)
+            for row in queryset.values_list(*lookups).iterator(chunk_size=self.chunk_size)
+        )
+        headers = [header for header, _ in self.columns]
+
+        if form.cleaned_data['format'] == 'xlsx':
+            return self.xlsx_response(headers, rows)
+        return self.csv_response(headers, rows)
+
+    def csv_response(self, headers, rows):
+        writer = csv.writer(Echo())
+
+        def lines():
+            yield writer.writerow(headers)
+            for row in rows:
+                yield writer.writerow(row)
+
+        response = StreamingHttpResponse(lines(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.csv"'
+        return response
+
+    def xlsx_response(self, headers, rows):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            return HttpResponse("XLSX export requires openpyxl.", status=501, content_type='text/plain')
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(self.filename[:31])
+        sheet.append(headers)
+        for row in rows:
+            sheet.append(row)
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'{self.filename}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
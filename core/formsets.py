@@ -0,0 +1,106 @@
+# core/formsets.py
+"""Inline formsets that validate and save in a fixed number of queries.
+
+Django's inline formsets resolve each submitted form's pk with its own
+SELECT, load their rows even when the caller already prefetched them, and
+save row by row. ``BaseBulkInlineFormSet`` resolves pks among the rows it
+holds, can be handed those rows up front, and splits the submitted changes
+into created/updated/deleted objects that ``bulk_write`` persists.
+"""
+from django import forms
+
+
+class LoadedObjectChoiceField(forms.ModelChoiceField):
+    """Formset pk field resolved from the rows the formset already loaded.
+
+    Django's default pk field runs one SELECT per submitted form; this one
+    looks the id up among the formset's queryset instead.
+    """
+
+    def __init__(self, formset, *args, **kwargs):
+        self.formset = formset
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            key = self.queryset.model._meta.pk.to_python(value)
+        except forms.ValidationError:
+            key = None
+        obj = self.formset._existing_object(key) if key is not None else None
+        if obj is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return obj
+
+
+class BaseBulkInlineFormSet(forms.BaseInlineFormSet):
+    """Inline formset for bulk saves; pass ``objects`` to reuse rows loaded elsewhere."""
+
+    def __init__(self, *args, objects=None, **kwargs):
+        self._objects = objects
+        super().__init__(*args, **kwargs)
+
+    def get_queryset(self):
+        if self._objects is not None:
+            return self._objects
+        return super().get_queryset()
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        pk_name = self._pk_field.name
+        field = form.fields.get(pk_name)
+        if isinstance(field, forms.ModelChoiceField) and not isinstance(field, LoadedObjectChoiceField):
+            form.fields[pk_name] = LoadedObjectChoiceField(
+                self, field.queryset, initial=field.initial, required=False, widget=field.widget,
+            )
+
+    def editable_fields(self):
+        return [name for name in self.form._meta.fields if name != self.fk.name]
+
+    def collect_changes(self, parent=None):
+        """Split the valid formset into unsaved ``(created, updated, deleted)`` objects.
+
+        Follows save(): unchanged extra forms are skipped and forms marked for
+        deletion are collected for removal. New objects are linked to
+        ``parent`` (the formset's instance by default). Nothing is written.
+        """
+        parent = self.instance if parent is None else parent
+        created, updated, deleted = [], [], []
+        self.changed_objects = []
+        for form in self.initial_forms:
+            obj = form.instance
+            if obj.pk is None:
+                continue
+            if self.can_delete and self._should_delete_form(form):
+                deleted.append(obj)
+            elif form.has_changed():
+                updated.append(form.save(commit=False))
+                self.changed_objects.append((obj, form.changed_data))
+        for form in self.extra_forms:
+            if not form.has_changed() or (self.can_delete and self._should_delete_form(form)):
+                continue
+            obj = form.save(commit=False)
+            setattr(obj, self.fk.name, parent)
+            created.append(obj)
+        self.new_objects = created
+        self.deleted_objects = deleted
+        return created, updated, deleted
+
+
+def bulk_write(model, created=(), updated=(), deleted=(), fields=()):
+    """Persist collected changes with at most one INSERT, one UPDATE and one DELETE.
+
+    Bulk writes skip save()/delete() and post_save; the DELETE still sends
+    post_delete when receivers are connected for ``model``.
+    """
+    if created:
+        model.objects.bulk_create(created)
+    if updated:
+        model.objects.bulk_update(updated, fields)
+    if deleted:
+        model.objects.filter(pk__in=[obj.pk for obj in deleted]).delete()
@@ -0,0 +1,57 @@
+# core/lookup.py
+"""Helpers for prefix lookups on normalized, indexed key columns."""
+import re
+
+from django.db.models import Q
+
+NON_DIGITS = re.compile(r'\D+')
+NON_ALNUM = re.compile(r'[^0-9A-Z]+')
+SPACES = re.compile(r'\s+')
+
+
+def digits_only(value):
+    return NON_DIGITS.sub('', value or '')
+
+
+def folded(value):
+    """Case-folded text with runs of whitespace collapsed."""
+    return SPACES.sub(' ', (value or '').strip()).casefold()
+
+
+def alnum_upper(value):
+    """Uppercase letters and digits only, e.g. ``'dxb a 12 345'`` -> ``'DXBA12345'``."""
+    return NON_ALNUM.sub('', (value or '').upper())
+
+
+def prefix_q(field, prefix):
+    """``field`` starts with ``prefix``, written as a range so a plain B-tree index serves it.
+
+    ``startswith`` compiles to ``LIKE 'x%' ESCAPE '\\'``, which SQLite cannot
+    answer from an ordinary index; ``field >= 'x' AND field < 'y'`` can be on
+    every backend, as long as the key column holds normalized values.
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+class LookupKeysMixin:
+    """Model mixin that keeps normalized key columns in step with their sources.
+
+    ``KEY_SOURCES`` maps each key field to ``(source field, normalizer)``.
+    Keys are cut to their column's max_length. save() recomputes them, and a
+    save limited by ``update_fields`` also writes the keys whose source it
+    writes. Bulk writes call sync_lookup_keys() themselves.
+    """
+    KEY_SOURCES = {}
+
+    def sync_lookup_keys(self):
+        for key, (source, normalize) in self.KEY_SOURCES.items():
+            setattr(self, key, normalize(getattr(self, source))[:self._meta.get_field(key).max_length])
+
+    def save(self, *args, **kwargs):
+        self.sync_lookup_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            keys = {key for key, (source, _) in self.KEY_SOURCES.items() if source in update_fields}
+            kwargs['update_fields'] = {*update_fields, *keys}
+        super().save(*args, **kwargs)
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.day_sheet import DaySheetFilterForm, build_day_sheet
+
+
+class Command(BaseCommand):
+    help = "Render all matching jobcards or quotations (active jobs by default) into one PDF."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the PDF to write.")
+        parser.add_argument('--kind', choices=['jobcards', 'quotations'], default='jobcards')
+        parser.add_argument('--date-from', help="YYYY-MM-DD")
+        parser.add_argument('--date-to', help="YYYY-MM-DD")
+        parser.add_argument('--status', help="Only jobcards in this job_status.")
+        parser.add_argument('--customer', type=int, help="Only this customer id.")
+        parser.add_argument('--include-completed', action='store_true', help="Also print completed jobs.")
+        parser.add_argument('--workers', type=int, help="Worker processes (default: DAY_SHEET_WORKERS).")
+
+    def handle(self, *args, **options):
+        form = DaySheetFilterForm({
+            'kind': options['kind'],
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'status': options['status'],
+            'customer': options['customer'],
+            'include_completed': options['include_completed'],
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        started = time.perf_counter()
+        pdf, objects = build_day_sheet(form.cleaned_data, workers=options['workers'])
+        if pdf is None:
+            self.stdout.write("Nothing matches; no file written.")
+            return
+        with open(options['output'], 'wb') as f:
+            f.write(pdf)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(objects)} {options['kind']} to {options['output']} "
+            f"in {time.perf_counter() - started:.2f}s"
+        ))
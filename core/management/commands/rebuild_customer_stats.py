@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from customers.models import Customer
+
+
+class Command(BaseCommand):
+    help = "Recompute every customer's lifetime job count and quoted total."
+
+    def handle(self, *args, **options):
+        updated = Customer.objects.rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(f"Customer stats rebuilt for {updated} customers."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core import counters
+
+
+class Command(BaseCommand):
+    help = "Recount the dashboard counters from the source tables."
+
+    def handle(self, *args, **options):
+        for name, value in counters.rebuild().items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(self.style.SUCCESS("Dashboard counters rebuilt."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="Rows read and indexed per transaction (default: 2000).",
+        )
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        if not backend.stores_documents:
+            self.stdout.write(f"{type(backend).__name__} keeps no index; nothing to rebuild.")
+            return
+
+        chunk_size = options['chunk_size']
+        backend.setup()
+        with transaction.atomic():
+            backend.clear()
+        for source in search.SOURCES:
+            total = 0
+            batch = []
+            # iterator() streams rows from the cursor instead of loading the table
+            for obj in source.get_queryset().order_by('pk').iterator(chunk_size=chunk_size):
+                batch.append(source.document(obj))
+                if len(batch) >= chunk_size:
+                    total += self._write(backend, batch)
+                    batch = []
+            total += self._write(backend, batch)
+            self.stdout.write(f"{source.kind}: {total}")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
+
+    @staticmethod
+    def _write(backend, documents):
+        with transaction.atomic():
+            backend.index(documents)
+        return len(documents)
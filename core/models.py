@@ -1 +1,10 @@
+from django.db import models
 
+
+class DashboardCounter(models.Model):
+    """Precomputed row counts shown on the dashboard, one row per counter."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
@@ -0,0 +1,113 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class KeysetPage:
+    """A page of rows plus the opaque cursors for its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginationMixin:
+    """Seek pagination for ListViews.
+
+    Pages are selected with ``WHERE (date, id) < (last_date, last_id)`` style
+    predicates on the view's ``ordering`` instead of ``OFFSET``, so every page
+    costs the same index range scan. The ordering must end on a unique column
+    (normally ``-id``). The cursor is an opaque token in ``?cursor=``.
+    """
+    paginate_by = 50
+    cursor_kwarg = 'cursor'
+
+    def get_keyset_ordering(self):
+        ordering = self.get_ordering()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return tuple(ordering or ('-id',))
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_keyset_ordering()
+        token = self.request.GET.get(self.cursor_kwarg)
+        backwards = False
+
+        if token:
+            direction, values = self._decode_cursor(token, queryset.model, ordering)
+            backwards = direction == 'prev'
+            queryset = queryset.filter(self._seek_filter(ordering, values, backwards))
+
+        queryset = queryset.order_by(*(self._reverse(f) for f in ordering) if backwards else ordering)
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = self._encode_cursor('next', rows[-1], ordering)
+            if token and (has_more or not backwards):
+                previous_cursor = self._encode_cursor('prev', rows[0], ordering)
+
+        page = KeysetPage(rows, next_cursor, previous_cursor)
+        return (None, page, rows, page.has_other_pages())
+
+    @staticmethod
+    def _reverse(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _seek_filter(ordering, values, backwards):
+        """Build ``(a, b) < (x, y)`` as ``a < x OR (a = x AND b < y)``."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            lookup = 'gt' if descending == backwards else 'lt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def _encode_cursor(direction, obj, ordering):
+        values = []
+        for field in ordering:
+            value = getattr(obj, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        raw = json.dumps([direction, values], separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(token, model, ordering):
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            direction, values = json.loads(raw)
+            if direction not in ('next', 'prev') or len(values) != len(ordering):
+                raise ValueError(token)
+            fields = [model._meta.get_field(f.lstrip('-')) for f in ordering]
+            return direction, [field.to_python(value) for field, value in zip(fields, values)]
+        except (ValueError, TypeError, ValidationError, FieldDoesNotExist) as e:
+            raise Http404("Invalid cursor") from e
@@ -0,0 +1,470 @@
+# core/search.py
+"""Full-text search over the workshop's free-text fields.
+
+Each searchable row (a jobcard's jobs and comments, a job note, an
+inspection finding, a quotation item) becomes one ``Document`` produced by
+its ``SearchSource``. Documents are stored by a pluggable backend chosen
+with ``settings.SEARCH_BACKEND``:
+
+* ``SQLiteFTSBackend`` keeps every document in one FTS5 table, so a single
+  bm25-ranked query covers all entity types.
+* ``LikeSearchBackend`` stores nothing and filters the source tables with
+  ``icontains``; it is the fallback for databases without FTS5.
+
+Saves and deletes keep the index in step through signals (see
+``connect_signals``). Titles copy text from related rows (customer name,
+vehicle, quotation number), so saving one of those rows with a changed
+copied field reindexes the documents listed in each source's
+``dependencies``. Code that writes with bulk_create/bulk_update calls
+``index_on_commit`` itself. ``manage.py rebuild_search_index`` rebuilds
+everything from scratch.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import reduce
+from operator import or_
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+TERM = re.compile(r'\w+', re.UNICODE)
+# Control characters wrap matched terms in snippets; they cannot occur in
+# form input, so highlighting can be applied after HTML-escaping the text
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+
+@dataclass
+class Document:
+    kind: str
+    object_id: int
+    jobcard_id: int
+    date: date
+    title: str
+    body: str
+
+
+@dataclass
+class Hit:
+    kind: str
+    object_id: int
+    jobcard_id: int
+    date: date
+    title: str
+    snippet: str
+    score: float
+    quotation_id: int = None  # filled in by search_view for quotation items
+
+    @property
+    def highlighted(self):
+        return mark_safe(escape(self.snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>'))
+
+
+def _text(*parts):
+    return "\n".join(part for part in parts if part)
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(max_length=200, required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+
+class SearchSource:
+    """How one model becomes documents. ``code`` must be unique and stable."""
+    kind = None
+    code = None
+    model_label = None
+    weight = 1.0  # multiplies the relevance score when ranking across kinds
+    related = ()
+    search_fields = ()  # text fields LikeSearchBackend filters on
+    # {model label: (lookup from this model to it, fields the document reads)}
+    dependencies = {}
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def get_queryset(self):
+        return self.model._default_manager.select_related(*self.related)
+
+    def document(self, obj):
+        raise NotImplementedError
+
+
+class JobCardSource(SearchSource):
+    kind = 'jobcard'
+    code = 1
+    model_label = 'jobcards.JobCard'
+    weight = 1.5
+    related = ('customer', 'vehicle')
+    search_fields = ('required_jobs', 'customer_comments', 'workshop_comments')
+    dependencies = {
+        'customers.Customer': ('customer', ('name',)),
+        'vehicles.Vehicle': ('vehicle', ('make', 'model', 'plate')),
+    }
+
+    def document(self, obj):
+        return Document(
+            kind=self.kind,
+            object_id=obj.pk,
+            jobcard_id=obj.pk,
+            date=obj.date,
+            title=f"Job Card #{obj.pk} - {obj.customer.name} - {obj.vehicle.make} {obj.vehicle.model} {obj.vehicle.plate}",
+            body=_text(obj.required_jobs, obj.customer_comments, obj.workshop_comments),
+        )
+
+
+class JobNoteSource(SearchSource):
+    kind = 'note'
+    code = 2
+    model_label = 'jobcards.JobNote'
+    related = ('jobcard__customer',)
+    search_fields = ('note',)
+    dependencies = {
+        'customers.Customer': ('jobcard__customer', ('name',)),
+        'jobcards.JobCard': ('jobcard', ('customer', 'date')),
+    }
+
+    def document(self, obj):
+        return Document(
+            kind=self.kind,
+            object_id=obj.pk,
+            jobcard_id=obj.jobcard_id,
+            date=obj.jobcard.date,
+            title=f"Note on Job Card #{obj.jobcard_id} - {obj.jobcard.customer.name}",
+            body=obj.note,
+        )
+
+
+class InspectionFindingSource(SearchSource):
+    kind = 'finding'
+    code = 3
+    model_label = 'inspections.InspectionFinding'
+    weight = 1.2
+    related = ('inspection__job_card__customer',)
+    search_fields = ('description', 'remarks')
+    dependencies = {
+        'customers.Customer': ('inspection__job_card__customer', ('name',)),
+        'jobcards.JobCard': ('inspection__job_card', ('customer',)),
+    }
+
+    def document(self, obj):
+        job_card = obj.inspection.job_card
+        return Document(
+            kind=self.kind,
+            object_id=obj.pk,
+            jobcard_id=job_card.pk,
+            date=_as_date(obj.inspection.created_at),
+            title=f"Inspection finding on Job Card #{job_card.pk} - {job_card.customer.name}",
+            body=_text(obj.description, obj.remarks),
+        )
+
+
+class QuotationItemSource(SearchSource):
+    kind = 'quotation_item'
+    code = 4
+    model_label = 'quotations.QuotationItem'
+    related = ('quotation__jobcard__customer',)
+    search_fields = ('description',)
+    dependencies = {
+        'customers.Customer': ('quotation__jobcard__customer', ('name',)),
+        'jobcards.JobCard': ('quotation__jobcard', ('customer',)),
+        'quotations.Quotation': ('quotation', ('quotation_number', 'date_created', 'jobcard')),
+    }
+
+    def document(self, obj):
+        quotation = obj.quotation
+        return Document(
+            kind=self.kind,
+            object_id=obj.pk,
+            jobcard_id=quotation.jobcard_id,
+            date=quotation.date_created,
+            title=f"Quotation {quotation.quotation_number} - {quotation.jobcard.customer.name}",
+            body=obj.description,
+        )
+
+
+SOURCES = [JobCardSource(), JobNoteSource(), InspectionFindingSource(), QuotationItemSource()]
+SOURCES_BY_KIND = {source.kind: source for source in SOURCES}
+
+
+def source_for_model(model):
+    for source in SOURCES:
+        if source.model is model:
+            return source
+    return None
+
+
+class BaseSearchBackend:
+    stores_documents = False  # False: index()/remove() are no-ops, nothing to keep in sync
+
+    def setup(self):
+        """Create whatever storage the backend needs (idempotent)."""
+
+    def clear(self):
+        pass
+
+    def index(self, documents):
+        """Insert or replace ``documents``."""
+
+    def remove(self, kind, object_ids):
+        pass
+
+    def search(self, query, limit=50, date_from=None, date_to=None):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """All documents in one FTS5 table, ranked with bm25 across entity types.
+
+    The rowid encodes the source code and primary key, so replacing or
+    removing a document is a rowid lookup rather than a scan.
+    """
+    stores_documents = True
+    table = 'core_search_index'
+    title_weight = 3.0
+    body_weight = 1.0
+
+    @staticmethod
+    def rowid(code, object_id):
+        return (code << 48) | object_id
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "kind UNINDEXED, object_id UNINDEXED, jobcard_id UNINDEXED, doc_date UNINDEXED, "
+                "title, body, tokenize='porter unicode61 remove_diacritics 2')"
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def index(self, documents):
+        rows = [
+            (
+                self.rowid(SOURCES_BY_KIND[doc.kind].code, doc.object_id),
+                doc.kind, doc.object_id, doc.jobcard_id,
+                doc.date.isoformat() if doc.date else None,
+                doc.title, doc.body,
+            )
+            for doc in documents
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, kind, object_id, jobcard_id, doc_date, title, body) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, kind, object_ids):
+        code = SOURCES_BY_KIND[kind].code
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [(self.rowid(code, pk),) for pk in object_ids],
+            )
+
+    @staticmethod
+    def match_expression(query):
+        """Quote each word so user input cannot inject FTS5 syntax; the last one matches as a prefix."""
+        terms = TERM.findall(query)
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def search(self, query, limit=50, date_from=None, date_to=None):
+        expression = self.match_expression(query)
+        if expression is None:
+            return []
+        kind_weight = " ".join(f"WHEN '{s.kind}' THEN {float(s.weight)}" for s in SOURCES)
+        sql = (
+            f"SELECT kind, object_id, jobcard_id, doc_date, title, "
+            f"snippet({self.table}, 5, '{MATCH_START}', '{MATCH_END}', ' … ', 12), "
+            f"bm25({self.table}, 0, 0, 0, 0, {self.title_weight}, {self.body_weight}) "
+            f"* CASE kind {kind_weight} ELSE 1.0 END AS score "
+            f"FROM {self.table} WHERE {self.table} MATCH %s"
+        )
+        params = [expression]
+        if date_from:
+            sql += " AND doc_date >= %s"
+            params.append(date_from.isoformat())
+        if date_to:
+            sql += " AND doc_date <= %s"
+            params.append(date_to.isoformat())
+        # bm25 is lower-is-better, and negative
+        sql += " ORDER BY score LIMIT %s"
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            Hit(
+                kind=kind, object_id=object_id, jobcard_id=jobcard_id,
+                date=date.fromisoformat(doc_date) if doc_date else None,
+                title=title, snippet=snippet, score=-score,
+            )
+            for kind, object_id, jobcard_id, doc_date, title, snippet, score in rows
+        ]
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """Index-free fallback: every word must appear in one of the source's text fields.
+
+    Scans the source tables, so it suits small installations or databases
+    without FTS5; hits are ordered by date, newest first.
+    """
+
+    def search(self, query, limit=50, date_from=None, date_to=None):
+        terms = TERM.findall(query)
+        if not terms:
+            return []
+        hits = []
+        for source in SOURCES:
+            condition = Q()
+            for term in terms:
+                condition &= reduce(or_, (Q(**{f'{field}__icontains': term}) for field in source.search_fields))
+            for obj in source.get_queryset().filter(condition)[:limit]:
+                doc = source.document(obj)
+                if date_from and doc.date and doc.date < date_from:
+                    continue
+                if date_to and doc.date and doc.date > date_to:
+                    continue
+                hits.append(Hit(
+                    kind=doc.kind, object_id=doc.object_id, jobcard_id=doc.jobcard_id,
+                    date=doc.date, title=doc.title, snippet=doc.body[:200], score=0.0,
+                ))
+        hits.sort(key=lambda hit: hit.date or date.min, reverse=True)
+        return hits[:limit]
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.SEARCH_BACKEND)()
+    return _backend
+
+
+def search(query, limit=50, date_from=None, date_to=None):
+    return get_backend().search(query, limit=limit, date_from=date_from, date_to=date_to)
+
+
+def index_instances(instances):
+    """(Re)index saved model instances; used by bulk write paths that skip signals."""
+    instances = list(instances)
+    if not instances or not get_backend().stores_documents:
+        return
+    source = source_for_model(type(instances[0]))
+    # Reload with the related rows the document needs, in one query
+    objects = source.get_queryset().filter(pk__in=[obj.pk for obj in instances])
+    get_backend().index(source.document(obj) for obj in objects)
+
+
+def index_dependents(source, lookup, pk, chunk_size=2000):
+    """Reindex the documents of ``source`` whose text is copied from the related row ``pk``."""
+    if not get_backend().stores_documents:
+        return
+    objects = source.get_queryset().filter(**{lookup: pk}).iterator(chunk_size=chunk_size)
+    batch = []
+    for obj in objects:
+        batch.append(source.document(obj))
+        if len(batch) >= chunk_size:
+            get_backend().index(batch)
+            batch = []
+    get_backend().index(batch)
+
+
+def remove_instances(model, object_ids):
+    object_ids = list(object_ids)
+    if object_ids and get_backend().stores_documents:
+        get_backend().remove(source_for_model(model).kind, object_ids)
+
+
+def index_on_commit(instances):
+    """Index ``instances`` once the surrounding transaction commits, so a rollback leaves no stale document."""
+    instances = list(instances)
+    if instances:
+        transaction.on_commit(lambda: index_instances(instances))
+
+
+def _indexed_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_on_commit([instance])
+
+
+def _dependency_fields(model):
+    """Names of ``model``'s fields that some document copies."""
+    label = model._meta.label
+    return {field for source in SOURCES for field in source.dependencies.get(label, (None, ()))[1]}
+
+
+def _dependency_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remember the stored values of the copied fields, to diff in _dependency_saved."""
+    if raw or instance._state.adding:
+        return
+    fields = _dependency_fields(sender)
+    if update_fields is not None:
+        fields &= {sender._meta.get_field(name).name for name in update_fields}
+    attnames = {name: sender._meta.get_field(name).attname for name in fields}
+    stored = {}
+    if attnames:
+        stored = sender._base_manager.filter(pk=instance.pk).values(*attnames.values()).first() or {}
+    instance._search_stored = {name: stored.get(attname) for name, attname in attnames.items()}
+
+
+def _dependency_saved(sender, instance, created, raw=False, **kwargs):
+    stored = instance.__dict__.pop('_search_stored', None)
+    if raw or created or stored is None:
+        return  # a new row has no documents depending on it yet
+    changed = {
+        name for name, value in stored.items()
+        if value != getattr(instance, sender._meta.get_field(name).attname)
+    }
+    for source in SOURCES:
+        dependency = source.dependencies.get(sender._meta.label)
+        if dependency is None:
+            continue
+        lookup, fields = dependency
+        if changed.isdisjoint(fields):
+            continue  # e.g. a customer's phone or a quotation's totals; no document reads them
+        transaction.on_commit(
+            lambda source=source, lookup=lookup, pk=instance.pk: index_dependents(source, lookup, pk)
+        )
+
+
+def _indexed_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_instances(sender, [pk]))
+
+
+def connect_signals():
+    # Connected per model so other models keep Django's fast delete path
+    for source in SOURCES:
+        post_save.connect(_indexed_saved, sender=source.model, dispatch_uid=f'search_index_{source.kind}')
+        post_delete.connect(_indexed_deleted, sender=source.model, dispatch_uid=f'search_remove_{source.kind}')
+    # Deleting a related row cascades to the dependent rows, whose own receivers remove them
+    for label in {label for source in SOURCES for label in source.dependencies}:
+        model = apps.get_model(label)
+        pre_save.connect(_dependency_saving, sender=model, dispatch_uid=f'search_dependents_stored_{label}')
+        post_save.connect(_dependency_saved, sender=model, dispatch_uid=f'search_dependents_{label}')
@@ -0,0 +1,138 @@
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from jobcards.models import COMPLETED_STATUSES, JobCard
+from quotations.models import PriceSuggestion, Quotation, QuotationItem
+
+from . import counters, search
+
+# Bulk operations (bulk_create, queryset.update) bypass these signals;
+# run ``manage.py rebuild_dashboard_counters`` and
+# ``manage.py rebuild_customer_stats`` after using them.
+
+SIMPLE_COUNTERS = {
+    Customer: 'customers',
+    Vehicle: 'vehicles',
+    Quotation: 'quotations',
+}
+
+
+def _status_counter(completed):
+    return 'completed_jobcards' if completed else 'active_jobcards'
+
+
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust(SIMPLE_COUNTERS[sender], 1)
+
+
+def count_deleted(sender, instance, **kwargs):
+    counters.adjust(SIMPLE_COUNTERS[sender], -1)
+
+
+# Connected per model: a post_delete receiver without a sender would disable
+# Django's single-statement fast delete for every other model
+for model in SIMPLE_COUNTERS:
+    post_save.connect(count_created, sender=model)
+    post_delete.connect(count_deleted, sender=model)
+
+
+@receiver(post_save, sender=JobCard)
+def count_jobcard_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.adjust('jobcards', 1)
+        counters.adjust(_status_counter(instance.is_completed), 1)
+    else:
+        previous = getattr(instance, '_stored_job_status', None)
+        if previous is not None and instance.job_status != previous:
+            was_completed = previous in COMPLETED_STATUSES
+            if was_completed != instance.is_completed:
+                counters.adjust(_status_counter(was_completed), -1)
+                counters.adjust(_status_counter(instance.is_completed), 1)
+    instance._stored_job_status = instance.job_status
+
+
+@receiver(post_delete, sender=JobCard)
+def count_jobcard_deleted(sender, instance, **kwargs):
+    counters.adjust('jobcards', -1)
+    stored = getattr(instance, '_stored_job_status', None) or instance.job_status
+    counters.adjust(_status_counter(stored in COMPLETED_STATUSES), -1)
+
+
+# Customer lifetime aggregates (Customer.jobcard_count / quoted_total).
+# Quotation totals change through Quotation.save(), including the
+# apply_item_delta() call that follows bulk item writes, so saves are diffed
+# against the values remembered in from_db().
+
+def _jobcard_customer(jobcard_id):
+    return Customer.objects.filter(jobcards=jobcard_id)
+
+
+@receiver(post_save, sender=JobCard)
+def track_customer_jobcards(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        Customer.objects.filter(pk=instance.customer_id).adjust_stats(jobcards=1)
+    else:
+        previous = getattr(instance, '_stored_customer_id', None)
+        if previous is not None and previous != instance.customer_id:
+            # The jobcard moved to another customer and takes its quotations along
+            quoted = instance.quotations.aggregate(total=Sum('grand_total'))['total'] or Decimal('0.00')
+            Customer.objects.filter(pk=previous).adjust_stats(jobcards=-1, quoted=-quoted)
+            Customer.objects.filter(pk=instance.customer_id).adjust_stats(jobcards=1, quoted=quoted)
+    instance._stored_customer_id = instance.customer_id
+
+
+@receiver(post_delete, sender=JobCard)
+def untrack_customer_jobcard(sender, instance, **kwargs):
+    # Its quotations were deleted first and subtracted their own totals
+    Customer.objects.filter(pk=instance.customer_id).adjust_stats(jobcards=-1)
+
+
+@receiver(post_save, sender=Quotation)
+def track_customer_quoted(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_jobcard = getattr(instance, '_stored_jobcard_id', None)
+    previous_total = getattr(instance, '_stored_grand_total', None)
+    if created:
+        _jobcard_customer(instance.jobcard_id).adjust_stats(quoted=instance.grand_total)
+    elif previous_jobcard is not None and previous_total is not None:
+        if previous_jobcard != instance.jobcard_id:
+            _jobcard_customer(previous_jobcard).adjust_stats(quoted=-previous_total)
+            _jobcard_customer(instance.jobcard_id).adjust_stats(quoted=instance.grand_total)
+        else:
+            _jobcard_customer(instance.jobcard_id).adjust_stats(quoted=instance.grand_total - previous_total)
+    instance._stored_jobcard_id = instance.jobcard_id
+    instance._stored_grand_total = instance.grand_total
+
+
+@receiver(post_delete, sender=Quotation)
+def untrack_customer_quotation(sender, instance, **kwargs):
+    _jobcard_customer(instance.jobcard_id).adjust_stats(quoted=-instance.grand_total)
+
+
+@receiver(post_delete, sender=QuotationItem)
+def refresh_deleted_item_price(sender, instance, origin=None, **kwargs):
+    # Covers item.delete() and the formsets' bulk DELETE; items deleted with
+    # their quotation are refreshed together by refresh_deleted_quotation_prices
+    if isinstance(origin, QuotationItem) or getattr(origin, 'model', None) is QuotationItem:
+        PriceSuggestion.objects.refresh_on_commit([instance.price_key()])
+
+
+@receiver(pre_delete, sender=Quotation)
+def refresh_deleted_quotation_prices(sender, instance, **kwargs):
+    PriceSuggestion.objects.refresh_on_commit(instance.items.values_list('item_type', 'description_key'))
+
+
+# Full-text index: JobCard, JobNote, InspectionFinding, QuotationItem, plus
+# the Customer, Vehicle and Quotation rows their titles are copied from
+search.connect_signals()
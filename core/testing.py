@@ -0,0 +1,34 @@
+# core/testing.py
+"""Fixtures shared by the apps' test modules."""
+from itertools import count
+
+from customers.models import Customer
+from jobcards.models import JobCard
+from vehicles.models import Vehicle
+
+_serial = count(1)
+
+
+class WorkshopFixtures:
+    """TestCase mixin creating customers, vehicles and jobcards with filler details.
+
+    Every helper takes the model's fields as keyword arguments, so a test
+    only spells out the values it asserts on.
+    """
+
+    def create_customer(self, **fields):
+        serial = next(_serial)
+        fields = {'name': f"Customer {serial}", 'phone': f"050{serial:07d}", **fields}
+        return Customer.objects.create(**fields)
+
+    def create_vehicle(self, customer=None, **fields):
+        fields = {
+            'make': "Toyota", 'model': "Corolla", 'color': "White", 'year': 2020,
+            'plate': f"TST-{next(_serial)}", **fields,
+        }
+        return Vehicle.objects.create(customer=customer or self.create_customer(), **fields)
+
+    def create_jobcard(self, vehicle=None, **fields):
+        """A jobcard for ``vehicle`` and its owner; both are created when not given."""
+        vehicle = vehicle or self.create_vehicle()
+        return JobCard.objects.create(customer=vehicle.customer, vehicle=vehicle, **fields)
@@ -1,3 +1,1034 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from io import BytesIO, StringIO
+import os
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import MileageReading, Vehicle
+from vehicles.timeline import timeline_page
+from jobcards.forms import JobCardModelForm
+from jobcards.models import JobCard, JobNote
+from jobcards.views import JobCardListView
+from inspections.models import InspectionFinding, InspectionReport, RequiredPart
+from quotations.forms import QuotationItemFormSet
+from quotations.pdf_cache import PDFCache
+from quotations.views import QuotationPDFView
+from quotations.models import PriceSuggestion, PriceSuggestionQuerySet, Quotation, QuotationItem, QuotationSequence, cents_to_amount
+from inventory.models import InventoryItem, StockMovement, StockSnapshot
+from inventory.reservations import reserve_parts, to_order_list
+
+from core import counters, day_sheet, search
+from core.testing import WorkshopFixtures
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+
+@skipUnless(PdfReader, "pooled day sheets need pypdf")
+class DaySheetTests(WorkshopFixtures, TestCase):
+    def test_pooled_rendering_matches_serial_page_order(self):
+        vehicle = self.create_vehicle()
+        for i in range(5):
+            self.create_jobcard(vehicle, required_jobs=f"Job {i}\n" * (1 + 60 * (i == 2)))
+        objects = day_sheet.load_jobcards({})
+
+        def page_texts(pdf):
+            return [page.extract_text() for page in PdfReader(BytesIO(pdf)).pages]
+
+        serial = page_texts(day_sheet.render_day_sheet('jobcards', objects, workers=1))
+        with mock.patch.multiple(day_sheet, PARALLEL_THRESHOLD=0, CHUNK_SIZE=2), \
+                mock.patch.object(day_sheet, 'ProcessPoolExecutor', wraps=day_sheet.ProcessPoolExecutor) as pool:
+            pooled = page_texts(day_sheet.render_day_sheet('jobcards', objects, workers=2))
+        pool.assert_called_once()
+        # The third jobcard's jobs run onto a second page
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(pooled, serial)
+
+
+class DaySheetViewTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        vehicle = self.create_vehicle()
+        for i in range(3):
+            self.create_jobcard(vehicle, required_jobs=f"Job {i}")
+        self.client.force_login(User.objects.create_user('printer'))
+
+    @mock.patch('core.views.WEB_LIMIT', 3)
+    def test_sheet_within_limit_renders_serially(self):
+        with mock.patch.object(day_sheet, 'ProcessPoolExecutor') as pool:
+            response = self.client.get(reverse('day_sheet'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        pool.assert_not_called()
+
+    @mock.patch('core.views.WEB_LIMIT', 2)
+    def test_sheet_over_limit_redirects_with_message(self):
+        with mock.patch.object(day_sheet, 'render_day_sheet') as render:
+            response = self.client.get(reverse('day_sheet'), follow=True)
+        render.assert_not_called()
+        self.assertRedirects(response, reverse('dashboard'))
+        [message] = response.context['messages']
+        self.assertIn("More than 2 jobcards", str(message))
+        self.assertIn("print_day_sheet", str(message))
+
+    def test_command_is_not_capped(self):
+        with mock.patch.object(day_sheet, 'WEB_LIMIT', 1), tempfile.NamedTemporaryFile(suffix='.pdf') as output:
+            call_command('print_day_sheet', output.name, stdout=StringIO())
+            self.assertGreater(os.path.getsize(output.name), 0)
+
+
+class JobCardQueryBudgetTests(WorkshopFixtures, TestCase):
+    """The jobcard pages must not issue a query per row or per relation."""
+
+    def make_jobcards(self, count, status='under_inspection'):
+        start = Customer.objects.count()
+        return [
+            self.create_jobcard(self.create_vehicle(self.create_customer(name=f"Customer {i}")), job_status=status)
+            for i in range(start, start + count)
+        ]
+
+    def assert_list_budget(self, url_name, status):
+        self.make_jobcards(2, status)
+        with self.assertNumQueries(1):
+            self.client.get(reverse(url_name))
+        self.make_jobcards(20, status)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse(url_name))
+        self.assertContains(response, "Customer 21")
+
+    def test_jobcard_list(self):
+        self.assert_list_budget('jobcard_list', 'under_inspection')
+
+    def test_active_jobcard_list(self):
+        self.assert_list_budget('active_jobcards', 'work_in_progress')
+
+    def test_completed_jobcard_list(self):
+        self.assert_list_budget('completed_jobcards', 'delivered')
+
+    def test_detail_and_print(self):
+        jobcard = self.make_jobcards(1)[0]
+        JobNote.objects.bulk_create(JobNote(jobcard=jobcard, note=f"Note {i}") for i in range(10))
+        Quotation.objects.create(jobcard=jobcard)
+
+        # jobcard + customer + vehicle + inspection report, job notes, quotations
+        for url_name in ('jobcard_detail', 'jobcard_print'):
+            with self.subTest(url_name=url_name), self.assertNumQueries(3):
+                response = self.client.get(reverse(url_name, args=[jobcard.pk]))
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['quotation_exists'])
+
+
+class JobCardFormLockTests(TransactionTestCase):
+    """Only the jobcard form's read-then-write block takes SQLite's write lock up front."""
+
+    data = {
+        'date': '2024-05-01', 'time': '09:30', 'job_status': 'under_inspection',
+        'customer_name': "Lock", 'customer_phone': "0509000001",
+        'vehicle_make': "Kia", 'vehicle_model': "Rio", 'vehicle_color': "Red",
+        'vehicle_year': '2020', 'vehicle_plate': "LCK-1", 'vehicle_mileage': '1000',
+    }
+
+    def begins(self, callback):
+        with CaptureQueriesContext(connection) as ctx:
+            callback()
+        return [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('BEGIN')]
+
+    @skipUnless(connection.vendor == 'sqlite', "BEGIN IMMEDIATE is SQLite-specific")
+    def test_form_save_begins_immediate(self):
+        form = JobCardModelForm(data=self.data)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(self.begins(form.save), ['BEGIN IMMEDIATE'])
+        self.assertEqual(Vehicle.objects.get(plate="LCK-1").customer.name, "Lock")
+
+        def other_block():
+            with transaction.atomic():
+                Customer.objects.count()
+
+        self.assertEqual(self.begins(other_block), ['BEGIN'])
+
+        def nested():
+            with transaction.atomic():
+                JobCardModelForm(data={**self.data, 'vehicle_mileage': '1200'}).save()
+
+        self.assertEqual(self.begins(nested), ['BEGIN'])
+        self.assertEqual(Vehicle.objects.get(plate="LCK-1").mileage, 1200)
+
+
+class JobNoteSaveTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        self.jobcard = self.create_jobcard()
+
+    def notes(self):
+        return list(self.jobcard.job_notes.values_list('pk', 'note', 'position'))
+
+    def test_create_is_one_insert(self):
+        with self.assertNumQueries(3):  # savepoint, INSERT, release
+            self.jobcard.save_job_notes(["Oil leak", " ", "Squeaky brakes"], created=True)
+        self.assertEqual([(note, position) for _, note, position in self.notes()],
+                         [("Oil leak", 0), ("Squeaky brakes", 1)])
+
+    def test_diff_keeps_ids_and_rewrites_positions(self):
+        self.jobcard.save_job_notes(["First", "Second", "Third"], created=True)
+        first, second, third = [pk for pk, _, _ in self.notes()]
+
+        # Unchanged notes are only read
+        with self.assertNumQueries(3):  # savepoint, SELECT, release
+            self.jobcard.save_job_notes(["First", "Second", "Third"], note_ids=[first, second, third])
+
+        # Swap two, edit one, drop the first and add one: ids of the kept rows survive
+        # savepoint, SELECT, DELETE's SELECT + DELETE, bulk UPDATE, bulk INSERT, release
+        with self.assertNumQueries(7):
+            self.jobcard.save_job_notes(
+                ["Third", "Second edited", "Fourth"], note_ids=[str(third), str(second), ''],
+            )
+        notes = self.notes()
+        self.assertEqual(notes[:2], [(third, "Third", 0), (second, "Second edited", 1)])
+        self.assertEqual(notes[2][1:], ("Fourth", 2))
+        self.assertNotIn(first, [pk for pk, _, _ in notes])
+
+    def test_repeated_and_unknown_ids_insert_new_rows(self):
+        self.jobcard.save_job_notes(["Kept"], created=True)
+        [(kept, _, _)] = self.notes()
+        other = self.create_jobcard(self.jobcard.vehicle)
+        other.save_job_notes(["Not yours"], created=True)
+        foreign = other.job_notes.get().pk
+
+        self.jobcard.save_job_notes(["Kept", "Copy", "Stolen"], note_ids=[kept, kept, foreign])
+        notes = self.notes()
+        self.assertEqual(notes[0], (kept, "Kept", 0))
+        self.assertEqual([note for _, note, _ in notes], ["Kept", "Copy", "Stolen"])
+        self.assertEqual(other.job_notes.get().note, "Not yours")
+
+
+class KeysetPaginationTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        vehicle = self.create_vehicle()
+        # Three jobcards share a date, so the id breaks the tie
+        dates = [datetime.date(2024, 3, 1)] * 3 + [datetime.date(2024, 2, 1), datetime.date(2024, 4, 1)]
+        jobcards = [self.create_jobcard(vehicle, date=day) for day in dates]
+        self.expected = [jc.pk for jc in sorted(jobcards, key=lambda jc: (jc.date, jc.pk), reverse=True)]
+
+    def page(self, cursor=None):
+        params = {'cursor': cursor} if cursor else {}
+        with mock.patch.object(JobCardListView, 'paginate_by', 2), self.assertNumQueries(1):
+            response = self.client.get(reverse('jobcard_list'), params)
+        return [jc.pk for jc in response.context['jobcards']], response.context['page_obj']
+
+    def test_cursors_walk_ties_forwards_and_back(self):
+        ids, page = self.page()
+        self.assertFalse(page.has_previous())
+        pages = [ids]
+        while page.has_next():
+            ids, page = self.page(page.next_cursor)
+            pages.append(ids)
+        self.assertEqual(pages, [self.expected[0:2], self.expected[2:4], self.expected[4:]])
+
+        ids, page = self.page(page.previous_cursor)
+        self.assertEqual(ids, self.expected[2:4])
+        ids, page = self.page(page.previous_cursor)
+        self.assertEqual(ids, self.expected[0:2])
+        self.assertTrue(page.has_next())
+
+    def test_tampered_cursor_is_not_found(self):
+        for cursor in ("garbage", "WyJ1cCIsWzFdXQ"):  # undecodable; ["up",[1]]
+            with mock.patch.object(JobCardListView, 'paginate_by', 2):
+                self.assertEqual(self.client.get(reverse('jobcard_list'), {'cursor': cursor}).status_code, 404)
+
+
+    def test_quotation_list_reads_one_page_only(self):
+        for jobcard in JobCard.objects.all():
+            Quotation.objects.create(jobcard=jobcard)
+        # The page of quotations with their customers; no list of active jobcards
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('quotation_list'))
+        self.assertEqual(len(response.context['quotations']), 5)
+        self.assertNotIn('jobcards', response.context)
+
+class JobCardActiveFlagTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        self.jobcard = self.create_jobcard()
+
+    def stored_flag(self):
+        return JobCard.objects.values_list('is_active', flat=True).get(pk=self.jobcard.pk)
+
+    def test_flag_follows_status_on_full_and_partial_saves(self):
+        self.assertTrue(self.stored_flag())
+
+        transitions = [
+            ('ready_collection', False),
+            ('delivered', False),
+            ('work_in_progress', True),
+            ('under_testing', True),
+            ('delivered', False),
+        ]
+        for i, (status, active) in enumerate(transitions):
+            jobcard = JobCard.objects.get(pk=self.jobcard.pk)
+            jobcard.job_status = status
+            # Alternate full saves and saves limited to job_status
+            jobcard.save(**({'update_fields': ['job_status']} if i % 2 else {}))
+            self.assertEqual(self.stored_flag(), active, status)
+
+    def test_managers_filter_on_the_flag(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(list(JobCard.active.all()), [self.jobcard])
+            self.assertEqual(list(JobCard.completed.all()), [])
+        self.assertTrue(all('"is_active"' in query['sql'] for query in ctx.captured_queries))
+        self.assertFalse(any('"job_status"' in query['sql'].split('WHERE')[-1] for query in ctx.captured_queries))
+
+
+class QuotationTotalsTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        self.jobcard = self.create_jobcard()
+        self.customer = self.jobcard.customer
+        self.quotation = Quotation.objects.create(jobcard=self.jobcard)
+
+    def totals(self, quotation=None):
+        quotation = Quotation.objects.get(pk=(quotation or self.quotation).pk)
+        return [getattr(quotation, field) for field in Quotation.TOTAL_FIELDS]
+
+    def test_item_changes_apply_deltas(self):
+        item = QuotationItem.objects.create(quotation=self.quotation, description="Pads", quantity=2, unit_price=50)
+        QuotationItem.objects.create(quotation=self.quotation, description="Labour", unit_price=Decimal('33.33'))
+        self.assertEqual(self.totals(), [Decimal('133.33'), 0, Decimal('6.67'), Decimal('140.00')])
+
+        item.quantity = 1
+        item.save()
+        self.assertEqual(self.totals()[0], Decimal('83.33'))
+
+        other = Quotation.objects.create(jobcard=self.jobcard)
+        item.quotation = other
+        item.save()
+        self.assertEqual((self.totals()[0], self.totals(other)[0]), (Decimal('33.33'), Decimal('50.00')))
+
+        item.delete()
+        self.assertEqual(self.totals(other), [0, 0, 0, 0])
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.quoted_total, self.totals()[3])
+
+    def test_stale_instance_keeps_concurrent_item_deltas(self):
+        stale = Quotation.objects.get(pk=self.quotation.pk)
+        QuotationItem.objects.create(quotation=self.quotation, description="Disc", unit_price=200)
+
+        stale.discount_percentage = Decimal('10')
+        stale.save()
+        self.assertEqual(self.totals(), [Decimal('200.00'), Decimal('20.00'), Decimal('9.00'), Decimal('189.00')])
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.quoted_total, Decimal('189.00'))
+
+    def test_with_totals_matches_stored_totals_in_one_query(self):
+        for price in (10, Decimal('0.05'), Decimal('99.99')):
+            QuotationItem.objects.create(quotation=self.quotation, description="Part", quantity=3, unit_price=price)
+        with self.assertNumQueries(1):
+            quotation = Quotation.objects.with_totals().get(pk=self.quotation.pk)
+        computed = [cents_to_amount(getattr(quotation, f'_{field}_cents'))
+                    for field in ('subtotal', 'discount', 'vat', 'grand_total')]
+        self.assertEqual(computed, self.totals())
+
+    def test_with_totals_rounds_like_the_stored_totals(self):
+        cases = [
+            # (discount %, VAT %, item quantities and prices)
+            ('0', '5', []),
+            ('12.5', '5', [(1, '0.05'), (3, '33.33')]),
+            ('7.77', '5.55', [(2, '19.99'), (1, '0.01')]),
+            ('33.33', '0', [(7, '1.01')]),
+            ('0', '15', [(1, '0.10'), (1, '0.03')]),
+        ]
+        for discount, vat, items in cases:
+            quotation = Quotation.objects.create(
+                jobcard=self.jobcard, discount_percentage=Decimal(discount), vat_percentage=Decimal(vat),
+            )
+            for quantity, price in items:
+                QuotationItem.objects.create(
+                    quotation=quotation, description="Line", quantity=quantity, unit_price=Decimal(price),
+                )
+
+        with self.assertNumQueries(1):
+            quotations = list(Quotation.objects.with_totals().order_by('pk'))
+        self.assertEqual(len(quotations), len(cases) + 1)
+        for quotation in quotations:
+            computed = [cents_to_amount(getattr(quotation, f'_{field}_cents'))
+                        for field in ('subtotal', 'discount', 'vat', 'grand_total')]
+            self.assertEqual(computed, [getattr(quotation, field) for field in Quotation.TOTAL_FIELDS])
+
+    def formset_data(self, new_lines, delete=None, edit=None):
+        items = list(self.quotation.items.order_by('pk'))
+        data = {'items-TOTAL_FORMS': str(len(items) + len(new_lines)), 'items-INITIAL_FORMS': str(len(items))}
+        for i, item in enumerate(items):
+            quantity = edit[1] if edit and item.pk == edit[0].pk else item.quantity
+            data.update({
+                f'items-{i}-id': str(item.pk), f'items-{i}-description': item.description,
+                f'items-{i}-quantity': str(quantity), f'items-{i}-unit_price': str(item.unit_price),
+            })
+            if delete is not None and item.pk == delete.pk:
+                data[f'items-{i}-DELETE'] = 'on'
+        for j, (quantity, price) in enumerate(new_lines, start=len(items)):
+            data.update({
+                f'items-{j}-description': f"New {j}", f'items-{j}-quantity': str(quantity),
+                f'items-{j}-unit_price': price,
+            })
+        return data
+
+    def bulk_save(self, data):
+        formset = QuotationItemFormSet(data=data, instance=self.quotation, prefix='items')
+        self.assertTrue(formset.is_valid(), formset.errors)
+        with CaptureQueriesContext(connection) as ctx:
+            delta = formset.bulk_save()
+            Quotation.objects.apply_item_delta(self.quotation.pk, delta)
+        return delta, len(ctx)
+
+    def test_bulk_formset_delta_matches_recomputed_totals(self):
+        kept = QuotationItem.objects.create(quotation=self.quotation, description="Kept", quantity=2, unit_price=15)
+        gone = QuotationItem.objects.create(quotation=self.quotation, description="Gone", unit_price=Decimal('9.99'))
+
+        delta, few = self.bulk_save(self.formset_data([(1, '0.05'), (3, '12.50')], delete=gone, edit=(kept, 5)))
+        # +45 for the kept line, -9.99 for the deleted one, +37.55 for the new ones
+        self.assertEqual(delta, Decimal('72.56'))
+        quotation = Quotation.objects.with_totals().get(pk=self.quotation.pk)
+        self.assertEqual(quotation.subtotal, cents_to_amount(quotation._subtotal_cents))
+        self.assertEqual(quotation.subtotal, Decimal('112.55'))
+
+        # Same shape with four times the new lines: the query count does not move
+        cheap = QuotationItem.objects.get(quotation=self.quotation, unit_price=Decimal('0.05'))
+        kept.refresh_from_db()
+        _, many = self.bulk_save(self.formset_data([(1, '1.00')] * 8, delete=cheap, edit=(kept, 6)))
+        self.assertEqual(few, many)
+        self.assertEqual(self.totals()[0], Decimal('135.50'))
+
+    def test_recompute_command_repairs_drift(self):
+        QuotationItem.objects.create(quotation=self.quotation, description="Belt", unit_price=80)
+        Quotation.objects.filter(pk=self.quotation.pk).update(subtotal=1, grand_total=1)
+
+        out = StringIO()
+        call_command('recompute_quotation_totals', '--dry-run', stdout=out)
+        self.assertIn("found 1", out.getvalue())
+        self.assertEqual(self.totals()[3], Decimal('1.00'))
+
+        call_command('recompute_quotation_totals', stdout=StringIO())
+        self.assertEqual(self.totals(), [Decimal('80.00'), 0, Decimal('4.00'), Decimal('84.00')])
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.quoted_total, Decimal('84.00'))
+
+
+class QuotationNumberTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        self.jobcard = self.create_jobcard()
+        self.prefix = f"Q{timezone.now().strftime('%y%m%d')}"
+
+    def number(self):
+        return Quotation.objects.create(jobcard=self.jobcard).quotation_number
+
+    def test_same_day_quotations_get_consecutive_numbers(self):
+        self.assertEqual([self.number() for _ in range(3)], [f"{self.prefix}-0{i}" for i in (1, 2, 3)])
+        self.assertEqual(QuotationSequence.objects.get(day=timezone.now().date()).last_value, 3)
+
+        # Another process advanced today's counter
+        QuotationSequence.objects.filter(day=timezone.now().date()).update(last_value=99)
+        self.assertEqual(self.number(), f"{self.prefix}-100")
+
+        tomorrow = timezone.now() + datetime.timedelta(days=1)
+        with mock.patch('quotations.models.timezone.now', return_value=tomorrow):
+            self.assertEqual(self.number(), f"Q{tomorrow.strftime('%y%m%d')}-01")
+
+        quotation = Quotation.objects.create(jobcard=self.jobcard, quotation_number="MANUAL-1")
+        self.assertEqual(quotation.quotation_number, "MANUAL-1")
+        self.assertEqual(QuotationSequence.objects.get(day=timezone.now().date()).last_value, 100)
+
+    @mock.patch('quotations.models.time.sleep')
+    def test_allocation_retries_a_lost_insert_race_and_busy_database(self, sleep):
+        create = QuotationSequence.objects.create
+        failures = [IntegrityError("UNIQUE constraint failed"), OperationalError("database is locked")]
+
+        def racing_create(**kwargs):
+            if failures:
+                raise failures.pop(0)
+            return create(**kwargs)
+
+        with mock.patch.object(QuotationSequence.objects, 'create', side_effect=racing_create):
+            self.assertEqual(self.number(), f"{self.prefix}-01")
+        self.assertEqual(sleep.call_count, 2)
+
+        # A database that stays busy surfaces the error after MAX_RETRIES attempts
+        busy = OperationalError("database is locked")
+        with mock.patch.object(QuotationSequence.objects, 'filter', side_effect=busy), \
+                self.assertRaises(OperationalError):
+            QuotationSequence.next_value(timezone.now().date())
+        self.assertEqual(sleep.call_count, 2 + QuotationSequence.MAX_RETRIES - 1)
+
+
+class ExportViewTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        vehicle = self.create_vehicle(plate="EXP-1")
+        self.jobcard = self.create_jobcard(vehicle, job_status='work_in_progress')
+        self.other = self.create_jobcard(vehicle, job_status='delivered')
+
+    def test_exports_require_login(self):
+        for name in ('jobcard_export', 'quotation_export', 'quotation_item_export', 'inspections:parts_demand_export'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 302, name)
+            self.assertIn(settings.LOGIN_URL, response['Location'])
+
+    def test_jobcard_csv_streams_filtered_rows(self):
+        self.client.force_login(User.objects.create_user('exporter'))
+        response = self.client.get(reverse('jobcard_export'), {'status': 'work_in_progress'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['Job Card', 'Date', 'Time', 'Status'])
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith(f'{self.jobcard.pk},'))
+        self.assertIn('EXP-1', lines[1])
+
+    def test_invalid_filter_is_rejected(self):
+        self.client.force_login(User.objects.create_user('exporter'))
+        response = self.client.get(reverse('jobcard_export'), {'date_from': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class IntakeLookupTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Ahmed  Al Mansoori", phone="+971 50 123 4567")
+        Customer.objects.create(name="Aisha", phone="050 765 4321")
+        self.vehicle = Vehicle.objects.create(
+            customer=self.customer, make="Nissan", model="Patrol", color="White", year=2022,
+            plate="dxb a 12345", vin="jn1-tany62u0123456",
+        )
+        self.client.force_login(User.objects.create_user('intake'))
+
+    def lookup(self, term, **params):
+        return self.client.get(reverse('jobcard_intake_lookup'), {'q': term, **params}).json()
+
+    def test_keys_follow_saves(self):
+        self.assertEqual((self.customer.name_key, self.customer.phone_key), ("ahmed al mansoori", "971501234567"))
+        self.assertEqual((self.vehicle.plate_key, self.vehicle.vin_key), ("DXBA12345", "JN1TANY62U0123456"))
+
+        self.customer.phone = "04 555 0000"
+        self.customer.save(update_fields=['phone'])
+        self.vehicle.plate = "AUH 1"
+        self.vehicle.save(update_fields=['plate'])
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).phone_key, "045550000")
+        self.assertEqual(Vehicle.objects.get(pk=self.vehicle.pk).plate_key, "AUH1")
+
+    def test_lookup_matches_normalized_prefixes(self):
+        result = self.lookup("DXB-A 12")
+        self.assertEqual([v['id'] for v in result['vehicles']], [self.vehicle.pk])
+        self.assertEqual(result['vehicles'][0]['customer']['id'], self.customer.pk)
+
+        self.assertEqual([v['id'] for v in self.lookup("jn1 tany")['vehicles']], [self.vehicle.pk])
+        self.assertEqual([c['name'] for c in self.lookup("+971 50 12")['customers']], ["Ahmed  Al Mansoori"])
+        self.assertEqual([c['name'] for c in self.lookup("AHMED al")['customers']], ["Ahmed  Al Mansoori"])
+        self.assertEqual([c['name'] for c in self.lookup("a", limit=5)['customers']], [])
+        self.assertEqual(len(self.lookup("ai", limit='x')['customers']), 1)
+
+    def test_lookup_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('jobcard_intake_lookup'), {'q': "dxb"})
+        self.assertEqual(response.status_code, 302)
+
+
+class DashboardCounterTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        self.vehicle = self.create_vehicle()
+        self.customer = self.vehicle.customer
+
+    def test_counters_follow_saves_transitions_and_deletes(self):
+        counters.rebuild()
+        jobcard = self.create_jobcard(self.vehicle)
+        Quotation.objects.create(jobcard=jobcard)
+        self.assertEqual(counters.get_counts(), counters.compute_counts())
+
+        jobcard = JobCard.objects.get(pk=jobcard.pk)
+        jobcard.job_status = 'delivered'
+        jobcard.save()
+        self.assertEqual(counters.get_counts(), counters.compute_counts())
+
+        self.customer.delete()
+        self.assertEqual(counters.get_counts(), counters.compute_counts())
+
+    def test_counter_receivers_keep_fast_delete_for_other_models(self):
+        for mileage in (1000, 2000, 3000):
+            MileageReading.objects.create(vehicle=self.vehicle, date=datetime.date.today(), mileage=mileage)
+        # A sender-less post_delete receiver would turn this into a SELECT plus a DELETE
+        with self.assertNumQueries(1):
+            MileageReading.objects.filter(vehicle=self.vehicle).delete()
+
+    def test_dashboard_reads_counters_in_one_query(self):
+        counters.rebuild()
+        # counters, recent jobcards, recent quotations
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['vehicles_count'], 1)
+
+
+class CustomerStatsTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        self.vehicle = self.create_vehicle()
+        self.customer = self.vehicle.customer
+
+    def assert_stats_match_rebuild(self):
+        stored = list(Customer.objects.order_by('pk').values_list('jobcard_count', 'quoted_total'))
+        Customer.objects.rebuild_stats()
+        self.assertEqual(stored, list(Customer.objects.order_by('pk').values_list('jobcard_count', 'quoted_total')))
+
+    def test_stats_follow_jobcards_and_quotations(self):
+        jobcards = [self.create_jobcard(self.vehicle) for _ in range(3)]
+        quotation = Quotation.objects.create(jobcard=jobcards[0])
+        QuotationItem.objects.create(quotation=quotation, description="Pads", unit_price=100, quantity=2)
+        self.assert_stats_match_rebuild()
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.jobcard_count, 3)
+        self.assertEqual(self.customer.quoted_total, quotation.grand_total)
+
+        other = self.create_customer()
+        jobcard = JobCard.objects.get(pk=jobcards[0].pk)
+        jobcard.customer = other
+        jobcard.save()
+        self.assert_stats_match_rebuild()
+
+        JobCard.objects.get(pk=jobcards[1].pk).delete()
+        jobcard.delete()
+        self.assert_stats_match_rebuild()
+
+    def test_detail_page_query_budget(self):
+        for _ in range(30):
+            jobcard = self.create_jobcard(self.vehicle)
+            Quotation.objects.create(jobcard=jobcard)
+        # customer, vehicles, first history page, its quotations
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('customer_detail', args=[self.customer.pk]))
+        self.assertEqual(len(response.context['jobcards']), 20)
+        cursor = response.context['history_page'].next_cursor
+        older = self.client.get(reverse('customer_history', args=[self.customer.pk]), {'cursor': cursor}).json()
+        self.assertEqual(len(older['results']), 10)
+        self.assertIsNone(older['next'])
+
+
+class VehicleTimelineTests(WorkshopFixtures, TestCase):
+    def test_pages_cover_every_event_in_visit_order(self):
+        vehicle = self.create_vehicle()
+        expected = []
+        for day in (3, 1, 3, 2):
+            jobcard = self.create_jobcard(vehicle, date=f"2025-01-0{day}")
+            MileageReading.record_visit(jobcard, 1000 * day, created=True)
+            report = InspectionReport.objects.create(job_card=jobcard)
+            findings = [InspectionFinding.objects.create(inspection=report, description="Leak") for _ in range(2)]
+            quotation = Quotation.objects.create(jobcard=jobcard)
+            item = QuotationItem.objects.create(quotation=quotation, description="Seal", unit_price=5)
+            visit = [('jobcard', jobcard.pk)] + [('finding', f.pk) for f in reversed(findings)]
+            expected.append((jobcard.date, jobcard.pk, visit + [('quotation_item', item.pk)]))
+        expected = [event for _, _, visit in sorted(expected, reverse=True) for event in visit]
+
+        seen, cursor = [], None
+        while True:
+            with self.assertNumQueries(3):
+                events, cursor = timeline_page(vehicle.pk, cursor, size=3)
+            seen += [(event.kind, -event.key[3]) for event in events]
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(timeline_page(vehicle.pk)[0][0].detail['mileage'], 3000)
+
+
+@mock.patch.object(QuotationPDFView, 'render_pdf', autospec=True, return_value=b'%PDF-1.4 quotation')
+class QuotationPDFCacheTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        self.enterContext(override_settings(PDF_CACHE_DIR=tempfile.mkdtemp()))
+        self.quotation = Quotation.objects.create(jobcard=self.create_jobcard())
+        self.item = QuotationItem.objects.create(quotation=self.quotation, description="Service", unit_price=300)
+        self.url = reverse('quotation_pdf', args=[self.quotation.pk])
+
+    def test_etag_revalidation_and_cache_hits(self, render):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 quotation')
+        etag = response['ETag']
+
+        # quotation with jobcard, customer and vehicle; items
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"other", {etag}').status_code, 304)
+
+        response = self.client.get(self.url)
+        response.close()
+        self.assertEqual(render.call_count, 1)
+
+        self.item.unit_price = 350
+        self.item.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        response.close()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(render.call_count, 2)
+
+    def test_cache_evicts_least_recently_used(self, render):
+        cache = PDFCache(directory=tempfile.mkdtemp(), max_bytes=30)
+        for mtime, key in [(800, 'a'), (900, 'b'), (1000, 'c')]:
+            os.utime(cache.put(key, b'x' * 10), (mtime, mtime))
+        # Reading 'a' makes it the most recent, so the write of 'd' pushes out 'b'
+        cache.get('a').close()
+        cache.put('d', b'x' * 10)
+        self.assertEqual(sorted(entry.name for entry in os.scandir(cache.directory)), ['a.pdf', 'c.pdf', 'd.pdf'])
+
+        # A single file larger than the budget is still kept
+        cache.put('big', b'x' * 100)
+        cache.get('big').close()
+        self.assertIsNone(cache.get('a'))
+
+    def test_eviction_after_lookup_still_serves_the_pdf(self, render):
+        self.client.get(self.url).close()
+        real_get = PDFCache.get
+
+        def get_then_evict(cache, key):
+            pdf = real_get(cache, key)
+            # A concurrent put() evicts the entry before the response is read
+            os.remove(cache.path_for(key))
+            return pdf
+
+        with mock.patch.object(PDFCache, 'get', autospec=True, side_effect=get_then_evict):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 quotation')
+        self.assertEqual(render.call_count, 1)
+
+        # The next request misses and serves the fresh render from memory
+        with mock.patch.object(PDFCache, 'put', autospec=True) as put:
+            response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 quotation')
+        put.assert_called_once()
+        self.assertEqual(render.call_count, 2)
+
+
+class StockLedgerTests(TestCase):
+    def test_movements_update_on_hand_and_history_reads_from_snapshot(self):
+        item = InventoryItem.objects.create(name="Oil filter", category='part', unit_price=12)
+        StockMovement.objects.record(item, StockMovement.RECEIVE, 10)
+        StockMovement.objects.record(item, StockMovement.ISSUE, 4)
+        StockMovement.objects.record(item, StockMovement.ADJUST, -1)
+        with self.assertRaises(ValidationError):
+            StockMovement.objects.record(item, StockMovement.ISSUE, 6)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 5)
+        self.assertEqual([m.quantity for m in item.movements.order_by('pk')], [10, -4, -1])
+
+        # Spread the movements over three days and snapshot the end of day one
+        day = datetime.datetime(2025, 3, 1, 12, tzinfo=datetime.timezone.utc)
+        for offset, movement in enumerate(item.movements.order_by('pk')):
+            StockMovement.objects.filter(pk=movement.pk).update(created_at=day + datetime.timedelta(days=offset))
+        StockSnapshot.objects.take(day + datetime.timedelta(hours=12))
+        self.assertEqual(item.snapshots.get().quantity, 10)
+
+        expected = {0: 10, 1: 6, 2: 5}
+        for offset, on_hand in expected.items():
+            with self.assertNumQueries(2):
+                self.assertEqual(item.on_hand_at(day + datetime.timedelta(days=offset, hours=1)), on_hand)
+        self.assertEqual(item.on_hand_at(day - datetime.timedelta(hours=1)), 0)
+
+
+class ReorderAlertTests(TestCase):
+    def test_flag_follows_stock_and_reorder_level(self):
+        item = InventoryItem.objects.create(name="Wiper", category='part', unit_price=9, reorder_level=3)
+        other = InventoryItem.objects.create(name="Bulb", category='part', unit_price=2, reorder_level=0)
+        self.assertTrue(item.needs_reorder)
+        self.assertFalse(other.needs_reorder)
+
+        StockMovement.objects.record(item, StockMovement.RECEIVE, 5)
+        self.assertFalse(InventoryItem.objects.needing_reorder().filter(pk=item.pk).exists())
+        StockMovement.objects.record(item, StockMovement.ISSUE, 2)
+        self.assertFalse(InventoryItem.objects.needing_reorder().exists())
+        StockMovement.objects.record(item, StockMovement.ISSUE, 1)
+        self.assertEqual(list(InventoryItem.objects.needing_reorder()), [item])
+
+        # Editing the item must not write back its stale quantity
+        stale = InventoryItem.objects.get(pk=item.pk)
+        StockMovement.objects.record(item, StockMovement.RECEIVE, 10)
+        stale.reorder_level = 20
+        stale.save()
+        item.refresh_from_db()
+        self.assertEqual((item.quantity, item.needs_reorder), (12, True))
+        self.assertEqual(
+            InventoryItem.objects.needing_reorder().with_purchase_suggestion().get().suggested_quantity, 28,
+        )
+
+
+class ReservationTests(WorkshopFixtures, TestCase):
+    def test_parts_reserve_free_stock_oldest_first(self):
+        report = InspectionReport.objects.create(job_card=self.create_jobcard())
+        finding = InspectionFinding.objects.create(inspection=report, description="Worn", severity='high')
+        pad = InventoryItem.objects.create(name="Pad", part_number="BP-100", category='part', unit_price=40)
+        StockMovement.objects.record(pad, StockMovement.RECEIVE, 5)
+        parts = [
+            RequiredPart(finding=finding, part_number="bp 100", description="Front pads", quantity=2),
+            RequiredPart(finding=finding, part_number="BP100", description="Rear pads", quantity=4),
+            RequiredPart(finding=finding, part_number="BP-100", description="Spare pads", quantity=3),
+            RequiredPart(finding=finding, part_number="", description="Clip", quantity=1),
+        ]
+        for part in parts:
+            part.sync_lookup_keys()
+        first, second, _, _ = RequiredPart.objects.bulk_create(parts)
+
+        self.assertEqual(reserve_parts(), (2, 2))
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.reserved_from), ('in_stock', pad))
+        self.assertEqual(pad.reserved_quantity(), 5)
+        self.assertEqual(
+            [(line['part_number'], line['quantity'], line['parts']) for line in to_order_list()],
+            [('BP100', 4, 1), ('', 1, 1)],
+        )
+
+        # Newly received stock goes to the part that was waiting for it
+        StockMovement.objects.record(pad, StockMovement.RECEIVE, 4)
+        self.assertEqual(reserve_parts(), (1, 1))
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'in_stock')
+        self.assertEqual(pad.reserved_quantity(), 9)
+
+        # Completed jobcards are left alone
+        RequiredPart.objects.filter(pk=first.pk).update(status='required')
+        JobCard.objects.filter(pk=report.job_card_id).update(is_active=False)
+        self.assertEqual(reserve_parts(), (0, 0))
+
+    def test_to_order_list_lists_jobcards_for_parts_without_number(self):
+        vehicle = self.create_vehicle()
+        jobcards = [self.create_jobcard(vehicle) for _ in range(2)]
+        for jobcard, description in zip(jobcards, ["Clip", "clip"]):
+            finding = InspectionFinding.objects.create(
+                inspection=InspectionReport.objects.create(job_card=jobcard), description="Loose",
+            )
+            RequiredPart.objects.create(finding=finding, description=description, quantity=2)
+
+        [line] = to_order_list()
+        self.assertEqual((line['quantity'], line['parts']), (4, 2))
+        self.assertEqual(line['jobcards'], [jobcard.pk for jobcard in jobcards])
+
+    def test_issue_cannot_take_units_reserved_for_another_jobcard(self):
+        vehicle = self.create_vehicle()
+        holder, other = [self.create_jobcard(vehicle) for _ in range(2)]
+        finding = InspectionFinding.objects.create(
+            inspection=InspectionReport.objects.create(job_card=holder), description="Worn",
+        )
+        pad = InventoryItem.objects.create(name="Pad", part_number="BP-200", category='part', unit_price=40)
+        StockMovement.objects.record(pad, StockMovement.RECEIVE, 5)
+        RequiredPart.objects.create(finding=finding, part_number="BP-200", description="Pads", quantity=4)
+        self.assertEqual(reserve_parts(), (1, 0))
+
+        with self.assertRaises(ValidationError):
+            StockMovement.objects.record(pad, StockMovement.ISSUE, 2, jobcard=other)
+        StockMovement.objects.record(pad, StockMovement.ISSUE, 1, jobcard=other)
+        # The jobcard holding the reservation can draw on it
+        StockMovement.objects.record(pad, StockMovement.ISSUE, 4, jobcard=holder)
+        pad.refresh_from_db()
+        self.assertEqual(pad.quantity, 0)
+
+    def test_issue_fulfils_the_jobcards_own_reservations(self):
+        vehicle = self.create_vehicle()
+        holder, other = [self.create_jobcard(vehicle) for _ in range(2)]
+        finding = InspectionFinding.objects.create(
+            inspection=InspectionReport.objects.create(job_card=holder), description="Worn",
+        )
+        pad = InventoryItem.objects.create(name="Pad", part_number="BP-300", category='part', unit_price=40)
+        StockMovement.objects.record(pad, StockMovement.RECEIVE, 6)
+        front = RequiredPart.objects.create(finding=finding, part_number="BP-300", description="Front", quantity=2)
+        rear = RequiredPart.objects.create(finding=finding, part_number="BP-300", description="Rear", quantity=3)
+        self.assertEqual(reserve_parts(), (2, 0))
+
+        StockMovement.objects.record(pad, StockMovement.ISSUE, 2, jobcard=holder)
+        front.refresh_from_db()
+        self.assertEqual(front.status, 'installed')
+        self.assertEqual(pad.reserved_quantity(), 3)
+        # 4 on hand, 3 still held for the rear part
+        StockMovement.objects.record(pad, StockMovement.ISSUE, 1, jobcard=other)
+
+        # Issues that only partly cover a part leave it reserved
+        StockMovement.objects.record(pad, StockMovement.ISSUE, 2, jobcard=holder)
+        rear.refresh_from_db()
+        self.assertEqual(rear.status, 'in_stock')
+
+
+class PriceSuggestionTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        jobcard = self.create_jobcard()
+        self.quotations = [
+            Quotation.objects.create(jobcard=jobcard, date_created=datetime.date(2024, 1, day)) for day in (1, 2, 3)
+        ]
+
+    def suggestion(self):
+        return PriceSuggestion.objects.values_list(
+            'description', 'times_quoted', 'last_price', 'median_price', 'common_price',
+        ).get(item_type='part', key='brake pads')
+
+    def test_suggestions_follow_saves_bulk_formsets_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for quotation, price in zip(self.quotations, (100, 130, 100)):
+                QuotationItem.objects.create(quotation=quotation, description="Brake pads", unit_price=price)
+            last = QuotationItem.objects.create(quotation=self.quotations[2], description="brake  PADS", unit_price=90)
+        self.assertEqual(self.suggestion(), ("brake  PADS", 4, 90, 100, 100))
+
+        formset = QuotationItemFormSet(
+            data={
+                'items-TOTAL_FORMS': '1', 'items-INITIAL_FORMS': '1',
+                'items-0-id': str(last.pk), 'items-0-description': "Brake discs",
+                'items-0-quantity': '1', 'items-0-unit_price': '90',
+            },
+            instance=self.quotations[2], queryset=QuotationItem.objects.filter(pk=last.pk), prefix='items',
+        )
+        self.assertTrue(formset.is_valid(), formset.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            formset.bulk_save()
+        self.assertEqual(self.suggestion(), ("Brake pads", 3, 100, 100, 100))
+        self.assertTrue(PriceSuggestion.objects.filter(key='brake discs').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuotationItem.objects.filter(description="Brake discs").get().delete()
+        self.assertFalse(PriceSuggestion.objects.filter(key='brake discs').exists())
+
+    def spy_refresh(self):
+        return mock.patch.object(
+            PriceSuggestionQuerySet, 'refresh', autospec=True, side_effect=PriceSuggestionQuerySet.refresh,
+        )
+
+    def test_quotation_delete_refreshes_its_items_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for description in ("Brake pads", "Oil filter", "Wiper"):
+                QuotationItem.objects.create(quotation=self.quotations[0], description=description, unit_price=10)
+        self.assertEqual(PriceSuggestion.objects.count(), 3)
+
+        with self.spy_refresh() as refresh, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.quotations[0].delete()
+        refresh.assert_called_once()
+        self.assertFalse(PriceSuggestion.objects.exists())
+
+    def test_rolled_back_keys_are_dropped(self):
+        with self.spy_refresh() as refresh, \
+                self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    QuotationItem.objects.create(quotation=self.quotations[1], description="Gone", unit_price=5)
+                    raise ValueError
+            except ValueError:
+                pass
+            QuotationItem.objects.create(quotation=self.quotations[1], description="Brake pads", unit_price=20)
+        refresh.assert_called_once()
+        self.assertEqual(refresh.call_args.args[1], {('part', 'brake pads')})
+        self.assertEqual(list(PriceSuggestion.objects.values_list('key', flat=True)), ["brake pads"])
+
+    def test_long_names_match_inventory(self):
+        # 98 characters, but ẞ folds to "ss", so the key runs past 100
+        name = "Front brake pad set " + "x" * 70 + " ceramic"
+        with self.captureOnCommitCallbacks(execute=True):
+            QuotationItem.objects.create(quotation=self.quotations[0], description=name.replace("x", "ẞ"), unit_price=100)
+        InventoryItem.objects.create(name=name.replace("x", "ẞ"), category='part', unit_price=70)
+
+        self.client.force_login(User.objects.create_user('quoter'))
+        rows = self.client.get(reverse('quotation_price_suggestions'), {'q': "front brake"}).json()['suggestions']
+        self.assertEqual([(row['last_price'], row['stock_price']) for row in rows], [("100.00", "70.00")])
+
+    def test_lookup_folds_in_inventory_prices(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            QuotationItem.objects.create(quotation=self.quotations[0], description="Brake pads", unit_price=100)
+            QuotationItem.objects.create(
+                quotation=self.quotations[0], item_type='service', description="Brake bleed", unit_price=60,
+            )
+        InventoryItem.objects.create(name="Brake Pads", part_number="BP-1", category='part', unit_price=70)
+        InventoryItem.objects.create(name="Brake fluid", category='consumable', unit_price=25)
+
+        self.client.force_login(User.objects.create_user('quoter'))
+        url = reverse('quotation_price_suggestions')
+        with CaptureQueriesContext(connection) as ctx:
+            rows = self.client.get(url, {'q': "brake", 'type': 'part'}).json()['suggestions']
+        # History, then inventory by name and by part number
+        self.assertEqual(sum(table in query['sql'] for query in ctx.captured_queries
+                             for table in ('quotations_', 'inventory_')), 3)
+        self.assertEqual(
+            [(row['description'], row['last_price'], row['stock_price']) for row in rows],
+            [("Brake pads", "100.00", "70.00"), ("Brake fluid", None, "25.00")],
+        )
+        rows = self.client.get(url, {'q': "brake", 'type': 'service'}).json()['suggestions']
+        self.assertEqual([row['description'] for row in rows], ["Brake bleed"])
+
+
+class SearchIndexTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        vehicle = self.create_vehicle(self.create_customer(name="Search"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobcard = self.create_jobcard(vehicle, required_jobs="Replace alternator belt")
+
+    def kinds(self, query):
+        return sorted(hit.kind for hit in search.search(query))
+
+    def test_index_follows_saves_bulk_notes_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobcard.save_job_notes(["Alternator whining at idle"], created=True)
+        self.assertEqual(self.kinds("alternator"), ['jobcard', 'note'])
+
+        note = self.jobcard.job_notes.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobcard.save_job_notes(["Check coolant"], note_ids=[str(note.pk)])
+        self.assertEqual(self.kinds("alternator"), ['jobcard'])
+        self.assertEqual(self.kinds("coolant"), ['note'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobcard.delete()
+        self.assertEqual(self.kinds("alternator coolant"), [])
+
+    def test_related_renames_reindex_titles(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobcard.save_job_notes(["Alternator whining at idle"], created=True)
+            quotation = Quotation.objects.create(jobcard=self.jobcard)
+            QuotationItem.objects.create(quotation=quotation, description="Alternator", unit_price=300)
+        self.assertEqual(self.kinds("search"), ['jobcard', 'note', 'quotation_item'])
+
+        customer, vehicle = self.jobcard.customer, self.jobcard.vehicle
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.name = "Renamed"
+            customer.save()
+            vehicle.plate = "NEW-9"
+            vehicle.save()
+        self.assertEqual(self.kinds("search"), [])
+        self.assertEqual(self.kinds("renamed"), ['jobcard', 'note', 'quotation_item'])
+        self.assertEqual(self.kinds("NEW"), ['jobcard'])
+
+        # Total updates from item deltas do not touch any indexed text
+        with self.captureOnCommitCallbacks() as callbacks:
+            quotation.save(update_fields=Quotation.TOTAL_FIELDS)
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Quotation.objects.get(pk=quotation.pk).save()
+        self.assertEqual(
+            [hit.title for hit in search.search("alternator") if hit.kind == 'quotation_item'],
+            [f"Quotation {quotation.quotation_number} - Renamed"],
+        )
+
+    def test_unindexed_customer_edits_do_not_reindex(self):
+        customer = Customer.objects.get(pk=self.jobcard.customer_id)
+        customer.phone = "0503333333"
+        customer.email = "fleet@example.com"
+        with mock.patch.object(search, 'index_dependents') as reindex, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks:
+            customer.save()
+        self.assertEqual(callbacks, [])
+        reindex.assert_not_called()
+
+        customer.name = "Fleet"
+        with mock.patch.object(search, 'index_dependents') as reindex, \
+                self.captureOnCommitCallbacks(execute=True):
+            customer.save()
+        self.assertEqual(reindex.call_count, 4)
+
+    def test_query_syntax_is_treated_as_text(self):
+        self.assertEqual(self.kinds('alter'), ['jobcard'])
+        self.assertEqual(self.kinds('"belt" OR NEAR(*'), [])
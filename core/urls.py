@@ -1,11 +1,13 @@
 from django.urls import path
 from django.views.generic import RedirectView
-from .views import dashboard_view, register
+from .views import dashboard_view, day_sheet_view, register, search_view
 from django.contrib.auth import views as auth_views
 
 urlpatterns = [
     path('', RedirectView.as_view(url='/dashboard/', permanent=False)),
     path('dashboard/', dashboard_view, name='dashboard'),
+    path('day-sheet/', day_sheet_view, name='day_sheet'),
+    path('search/', search_view, name='search'),
     path('register/', register, name='register'),
     path('password_reset/', auth_views.PasswordResetView.as_view(), name='password_reset'),
     path('password_reset/done/', auth_views.PasswordResetDoneView.as_view(), name='password_reset_done'),
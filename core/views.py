@@ -1,28 +1,75 @@
 from django.shortcuts import render
 from jobcards.models import JobCard
-from customers.models import Customer
-from vehicles.models import Vehicle
-from quotations.models import Quotation
+from quotations.models import Quotation, QuotationItem
+from . import counters, search
+from .day_sheet import WEB_LIMIT, DaySheetFilterForm, DaySheetTooLarge, build_day_sheet
 
 
 from .forms import StyledUserCreationForm
+from django.contrib import messages
 from django.contrib.auth import login
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.shortcuts import redirect
+from django.utils import timezone
 
 def dashboard_view(request):
-    context = {
-        "customers_count": Customer.objects.count(),
-        "vehicles_count": Vehicle.objects.count(),
-        "jobcards_count": JobCard.objects.count(),
-        "active_jobcards_count": JobCard.active.count(),
-        "completed_jobcards_count": JobCard.completed.count(),
-        "recent_jobcards": JobCard.objects.select_related('customer', 'vehicle').order_by('-created_at')[:5],
-    }
-    context['quotations_count'] = Quotation.objects.count()
-    context['recent_quotations'] = Quotation.objects.order_by('-created_at')[:5]
+    counts = counters.get_counts()
+    context = {f"{name}_count": value for name, value in counts.items()}
+    context["recent_jobcards"] = JobCard.objects.for_list().order_by('-created_at')[:5]
+    context['recent_quotations'] = (
+        Quotation.objects.select_related('jobcard__customer', 'jobcard__vehicle')
+        .order_by('-created_at')[:5]
+    )
     return render(request, 'core/dashboard.html', context)
 
 
+@login_required
+def day_sheet_view(request):
+    """All matching jobcards or quotations (active jobs by default) as one PDF.
+
+    Renders serially and at most WEB_LIMIT objects; larger sheets go through
+    ``manage.py print_day_sheet``.
+    """
+    form = DaySheetFilterForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    try:
+        pdf, objects = build_day_sheet(form.cleaned_data, workers=1, limit=WEB_LIMIT)
+    except DaySheetTooLarge as exc:
+        messages.error(request, f"{exc} Narrow the date range or print it with manage.py print_day_sheet.")
+        return redirect('dashboard')
+    if pdf is None:
+        messages.info(request, 'Nothing to print for the selected filters.')
+        return redirect('dashboard')
+
+    kind = form.cleaned_data['kind']
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = f'inline; filename=day-sheet-{kind}-{timezone.localdate():%Y-%m-%d}.pdf'
+    return response
+
+
+@login_required
+def search_view(request):
+    """Ranked full-text hits across jobcards, notes, inspection findings and quotation items."""
+    form = search.SearchForm(request.GET)
+    hits = []
+    if form.is_valid() and form.cleaned_data['q']:
+        hits = search.search(
+            form.cleaned_data['q'],
+            date_from=form.cleaned_data['date_from'],
+            date_to=form.cleaned_data['date_to'],
+        )
+    # Quotation item hits link to their quotation; one lookup for all of them
+    item_ids = [hit.object_id for hit in hits if hit.kind == 'quotation_item']
+    quotation_ids = dict(
+        QuotationItem.objects.filter(pk__in=item_ids).values_list('pk', 'quotation_id')
+    ) if item_ids else {}
+    for hit in hits:
+        hit.quotation_id = quotation_ids.get(hit.object_id)
+    return render(request, 'core/search.html', {'form': form, 'hits': hits})
+
 
 def register(request):
     if request.method == 'POST':
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+from core.lookup import digits_only, folded
+
+
+def backfill_lookup_keys(apps, schema_editor):
+    Customer = apps.get_model('customers', 'Customer')
+    batch = []
+    for obj in Customer.objects.only('name', 'phone').iterator(chunk_size=2000):
+        obj.name_key = folded(obj.name)[:100]
+        obj.phone_key = digits_only(obj.phone)
+        batch.append(obj)
+        if len(batch) == 2000:
+            Customer.objects.bulk_update(batch, ['name_key', 'phone_key'])
+            batch = []
+    Customer.objects.bulk_update(batch, ['name_key', 'phone_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='name_key',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='phone_key',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_lookup_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['name_key'], name='customer_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_key'], name='customer_phone_key_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:54
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_stats(apps, schema_editor):
+    Customer = apps.get_model('customers', 'Customer')
+    JobCard = apps.get_model('jobcards', 'JobCard')
+    Quotation = apps.get_model('quotations', 'Quotation')
+    jobcards = (
+        JobCard.objects.filter(customer=OuterRef('pk')).order_by()
+        .values('customer').annotate(n=Count('pk')).values('n')
+    )
+    quoted = (
+        Quotation.objects.filter(jobcard__customer=OuterRef('pk')).order_by()
+        .values('jobcard__customer').annotate(total=Sum('grand_total')).values('total')
+    )
+    Customer.objects.update(
+        jobcard_count=Coalesce(Subquery(jobcards), Value(0)),
+        quoted_total=Coalesce(Subquery(quoted), Value(Decimal('0.00'))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_customer_lookup_keys'),
+        ('jobcards', '0005_jobcard_customer_date_idx'),
+        ('quotations', '0004_quotation_quotation_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='jobcard_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='quoted_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
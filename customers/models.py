@@ -1,12 +1,77 @@
 # customers/models.py
+from decimal import Decimal
+
+from django.apps import apps
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from core.lookup import LookupKeysMixin, digits_only, folded
+
+
+class CustomerQuerySet(models.QuerySet):
+    def adjust_stats(self, jobcards=0, quoted=Decimal('0.00')):
+        """Shift the lifetime aggregates with one ``UPDATE ... SET x = x + n``."""
+        changes = {}
+        if jobcards:
+            changes['jobcard_count'] = F('jobcard_count') + jobcards
+        if quoted:
+            changes['quoted_total'] = F('quoted_total') + quoted
+        if changes:
+            self.update(**changes)
 
-class Customer(models.Model):
+    def rebuild_stats(self):
+        """Recompute the lifetime aggregates from the jobcard and quotation tables."""
+        JobCard = apps.get_model('jobcards', 'JobCard')
+        Quotation = apps.get_model('quotations', 'Quotation')
+        jobcards = (
+            JobCard.objects.filter(customer=OuterRef('pk')).order_by()
+            .values('customer').annotate(n=Count('pk')).values('n')
+        )
+        quoted = (
+            Quotation.objects.filter(jobcard__customer=OuterRef('pk')).order_by()
+            .values('jobcard__customer').annotate(total=Sum('grand_total')).values('total')
+        )
+        return self.update(
+            jobcard_count=Coalesce(Subquery(jobcards), Value(0)),
+            quoted_total=Coalesce(Subquery(quoted), Value(Decimal('0.00'))),
+        )
+
+
+class Customer(LookupKeysMixin, models.Model):
     name = models.CharField(max_length=100)
     phone = models.CharField(max_length=20)
     email = models.EmailField(blank=True, null=True)
     company = models.CharField(max_length=150, blank=True, null=True)
     trn = models.CharField(max_length=20, blank=True, null=True)
 
+    # Normalized copies of name/phone for indexed prefix lookups (see core.lookup)
+    name_key = models.CharField(max_length=100, blank=True, editable=False)
+    phone_key = models.CharField(max_length=20, blank=True, editable=False)
+
+    # Lifetime aggregates, kept in step by core/signals.py
+    jobcard_count = models.PositiveIntegerField(default=0, editable=False)
+    quoted_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False)
+
+    KEY_SOURCES = {'name_key': ('name', folded), 'phone_key': ('phone', digits_only)}
+    STATS_FIELDS = ('jobcard_count', 'quoted_total')
+
+    objects = CustomerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name_key'], name='customer_name_key_idx'),
+            models.Index(fields=['phone_key'], name='customer_phone_key_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and not self._state.adding:
+            # The aggregates only move through adjust_stats(); writing back this
+            # instance's copy would undo concurrent increments
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.STATS_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name if self.name else self.company
@@ -6,6 +6,7 @@ urlpatterns = [
     path('', CustomerListView.as_view(), name='customer_list'),
     path('create/', CustomerCreateView.as_view(), name='customer_create'),
     path('<int:pk>/', CustomerDetailView.as_view(), name='customer_detail'),
+    path('<int:pk>/history/', CustomerHistoryView.as_view(), name='customer_history'),
     path('<int:pk>/edit/', CustomerUpdateView.as_view(), name='customer_edit'),
     path('<int:pk>/delete/', CustomerDeleteView.as_view(), name='customer_delete'),
 ]
@@ -1,13 +1,17 @@
 # customers/views.py
+from django.http import JsonResponse
 from django.views.generic import CreateView, ListView, DetailView, UpdateView, DeleteView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from .models import Customer
 from .forms import CustomerForm
+from core.pagination import KeysetPaginationMixin
+from jobcards.models import JobCard
 
-class CustomerListView(ListView):
+class CustomerListView(KeysetPaginationMixin, ListView):
     model = Customer
     template_name = 'customers/list.html'
     context_object_name = 'customers'
+    ordering = ['-id']
 
 class CustomerCreateView(CreateView):
     model = Customer
@@ -21,11 +25,60 @@ class CustomerUpdateView(UpdateView):
     template_name = 'customers/edit.html'
     success_url = reverse_lazy('customer_list')
 
+class CustomerHistoryView(KeysetPaginationMixin, ListView):
+    """A customer's jobcards, newest first, as JSON pages.
+
+    The detail page renders the first page and fetches older ones from here
+    with the ``next`` cursor; each page is one index range scan on
+    (customer, date, id) plus one quotation prefetch.
+    """
+    paginate_by = 20
+    ordering = ['-date', '-id']
+
+    def get_queryset(self):
+        return JobCard.objects.filter(customer_id=self.kwargs['pk']).for_history()
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context['page_obj']
+        next_url = None
+        if page.has_next():
+            next_url = f"{reverse('customer_history', args=[self.kwargs['pk']])}?cursor={page.next_cursor}"
+        return JsonResponse({'results': [self._jobcard_json(j) for j in page], 'next': next_url})
+
+    def _jobcard_json(self, jobcard):
+        vehicle = jobcard.vehicle
+        return {
+            'id': jobcard.id,
+            'url': reverse('jobcard_detail', args=[jobcard.id]),
+            'date': jobcard.date.isoformat(),
+            'status': jobcard.get_job_status_display(),
+            'vehicle': f"{vehicle.make} {vehicle.model} - {vehicle.plate}",
+            'quotations': [
+                {
+                    'number': quotation.quotation_number,
+                    'total': str(quotation.grand_total),
+                    'url': reverse('quotation_detail', args=[quotation.id]),
+                }
+                for quotation in jobcard.quotations.all()
+            ],
+        }
+
 class CustomerDetailView(DetailView):
     model = Customer
     template_name = 'customers/detail.html'
     context_object_name = 'customer'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['vehicles'] = self.object.vehicles.only('id', 'customer', 'make', 'model', 'plate').order_by('plate')
+        # First history page, with the cursor the "older" loader continues from
+        history = CustomerHistoryView()
+        history.setup(self.request, pk=self.object.pk)
+        _, page, jobcards, _ = history.paginate_queryset(history.get_queryset(), history.paginate_by)
+        context['jobcards'] = jobcards
+        context['history_page'] = page
+        return context
+
 class CustomerDeleteView(DeleteView):
     model = Customer
     template_name = 'customers/delete_confirm.html'
@@ -1,6 +1,6 @@
 # inspections/admin.py
 from django.contrib import admin
-from .models import InspectionReport, InspectionFinding, RequiredPart, RequiredConsumable
+from .models import InspectionReport, InspectionFinding, RequiredPart, RequiredConsumable, InspectionPDFJob
 
 
 class RequiredPartInline(admin.TabularInline):
@@ -33,9 +33,11 @@ class InspectionFindingInline(admin.StackedInline):
 
 @admin.register(InspectionReport)
 class InspectionReportAdmin(admin.ModelAdmin):
-    list_display = ('id', 'job_card', 'created_by', 'total_findings', 'total_estimated_hours', 'created_at')
+    list_display = ('id', 'job_card', 'created_by', 'finding_count', 'estimated_hours', 'parts_count',
+                    'severities', 'created_at')
+    list_select_related = ('job_card__customer', 'created_by')
     list_filter = ('created_at',)
-    search_fields = ('job_card__id', 'job_card__vehicle__plate_number')
+    search_fields = ('job_card__id', 'job_card__vehicle__plate')
     readonly_fields = ('created_at', 'updated_at', 'total_findings', 'total_estimated_hours')
     inlines = [InspectionFindingInline]
 
@@ -48,3 +50,31 @@ class InspectionReportAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    def get_queryset(self, request):
+        # Changelist columns read these annotations instead of querying per row
+        return super().get_queryset(request).with_metrics()
+
+    @admin.display(description='Findings', ordering='_finding_count')
+    def finding_count(self, obj):
+        return obj.total_findings
+
+    @admin.display(description='Est. hours', ordering='_estimated_hours')
+    def estimated_hours(self, obj):
+        return obj.total_estimated_hours
+
+    @admin.display(description='Parts', ordering='_parts_count')
+    def parts_count(self, obj):
+        return obj.total_parts
+
+    @admin.display(description='Severity')
+    def severities(self, obj):
+        return ', '.join(f'{count} {label.lower()}' for label, count in obj.severity_breakdown if count) or '-'
+
+
+@admin.register(InspectionPDFJob)
+class InspectionPDFJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'report', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('report', 'report_version', 'file_path', 'error', 'attempts',
+                       'created_at', 'started_at', 'finished_at')
@@ -0,0 +1,81 @@
+# inspections/demand.py
+"""Parts and consumables demand across active jobcards, aggregated in SQL.
+
+Parts are grouped by normalized part number (``RequiredPart.part_key``),
+or by description when the number is blank; description keys start with
+``~`` so they never collide with a part number. Consumables are grouped by name and base unit: millilitres, grams
+and centimetres are converted to litres, kilograms and metres inside the
+query. The two grouped selects are combined with UNION ALL, so the whole
+report is one statement whatever the number of jobcards.
+"""
+from django.db.models import Case, CharField, Count, F, FloatField, Max, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat, NullIf, Trim, Upper
+
+from .models import RequiredConsumable, RequiredPart
+
+# unit -> (base unit, factor); units not listed are already base units
+UNIT_CONVERSIONS = {
+    'ml': ('l', 0.001),
+    'g': ('kg', 0.001),
+    'cm': ('m', 0.01),
+}
+PART_STATUSES = [value for value, _ in RequiredPart.STATUS_CHOICES]
+
+
+def _active(queryset, prefix, jobcards):
+    queryset = queryset.filter(**{f'{prefix}__is_active': True})
+    if jobcards is not None:
+        queryset = queryset.filter(**{f'{prefix}__in': jobcards})
+    return queryset.order_by()
+
+
+def parts_demand(jobcards=None):
+    """One row per part or consumable still needed by active jobcards.
+
+    ``jobcards`` narrows the report (e.g. to a status). Rows carry
+    ``kind``, ``key``, ``label``, ``part_number``, ``base_unit``, ``total_quantity``,
+    ``lines``, ``jobcard_count`` and a ``<status>_quantity`` per part
+    status; consumables have no status, so theirs are NULL.
+    """
+    parts = (
+        _active(RequiredPart.objects, 'finding__inspection__job_card', jobcards)
+        .annotate(
+            kind=Value('part'),
+            key=Coalesce(NullIf('part_key', Value('')), Concat(Value('~'), Upper(Trim('description')))),
+            base_unit=Value('pcs'),
+        )
+        .values('kind', 'key', 'base_unit')
+        .annotate(
+            label=Max('description'),
+            part_number=Max('part_number'),
+            total_quantity=Cast(Sum('quantity'), FloatField()),
+            lines=Count('pk'),
+            jobcard_count=Count('finding__inspection__job_card', distinct=True),
+            **{
+                f'{status}_quantity': Coalesce(Sum('quantity', filter=Q(status=status)), 0)
+                for status in PART_STATUSES
+            },
+        )
+    )
+    base_unit = Case(
+        *[When(unit=unit, then=Value(base)) for unit, (base, _) in UNIT_CONVERSIONS.items()],
+        default=F('unit'), output_field=CharField(),
+    )
+    base_quantity = Case(
+        *[When(unit=unit, then=F('quantity') * factor) for unit, (_, factor) in UNIT_CONVERSIONS.items()],
+        default=F('quantity'), output_field=FloatField(),
+    )
+    consumables = (
+        _active(RequiredConsumable.objects, 'finding__inspection__job_card', jobcards)
+        .annotate(kind=Value('consumable'), key=Upper(Trim('name')), base_unit=base_unit)
+        .values('kind', 'key', 'base_unit')
+        .annotate(
+            label=Max('name'),
+            part_number=Value(''),
+            total_quantity=Sum(base_quantity),
+            lines=Count('pk'),
+            jobcard_count=Count('finding__inspection__job_card', distinct=True),
+            **{f'{status}_quantity': Value(None, output_field=FloatField()) for status in PART_STATUSES},
+        )
+    )
+    return parts.union(consumables, all=True).order_by('-kind', 'key', 'base_unit')
@@ -1,5 +1,9 @@
 from django import forms
+from django.db import transaction
 from django.forms import inlineformset_factory
+from core import search
+from core.formsets import BaseBulkInlineFormSet, bulk_write
+from core.lookup import LookupKeysMixin
 from .models import InspectionReport, InspectionFinding, RequiredPart, RequiredConsumable
 
 
@@ -53,6 +57,7 @@ FindingFormSet = inlineformset_factory(
     InspectionReport,
     InspectionFinding,
     form=InspectionFindingForm,
+    formset=BaseBulkInlineFormSet,
     extra=1,
     can_delete=True
 )
@@ -61,6 +66,7 @@ PartFormSet = inlineformset_factory(
     InspectionFinding,
     RequiredPart,
     form=RequiredPartForm,
+    formset=BaseBulkInlineFormSet,
     extra=1,
     can_delete=True
 )
@@ -69,6 +75,44 @@ ConsumableFormSet = inlineformset_factory(
     InspectionFinding,
     RequiredConsumable,
     form=RequiredConsumableForm,
+    formset=BaseBulkInlineFormSet,
     extra=1,
     can_delete=True
 )
+
+
+def save_findings(report, finding_formset, nested_formsets):
+    """Save a report's findings and their parts and consumables in bulk.
+
+    ``nested_formsets`` holds the (parts, consumables) formsets of each finding
+    form, in form order. Every model is written with at most one INSERT, one
+    UPDATE and one DELETE however many findings were edited. Children of
+    deleted findings go with the cascade and children of an unchanged blank
+    finding are dropped, as the formsets' own save() would.
+    """
+    created, updated, deleted = finding_formset.collect_changes(parent=report)
+    removed = {id(finding) for finding in deleted}
+    kept = {id(finding) for finding in created}
+    kept.update(id(form.instance) for form in finding_formset.initial_forms if id(form.instance) not in removed)
+
+    changes = {}
+    for form, formsets in zip(finding_formset.forms, nested_formsets):
+        if id(form.instance) not in kept:
+            continue
+        for formset in formsets:
+            # New findings get their pk from the INSERT below; bulk_create reads it off the parent
+            buckets = changes.setdefault(formset.model, ([], [], [], formset.editable_fields()))
+            for bucket, objects in zip(buckets, formset.collect_changes(parent=form.instance)):
+                bucket.extend(objects)
+
+    with transaction.atomic():
+        bulk_write(InspectionFinding, created, updated, deleted, finding_formset.editable_fields())
+        for model, (new, changed, gone, fields) in changes.items():
+            if issubclass(model, LookupKeysMixin):
+                # Bulk writes skip save(), which keeps the key columns in step
+                for obj in new + changed:
+                    obj.sync_lookup_keys()
+                fields = [*fields, *model.KEY_SOURCES]
+            bulk_write(model, new, changed, gone, fields)
+        # Bulk writes send no post_save; the DELETE does send post_delete
+        search.index_on_commit(created + updated)
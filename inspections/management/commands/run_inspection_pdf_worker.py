@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inspections import pdf_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Render queued inspection report PDFs. Start as many workers as needed; "
+        "each job is claimed by exactly one of them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit instead of polling.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty (default: 2).")
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = pdf_jobs.requeue_stale()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)."))
+
+            job = pdf_jobs.claim_next()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.perf_counter()
+            try:
+                pdf_jobs.run(job)
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f"Job {job.pk} (report {job.report_id}) failed: {e}"))
+                continue
+            self.stdout.write(
+                f"Rendered report {job.report_id} in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspections', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InspectionPDFJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_version', models.DateTimeField(help_text='InspectionReport.updated_at this render reflects')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('file_path', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pdf_jobs', to='inspections.inspectionreport')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='pdf_job_status_created_idx')],
+                'constraints': [models.UniqueConstraint(fields=('report', 'report_version'), name='unique_pdf_job_per_report_version')],
+            },
+        ),
+    ]
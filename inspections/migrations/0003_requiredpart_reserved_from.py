@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspections', '0002_inspectionpdfjob'),
+        ('inventory', '0003_inventoryitem_part_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requiredpart',
+            name='reserved_from',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservations', to='inventory.inventoryitem'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+from core.lookup import alnum_upper
+
+
+def backfill_part_keys(apps, schema_editor):
+    RequiredPart = apps.get_model('inspections', 'RequiredPart')
+    batch = []
+    for obj in RequiredPart.objects.exclude(part_number='').only('part_number').iterator(chunk_size=2000):
+        obj.part_key = alnum_upper(obj.part_number)[:100]
+        batch.append(obj)
+        if len(batch) == 2000:
+            RequiredPart.objects.bulk_update(batch, ['part_key'])
+            batch = []
+    RequiredPart.objects.bulk_update(batch, ['part_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspections', '0003_requiredpart_reserved_from'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requiredpart',
+            name='part_key',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(backfill_part_keys, migrations.RunPython.noop),
+    ]
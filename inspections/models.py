@@ -1,10 +1,40 @@
 # inspections/models.py
+import os
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from core.lookup import LookupKeysMixin, alnum_upper
 from jobcards.models import JobCard
 
 
+class InspectionReportQuerySet(models.QuerySet):
+    def with_metrics(self):
+        """Annotate finding count, estimated hours, findings per severity and parts count in SQL.
+
+        Findings are aggregated over a single join. Parts are counted in a
+        subquery so that their rows do not multiply the finding totals.
+        """
+        severities = {
+            f'_{value}_findings': Count('findings', filter=Q(findings__severity=value))
+            for value, _ in InspectionFinding.SEVERITY_CHOICES
+        }
+        parts = (
+            RequiredPart.objects.filter(finding__inspection=OuterRef('pk'))
+            .order_by().values('finding__inspection')
+            .annotate(count=Count('pk')).values('count')
+        )
+        return self.annotate(
+            _finding_count=Count('findings'),
+            _estimated_hours=Coalesce(Sum('findings__time_required'), Value(0.0)),
+            _parts_count=Coalesce(Subquery(parts), Value(0)),
+            **severities,
+        )
+
+
 class InspectionReport(models.Model):
+    objects = InspectionReportQuerySet.as_manager()
+
     job_card = models.OneToOneField(JobCard, on_delete=models.CASCADE, related_name='inspection_report')
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -13,13 +43,35 @@ class InspectionReport(models.Model):
     def __str__(self):
         return f"Inspection Report for JobCard #{self.job_card.id}"
 
+    # The metrics below read the with_metrics() annotations and only query when they are absent
+
     @property
     def total_findings(self):
+        if hasattr(self, '_finding_count'):
+            return self._finding_count
         return self.findings.count()
 
     @property
     def total_estimated_hours(self):
-        return sum(f.time_required for f in self.findings.all())
+        if hasattr(self, '_estimated_hours'):
+            return self._estimated_hours
+        return self.findings.aggregate(hours=Coalesce(Sum('time_required'), Value(0.0)))['hours']
+
+    @property
+    def total_parts(self):
+        if hasattr(self, '_parts_count'):
+            return self._parts_count
+        return RequiredPart.objects.filter(finding__inspection=self).count()
+
+    @property
+    def severity_breakdown(self):
+        """``(label, count)`` for every severity, most severe first."""
+        choices = InspectionFinding.SEVERITY_CHOICES[::-1]
+        if all(hasattr(self, f'_{value}_findings') for value, _ in choices):
+            counts = {value: getattr(self, f'_{value}_findings') for value, _ in choices}
+        else:
+            counts = dict(self.findings.order_by().values_list('severity').annotate(Count('pk')))
+        return [(label, counts.get(value, 0)) for value, label in choices]
 
 
 class InspectionFinding(models.Model):
@@ -40,7 +92,7 @@ class InspectionFinding(models.Model):
         return f"Finding #{self.id} – {self.severity.title()}"
 
 
-class RequiredPart(models.Model):
+class RequiredPart(LookupKeysMixin, models.Model):
     STATUS_CHOICES = [
         ('required', 'Required'),
         ('ordered', 'Ordered'),
@@ -54,6 +106,15 @@ class RequiredPart(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='required')
     notes = models.TextField(blank=True)
+    # Stock item holding this part while it is 'in_stock' (see inventory.reservations)
+    reserved_from = models.ForeignKey(
+        'inventory.InventoryItem', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='reservations',
+    )
+    # Uppercased, separator-free part number; matched against InventoryItem.part_key
+    part_key = models.CharField(max_length=100, blank=True, editable=False)
+
+    KEY_SOURCES = {'part_key': ('part_number', alnum_upper)}
 
     def __str__(self):
         return f"Part: {self.description}"
@@ -78,3 +139,42 @@ class RequiredConsumable(models.Model):
 
     def __str__(self):
         return f"Consumable: {self.name} ({self.quantity} {self.unit})"
+
+
+class InspectionPDFJob(models.Model):
+    """A queued render of an inspection report PDF.
+
+    Jobs are keyed by the report and its ``updated_at``, so a finished file is
+    reused until the report is saved again.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    report = models.ForeignKey(InspectionReport, related_name='pdf_jobs', on_delete=models.CASCADE)
+    report_version = models.DateTimeField(help_text="InspectionReport.updated_at this render reflects")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    file_path = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['report', 'report_version'], name='unique_pdf_job_per_report_version'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='pdf_job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"PDF job #{self.id} for report #{self.report_id} ({self.status})"
+
+    @property
+    def is_ready(self):
+        return self.status == 'done' and bool(self.file_path) and os.path.exists(self.file_path)
@@ -0,0 +1,118 @@
+# inspections/pdf_jobs.py
+"""Database-backed queue for rendering inspection report PDFs.
+
+Requests only enqueue work; ``manage.py run_inspection_pdf_worker`` claims
+queued jobs and runs WeasyPrint outside the WSGI workers. Claims are a
+conditional UPDATE, so any number of worker processes can share the queue
+without a broker.
+"""
+import datetime
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import InspectionPDFJob, InspectionReport
+
+# A job still "running" after this long is assumed to belong to a dead worker
+STALE_AFTER = datetime.timedelta(minutes=10)
+MAX_ATTEMPTS = 3
+
+
+def enqueue(report):
+    """Return the job for the report's current version, queueing it if needed."""
+    try:
+        with transaction.atomic():
+            job, created = InspectionPDFJob.objects.get_or_create(
+                report=report, report_version=report.updated_at,
+            )
+    except IntegrityError:
+        # A concurrent request queued the same version first
+        job = InspectionPDFJob.objects.get(report=report, report_version=report.updated_at)
+    if job.status == 'failed' and job.attempts < MAX_ATTEMPTS:
+        # Attempts carry over, so a version that always fails stops being retried
+        InspectionPDFJob.objects.filter(pk=job.pk, status='failed').update(status='queued', error='')
+        job.refresh_from_db()
+    elif job.status == 'done' and not job.is_ready:
+        # The file was removed after a successful render; that is not a failure
+        InspectionPDFJob.objects.filter(pk=job.pk, status='done').update(status='queued', attempts=0)
+        job.refresh_from_db()
+    return job
+
+
+def requeue_stale():
+    cutoff = timezone.now() - STALE_AFTER
+    return InspectionPDFJob.objects.filter(
+        status='running', started_at__lt=cutoff, attempts__lt=MAX_ATTEMPTS,
+    ).update(status='queued')
+
+
+def claim_next():
+    """Atomically take the oldest queued job, or return None if the queue is empty."""
+    while True:
+        candidate = (
+            InspectionPDFJob.objects.filter(status='queued')
+            .order_by('created_at', 'id')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if candidate is None:
+            return None
+        claimed = InspectionPDFJob.objects.filter(pk=candidate, status='queued').update(
+            status='running', started_at=timezone.now(), attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return InspectionPDFJob.objects.select_related('report').get(pk=candidate)
+        # Another worker won the race for this job; try the next one
+
+
+def render_inspection_pdf(report):
+    from weasyprint import HTML
+
+    findings = report.findings.prefetch_related('parts', 'consumables')
+    html_string = render_to_string('inspections/pdf.html', {
+        'inspection': report,
+        'findings': findings,
+    })
+    return HTML(string=html_string, base_url=str(settings.BASE_DIR)).write_pdf()
+
+
+def output_path(job):
+    version = job.report_version.strftime('%Y%m%d%H%M%S%f')
+    return os.path.join(str(settings.INSPECTION_PDF_DIR), f'inspection_{job.report_id}_{version}.pdf')
+
+
+def run(job):
+    """Render a claimed job, store the file and drop renders of older versions."""
+    try:
+        report = InspectionReport.objects.select_related('job_card').with_metrics().get(pk=job.report_id)
+        pdf = render_inspection_pdf(report)
+        path = output_path(job)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(pdf)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        InspectionPDFJob.objects.filter(pk=job.pk).update(
+            status='failed', error=str(e), finished_at=timezone.now(),
+        )
+        raise
+
+    InspectionPDFJob.objects.filter(pk=job.pk).update(
+        status='done', file_path=path, error='', finished_at=timezone.now(),
+    )
+    # Only finished renders of older versions; newer ones may still be queued or running
+    older = InspectionPDFJob.objects.filter(
+        report_id=job.report_id, report_version__lt=job.report_version, status__in=('done', 'failed'),
+    )
+    for old in older:
+        if old.file_path and os.path.exists(old.file_path):
+            os.remove(old.file_path)
+        old.delete()
+    job.refresh_from_db()
+    return job
@@ -1,130 +1,90 @@
 document.addEventListener('DOMContentLoaded', () => {
     const findingsContainer = document.getElementById('findings-container');
     const addFindingBtn = document.getElementById('add-finding');
+    const MANAGEMENT = /^(\w+)-(\d+-)?(TOTAL_FORMS|INITIAL_FORMS|MIN_NUM_FORMS|MAX_NUM_FORMS)$/;
 
-    // Helper: Update all form element names and ids to reflect correct indexes
+    // Give an element the form field name `${prefix}-${field}` and the matching id
+    function rename(el, prefix, field) {
+        el.name = `${prefix}-${field}`;
+        el.id = `id_${el.name}`;
+    }
+
+    // Rename the rows of one nested formset (parts or consumables) of finding `fIndex`
+    function updateNested(findingEl, kind, rowClass, fIndex) {
+        const container = findingEl.querySelector(`.${kind}-container`);
+        if (!container) return;
+        const rows = container.querySelectorAll(`.${rowClass}`);
+        rows.forEach((rowEl, rIndex) => {
+            rowEl.querySelectorAll('input, select, textarea').forEach(el => {
+                const field = el.dataset.field || (el.name.match(new RegExp(`^${kind}-\\d+-\\d+-(.+)$`)) || [])[1];
+                if (field) rename(el, `${kind}-${fIndex}-${rIndex}`, field);
+            });
+        });
+        // Management form of this nested formset
+        findingEl.querySelectorAll(`input[name^="${kind}-"]`).forEach(el => {
+            const match = el.name.match(MANAGEMENT);
+            if (!match || match[1] !== kind) return;
+            rename(el, `${kind}-${fIndex}`, match[3]);
+            if (match[3] === 'TOTAL_FORMS') el.value = rows.length;
+        });
+    }
+
+    // Keep every name and id in step with the position of its finding and row
     function updateIndexes() {
         const findings = findingsContainer.querySelectorAll('.finding-item');
         findings.forEach((findingEl, fIndex) => {
-            // Update finding inputs
             findingEl.querySelectorAll('input, select, textarea').forEach(el => {
-                if (el.name) {
-                    el.name = el.name.replace(/\findings-\d+-/, `findings-${fIndex}-`);
-                }
-                if (el.id) {
-                    el.id = el.id.replace(/\findings-\d+-/, `findings-${fIndex}-`);
-                }
+                const match = el.name.match(/^findings-\d+-(.+)$/);
+                if (match) rename(el, `findings-${fIndex}`, match[1]);
             });
-            // Update hidden id and DELETE inputs similarly
-            const idInput = findingEl.querySelector('input[type=hidden][name$="-id"]');
-            if (idInput) {
-                idInput.name = `findings-${fIndex}-id`;
-                idInput.id = `id_findings-${fIndex}-id`;
-            }
-            const deleteInput = findingEl.querySelector('input[type=checkbox][name$="-DELETE"]');
-            if (deleteInput) {
-                deleteInput.name = `findings-${fIndex}-DELETE`;
-                deleteInput.id = `id_findings-${fIndex}-DELETE`;
-            }
-
-            // Update Parts nested formset
-            const partsContainer = findingEl.querySelector('.parts-container');
-            if (partsContainer) {
-                const parts = partsContainer.querySelectorAll('.part-item');
-                parts.forEach((partEl, pIndex) => {
-                    partEl.querySelectorAll('input, select').forEach(el => {
-                        if (el.name) {
-                            el.name = el.name.replace(/parts-\d+-/, `parts-${fIndex}-${pIndex}-`);
-                        }
-                        if (el.id) {
-                            el.id = el.id.replace(/parts-\d+-/, `id_parts-${fIndex}-${pIndex}-`);
-                        }
-                    });
-                    // Hidden id and DELETE for parts
-                    const partIdInput = partEl.querySelector('input[type=hidden][name$="-id"]');
-                    if (partIdInput) {
-                        partIdInput.name = `parts-${fIndex}-${pIndex}-id`;
-                        partIdInput.id = `id_parts-${fIndex}-${pIndex}-id`;
-                    }
-                    const partDeleteInput = partEl.querySelector('input[type=checkbox][name$="-DELETE"]');
-                    if (partDeleteInput) {
-                        partDeleteInput.name = `parts-${fIndex}-${pIndex}-DELETE`;
-                        partDeleteInput.id = `id_parts-${fIndex}-${pIndex}-DELETE`;
-                    }
-                });
-                // Update management form TOTAL_FORMS for parts of this finding
-                const partManagement = findingEl.querySelector('input[name$="TOTAL_FORMS"][name^="parts-"]');
-                if (partManagement) {
-                    partManagement.value = parts.length;
-                    partManagement.name = `parts-${fIndex}-TOTAL_FORMS`;
-                    partManagement.id = `id_parts-${fIndex}-TOTAL_FORMS`;
-                }
-            }
-
-            // Update Consumables nested formset
-            const consumablesContainer = findingEl.querySelector('.consumables-container');
-            if (consumablesContainer) {
-                const consumables = consumablesContainer.querySelectorAll('.consumable-item');
-                consumables.forEach((consEl, cIndex) => {
-                    consEl.querySelectorAll('input, select').forEach(el => {
-                        if (el.name) {
-                            el.name = el.name.replace(/consumables-\d+-/, `consumables-${fIndex}-${cIndex}-`);
-                        }
-                        if (el.id) {
-                            el.id = el.id.replace(/consumables-\d+-/, `id_consumables-${fIndex}-${cIndex}-`);
-                        }
-                    });
-                    // Hidden id and DELETE for consumables
-                    const consIdInput = consEl.querySelector('input[type=hidden][name$="-id"]');
-                    if (consIdInput) {
-                        consIdInput.name = `consumables-${fIndex}-${cIndex}-id`;
-                        consIdInput.id = `id_consumables-${fIndex}-${cIndex}-id`;
-                    }
-                    const consDeleteInput = consEl.querySelector('input[type=checkbox][name$="-DELETE"]');
-                    if (consDeleteInput) {
-                        consDeleteInput.name = `consumables-${fIndex}-${cIndex}-DELETE`;
-                        consDeleteInput.id = `id_consumables-${fIndex}-${cIndex}-DELETE`;
-                    }
-                });
-                // Update management form TOTAL_FORMS for consumables of this finding
-                const consManagement = findingEl.querySelector('input[name$="TOTAL_FORMS"][name^="consumables-"]');
-                if (consManagement) {
-                    consManagement.value = consumables.length;
-                    consManagement.name = `consumables-${fIndex}-TOTAL_FORMS`;
-                    consManagement.id = `id_consumables-${fIndex}-TOTAL_FORMS`;
-                }
-            }
+            updateNested(findingEl, 'parts', 'part-item', fIndex);
+            updateNested(findingEl, 'consumables', 'consumable-item', fIndex);
         });
 
-        // Update TOTAL_FORMS for findings
         const totalFindingForms = document.querySelector('input[name="findings-TOTAL_FORMS"]');
         if (totalFindingForms) {
             totalFindingForms.value = findings.length;
         }
     }
 
+    // Saved rows stay in the formset and are deleted on save; unsaved ones are simply dropped
+    function removeRow(rowEl) {
+        const idInput = rowEl.querySelector('input[type=hidden][name$="-id"]');
+        const deleteInput = rowEl.querySelector('input[type=checkbox][name$="-DELETE"]');
+        if (idInput && idInput.value && deleteInput) {
+            deleteInput.checked = true;
+            rowEl.classList.add('d-none');
+        } else {
+            rowEl.remove();
+            updateIndexes();
+        }
+    }
+
     // Add Finding
     addFindingBtn.addEventListener('click', () => {
-        // Clone the first finding form or create from template if you have one
+        // Clone the first finding as a template for the new one
         const firstFinding = findingsContainer.querySelector('.finding-item');
         if (!firstFinding) return;
 
         const clone = firstFinding.cloneNode(true);
+        clone.classList.remove('d-none');
+        clone.querySelectorAll('.errorlist').forEach(el => el.remove());
 
         // Clear inputs in cloned finding
-        clone.querySelectorAll('input, textarea').forEach(el => {
-            if (el.type === 'hidden' && /-id$/.test(el.name)) {
+        clone.querySelectorAll('input, select, textarea').forEach(el => {
+            if (MANAGEMENT.test(el.name)) {
+                // The new finding has no saved parts or consumables yet
+                if (/INITIAL_FORMS$/.test(el.name)) el.value = '0';
+            } else if (el.type === 'hidden') {
                 el.value = '';
-            } else if (el.type === 'checkbox' && /-DELETE$/.test(el.name)) {
+            } else if (el.type === 'checkbox') {
                 el.checked = false;
-            } else if (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT' || el.tagName === 'SELECT') {
-                if (el.type === 'number') {
-                    el.value = '1.0';
-                } else if (el.tagName === 'SELECT') {
-                    el.selectedIndex = 1; // e.g. Medium severity by default
-                } else {
-                    el.value = '';
-                }
+            } else if (el.tagName === 'SELECT') {
+                el.selectedIndex = 1; // Medium severity by default
+            } else if (el.type === 'number') {
+                el.value = '1.0';
+            } else {
+                el.value = '';
             }
         });
 
@@ -134,25 +94,20 @@ document.addEventListener('DOMContentLoaded', () => {
         const consumablesContainer = clone.querySelector('.consumables-container');
         if (consumablesContainer) consumablesContainer.innerHTML = '';
 
-        // Append clone
         findingsContainer.appendChild(clone);
-
         updateIndexes();
     });
 
     // Delegate click event for dynamic remove buttons on findings, parts, consumables
     findingsContainer.addEventListener('click', e => {
         if (e.target.classList.contains('remove-finding')) {
-            e.target.closest('.finding-item').remove();
-            updateIndexes();
+            removeRow(e.target.closest('.finding-item'));
         }
         if (e.target.classList.contains('remove-part')) {
-            e.target.closest('.part-item').remove();
-            updateIndexes();
+            removeRow(e.target.closest('.part-item'));
         }
         if (e.target.classList.contains('remove-consumable')) {
-            e.target.closest('.consumable-item').remove();
-            updateIndexes();
+            removeRow(e.target.closest('.consumable-item'));
         }
     });
 
@@ -163,22 +118,22 @@ document.addEventListener('DOMContentLoaded', () => {
             const partsContainer = findingEl.querySelector('.parts-container');
             if (!partsContainer) return;
 
-            // Create new part row with empty inputs
+            // New rows are named by updateIndexes() from their data-field
             const newPart = document.createElement('div');
             newPart.classList.add('row', 'mb-2', 'part-item');
             newPart.innerHTML = `
-          <input type="hidden" name="" value="" />
+          <input type="hidden" data-field="id" value="" />
           <div class="col">
-            <input type="text" name="" placeholder="Part number" class="form-control" />
+            <input type="text" data-field="part_number" placeholder="Part number" class="form-control" />
           </div>
           <div class="col">
-            <input type="text" name="" placeholder="Part description" class="form-control" required />
+            <input type="text" data-field="description" placeholder="Part description" class="form-control" required />
           </div>
           <div class="col-2">
-            <input type="number" name="" value="1" min="1" class="form-control" />
+            <input type="number" data-field="quantity" value="1" min="1" class="form-control" />
           </div>
           <div class="col">
-            <select name="" class="form-select">
+            <select data-field="status" class="form-select">
               <option value="required">Required</option>
               <option value="ordered">Ordered</option>
               <option value="in_stock">In Stock</option>
@@ -204,15 +159,15 @@ document.addEventListener('DOMContentLoaded', () => {
             const newConsumable = document.createElement('div');
             newConsumable.classList.add('row', 'mb-2', 'consumable-item');
             newConsumable.innerHTML = `
-          <input type="hidden" name="" value="" />
+          <input type="hidden" data-field="id" value="" />
           <div class="col">
-            <input type="text" name="" placeholder="Consumable name" class="form-control" required />
+            <input type="text" data-field="name" placeholder="Consumable name" class="form-control" required />
           </div>
           <div class="col-2">
-            <input type="number" step="0.1" name="" value="1" class="form-control" />
+            <input type="number" step="0.01" min="0.01" data-field="quantity" value="1" class="form-control" />
           </div>
           <div class="col-2">
-            <select name="" class="form-select">
+            <select data-field="unit" class="form-select">
               <option value="pcs">pcs</option>
               <option value="l">L</option>
               <option value="ml">ml</option>
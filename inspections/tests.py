@@ -1,3 +1,194 @@
-from django.test import TestCase
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import WorkshopFixtures
+from jobcards.models import JobCard
+
+from . import pdf_jobs
+from .demand import parts_demand
+from .models import InspectionFinding, InspectionPDFJob, InspectionReport, RequiredConsumable, RequiredPart
+
+
+class InspectionEditQueryTests(WorkshopFixtures, TestCase):
+    """The nested inspection editor must cost the same queries for any number of findings."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('inspector'))
+        self.customer = self.create_customer()
+
+    def make_report(self, findings):
+        report = InspectionReport.objects.create(job_card=self.create_jobcard(self.create_vehicle(self.customer)))
+        for i in range(findings):
+            finding = InspectionFinding.objects.create(inspection=report, description=f"Finding {i}")
+            RequiredPart.objects.create(finding=finding, description=f"Part {i}")
+        return report
+
+    def post_data(self, report):
+        findings = list(report.findings.order_by('pk'))
+        data = {'findings-TOTAL_FORMS': len(findings), 'findings-INITIAL_FORMS': len(findings)}
+        for i, finding in enumerate(findings):
+            parts = list(finding.parts.order_by('pk'))
+            data.update({
+                f'findings-{i}-id': finding.pk, f'findings-{i}-description': f"Edited {i}",
+                f'findings-{i}-severity': 'high', f'findings-{i}-time_required': '1.5',
+                f'parts-{i}-TOTAL_FORMS': len(parts) + 1, f'parts-{i}-INITIAL_FORMS': len(parts),
+                f'consumables-{i}-TOTAL_FORMS': 0, f'consumables-{i}-INITIAL_FORMS': 0,
+            })
+            for j, part in enumerate(parts):
+                data.update({
+                    f'parts-{i}-{j}-id': part.pk, f'parts-{i}-{j}-description': part.description,
+                    f'parts-{i}-{j}-part_number': "ab 12", f'parts-{i}-{j}-quantity': 2,
+                    f'parts-{i}-{j}-status': 'ordered',
+                })
+            data.update({
+                f'parts-{i}-{len(parts)}-description': "Filter", f'parts-{i}-{len(parts)}-part_number': "of#1/b",
+                f'parts-{i}-{len(parts)}-quantity': 1, f'parts-{i}-{len(parts)}-status': 'required',
+            })
+        # Drop the last finding; its parts go with it
+        data[f'findings-{len(findings) - 1}-DELETE'] = 'on'
+        return data
+
+    def count_queries(self, report):
+        url = reverse('inspections:edit_inspection_report', args=[report.pk])
+        data = self.post_data(report)
+        with CaptureQueriesContext(connection) as get:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as post:
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        return len(get), len(post)
+
+    def test_query_count_does_not_grow_with_findings(self):
+        small, large = self.make_report(2), self.make_report(12)
+        self.assertEqual(self.count_queries(small), self.count_queries(large))
+
+        findings = list(large.findings.order_by('pk'))
+        self.assertEqual([f.description for f in findings], [f"Edited {i}" for i in range(11)])
+        parts = RequiredPart.objects.filter(finding__inspection=large)
+        self.assertEqual(parts.count(), 22)
+        self.assertEqual(parts.filter(quantity=2, status='ordered', part_key="AB12").count(), 11)
+        self.assertEqual(parts.filter(description="Filter", part_key="OF1B").count(), 11)
+
+
+class InspectionMetricsTests(WorkshopFixtures, TestCase):
+    def test_annotations_match_fallback_and_list_is_flat(self):
+        customer = self.create_customer()
+        for i in range(3):
+            vehicle = self.create_vehicle(customer, plate=f"MET-{i}")
+            report = InspectionReport.objects.create(job_card=self.create_jobcard(vehicle))
+            for severity in ('high', 'high', 'low')[:i + 1]:
+                finding = InspectionFinding.objects.create(
+                    inspection=report, description="Worn", severity=severity, time_required=1.5,
+                )
+                RequiredPart.objects.bulk_create(RequiredPart(finding=finding, description="Pad") for _ in range(2))
+
+        for report in InspectionReport.objects.with_metrics():
+            plain = InspectionReport.objects.get(pk=report.pk)
+            with self.assertNumQueries(0):
+                metrics = (report.total_findings, report.total_estimated_hours,
+                           report.total_parts, report.severity_breakdown)
+            self.assertEqual(metrics, (plain.total_findings, plain.total_estimated_hours,
+                                       plain.total_parts, plain.severity_breakdown))
+
+        report = InspectionReport.objects.with_metrics().get(job_card__vehicle__plate="MET-2")
+        self.assertEqual((report.total_findings, report.total_estimated_hours, report.total_parts), (3, 4.5, 6))
+        self.assertIn(('High', 2), report.severity_breakdown)
+
+        self.client.force_login(User.objects.create_user('lister'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('inspections:inspection_list'))
+        # Reports and all their metrics come from one query
+        self.assertEqual(sum('inspections_' in query['sql'] for query in ctx.captured_queries), 1)
+
+
+@override_settings(INSPECTION_PDF_DIR=tempfile.mkdtemp())
+@mock.patch('inspections.pdf_jobs.render_inspection_pdf', return_value=b'%PDF-1.4 test')
+class InspectionPDFJobTests(WorkshopFixtures, TestCase):
+    def setUp(self):
+        self.report = InspectionReport.objects.create(job_card=self.create_jobcard())
+
+    def test_enqueue_is_idempotent_per_version_and_claims_once(self, render):
+        job = pdf_jobs.enqueue(self.report)
+        self.assertEqual(pdf_jobs.enqueue(self.report).pk, job.pk)
+        claimed = pdf_jobs.claim_next()
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (job.pk, 'running', 1))
+        self.assertIsNone(pdf_jobs.claim_next())
+
+        done = pdf_jobs.run(claimed)
+        self.assertTrue(done.is_ready)
+        self.assertEqual(pdf_jobs.enqueue(self.report).pk, job.pk)
+
+    def test_cleanup_keeps_newer_versions_in_flight(self, render):
+        old = pdf_jobs.enqueue(self.report)
+        pdf_jobs.run(pdf_jobs.claim_next())
+        self.report.save()
+        current = pdf_jobs.enqueue(self.report)
+        self.report.save()
+        newer = pdf_jobs.enqueue(self.report)
+
+        pdf_jobs.run(pdf_jobs.claim_next())
+        remaining = set(InspectionPDFJob.objects.values_list('pk', 'status'))
+        # The older finished render is gone; the newer queued one is untouched
+        self.assertEqual(remaining, {(current.pk, 'done'), (newer.pk, 'queued')})
+        self.assertFalse(os.path.exists(pdf_jobs.output_path(old)))
+
+    def test_failing_version_stops_after_max_attempts(self, render):
+        render.side_effect = RuntimeError("bad template")
+        for attempt in range(1, pdf_jobs.MAX_ATTEMPTS + 1):
+            job = pdf_jobs.enqueue(self.report)
+            self.assertEqual(job.status, 'queued')
+            with self.assertRaises(RuntimeError):
+                pdf_jobs.run(pdf_jobs.claim_next())
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('failed', attempt))
+        self.assertEqual(pdf_jobs.enqueue(self.report).status, 'failed')
+        self.assertIsNone(pdf_jobs.claim_next())
+
+
+class PartsDemandTests(WorkshopFixtures, TestCase):
+    def test_demand_groups_parts_and_converts_units_in_one_query(self):
+        customer = self.create_customer()
+        findings = []
+        for status in ['parts_sourcing', 'waiting_parts', 'delivered']:
+            jobcard = self.create_jobcard(self.create_vehicle(customer), job_status=status)
+            report = InspectionReport.objects.create(job_card=jobcard)
+            findings.append(InspectionFinding.objects.create(inspection=report, description="Leak"))
+        for finding in findings:
+            RequiredPart.objects.create(finding=finding, part_number="oc-22", description="Oil cooler", quantity=2)
+            RequiredConsumable.objects.create(finding=finding, name="Coolant", quantity=750, unit='ml')
+            RequiredConsumable.objects.create(finding=finding, name="coolant ", quantity=1, unit='l')
+        RequiredPart.objects.create(
+            finding=findings[0], part_number="OC#22", description="Oil cooler", quantity=1, status='ordered',
+        )
+
+        with self.assertNumQueries(1):
+            rows = list(parts_demand())
+        # The delivered jobcard is not active and is left out
+        self.assertEqual(
+            [(row['kind'], row['key'], row['base_unit'], row['total_quantity'], row['jobcard_count'])
+             for row in rows],
+            [('part', 'OC22', 'pcs', 5, 2), ('consumable', 'COOLANT', 'l', 3.5, 2)],
+        )
+        self.assertEqual((rows[0]['required_quantity'], rows[0]['ordered_quantity']), (4, 1))
+
+        waiting = JobCard.objects.filter(job_status='waiting_parts')
+        self.assertEqual([row['total_quantity'] for row in parts_demand(waiting)], [2, 1.75])
+
+    def test_descriptions_do_not_merge_with_part_numbers(self):
+        report = InspectionReport.objects.create(job_card=self.create_jobcard())
+        finding = InspectionFinding.objects.create(inspection=report, description="Worn")
+        RequiredPart.objects.create(finding=finding, part_number="ABC-123", description="Filter", quantity=1)
+        RequiredPart.objects.create(finding=finding, description="abc123", quantity=2)
+        RequiredPart.objects.create(finding=finding, description=" ABC123", quantity=3)
+
+        self.assertEqual(
+            [(row['key'], row['total_quantity'], row['lines']) for row in parts_demand()],
+            [('ABC123', 1, 1), ('~ABC123', 5, 2)],
+        )
@@ -6,6 +6,10 @@ app_name = 'inspections'
 urlpatterns = [
     path('', views.inspection_list, name='inspection_list'),
 
+    # Parts and consumables still needed across active jobcards
+    path('demand/', views.parts_demand_report, name='parts_demand'),
+    path('demand/export/', views.PartsDemandExportView.as_view(), name='parts_demand_export'),
+
     # Create report for a specific job card
     path('create/<int:jobcard_id>/', views.create_inspection_report, name='create_inspection_report'),
 
@@ -14,6 +18,11 @@ urlpatterns = [
     path('<int:pk>/', views.inspection_detail, name='inspection_detail'),
     path('<int:pk>/pdf/', views.inspection_pdf, name='inspection_pdf'),
 
+    # Background PDF rendering: queue a job, poll it, download the result
+    path('<int:pk>/pdf/enqueue/', views.enqueue_inspection_pdf, name='enqueue_inspection_pdf'),
+    path('pdf-jobs/<int:job_id>/', views.inspection_pdf_job, name='inspection_pdf_job'),
+    path('pdf-jobs/<int:job_id>/download/', views.inspection_pdf_download, name='inspection_pdf_download'),
+
     # Manage parts and consumables linked to a finding
     # path('finding/<int:finding_pk>/parts/', views.manage_parts, name='manage_parts'),
     # path('finding/<int:finding_pk>/consumables/', views.manage_consumables, name='manage_consumables'),
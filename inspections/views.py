@@ -2,11 +2,16 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.forms import inlineformset_factory
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.utils import timezone
-from django.http import HttpResponse
-from weasyprint import HTML
-from .forms import InspectionReportForm, FindingFormSet, PartFormSet, ConsumableFormSet
-from .models import InspectionReport, InspectionFinding
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from core.exports import ExportFilterForm, StreamingExportView
+from . import pdf_jobs
+from .demand import parts_demand
+from .forms import InspectionReportForm, FindingFormSet, PartFormSet, ConsumableFormSet, save_findings
+from .models import InspectionReport, InspectionFinding, InspectionPDFJob, RequiredPart, RequiredConsumable
 from jobcards.models import JobCard
 
 
@@ -38,80 +43,110 @@ def create_inspection_report(request, jobcard_id):
     })
 
 
+def _nested_formsets(finding_formset, data=None):
+    """Parts and consumables formsets per finding form, fed from the findings' prefetched rows."""
+    nested = []
+    for i, finding_form in enumerate(finding_formset.forms):
+        finding = finding_form.instance
+        parts = list(finding.parts.all()) if finding.pk else []
+        consumables = list(finding.consumables.all()) if finding.pk else []
+        nested.append((
+            PartFormSet(data, prefix=f'parts-{i}', instance=finding, objects=parts),
+            ConsumableFormSet(data, prefix=f'consumables-{i}', instance=finding, objects=consumables),
+        ))
+    return nested
+
+
 @login_required
 def edit_inspection_report(request, pk):
-    report = get_object_or_404(InspectionReport, pk=pk)
+    report = get_object_or_404(InspectionReport.objects.select_related('job_card__vehicle'), pk=pk)
 
-    # Formsets
-    finding_formset = FindingFormSet(request.POST or None, instance=report)
-
-    part_formsets = []
-    consumable_formsets = []
+    # One query per level: findings, then all their parts, then all their consumables
+    findings = InspectionFinding.objects.order_by('pk').prefetch_related(
+        Prefetch('parts', queryset=RequiredPart.objects.order_by('pk')),
+        Prefetch('consumables', queryset=RequiredConsumable.objects.order_by('pk')),
+    )
+    data = request.POST if request.method == 'POST' else None
+    finding_formset = FindingFormSet(data, instance=report, queryset=findings)
+    nested_formsets = _nested_formsets(finding_formset, data)
 
     if request.method == 'POST':
-        # Create Part/Consumable formsets for each finding with POST data
         valid = finding_formset.is_valid()
-
-        for i, finding_form in enumerate(finding_formset.forms):
-            finding_instance = finding_form.instance if finding_form.instance.pk else None
-            part_fs = PartFormSet(
-                request.POST, prefix=f'parts-{i}', instance=finding_instance
-            )
-            consumable_fs = ConsumableFormSet(
-                request.POST, prefix=f'consumables-{i}', instance=finding_instance
-            )
-            part_formsets.append(part_fs)
-            consumable_formsets.append(consumable_fs)
-
+        for part_fs, consumable_fs in nested_formsets:
             if not part_fs.is_valid() or not consumable_fs.is_valid():
                 valid = False
 
         if valid:
-            report.updated_at = timezone.now()
-            report.save()
-
-            findings = finding_formset.save(commit=False)
-            # Save findings and nested formsets
-            for i, finding in enumerate(findings):
-                finding.inspection = report
-                finding.save()
-
-                part_formsets[i].instance = finding
-                consumable_formsets[i].instance = finding
-
-                part_formsets[i].save()
-                consumable_formsets[i].save()
-
-            # Delete findings marked for deletion
-            for finding in finding_formset.deleted_objects:
-                finding.delete()
+            with transaction.atomic():
+                report.save(update_fields=['updated_at'])
+                save_findings(report, finding_formset, nested_formsets)
 
             messages.success(request, "Inspection report updated successfully.")
             return redirect('inspections:inspection_detail', pk=report.id)
         else:
             messages.error(request, "Please fix errors in the form and nested parts/consumables.")
-    else:
-        # GET: prepare nested formsets for existing findings
-        for i, finding_form in enumerate(finding_formset.forms):
-            finding_instance = finding_form.instance if finding_form.instance.pk else None
-            part_formsets.append(PartFormSet(prefix=f'parts-{i}', instance=finding_instance))
-            consumable_formsets.append(ConsumableFormSet(prefix=f'consumables-{i}', instance=finding_instance))
 
     return render(request, 'inspections/edit_nested.html', {
         'report_form': InspectionReportForm(instance=report),
         'finding_formset': finding_formset,
-        'part_formsets': part_formsets,
-        'consumable_formsets': consumable_formsets,
+        'finding_rows': [
+            (finding_form, part_fs, consumable_fs)
+            for finding_form, (part_fs, consumable_fs) in zip(finding_formset.forms, nested_formsets)
+        ],
         'report': report,
     })
 
 
 @login_required
 def inspection_list(request):
-    reports = InspectionReport.objects.select_related('job_card__vehicle').order_by('-created_at')
+    reports = InspectionReport.objects.select_related('job_card__vehicle').with_metrics().order_by('-created_at')
     return render(request, 'inspections/list.html', {'reports': reports})
 
 
+class PartsDemandExportView(StreamingExportView):
+    """CSV/XLSX export of the parts demand report; filters narrow the jobcards it covers."""
+    filename = 'parts_demand'
+    date_field = 'date'
+    status_field = 'job_status'
+    customer_field = 'customer_id'
+    # Same order as the columns of parts_demand(), which a union cannot reorder
+    columns = [
+        ('Type', 'kind'),
+        ('Key', 'key'),
+        ('Unit', 'base_unit'),
+        ('Description', 'label'),
+        ('Part No.', 'part_number'),
+        ('Quantity', 'total_quantity'),
+        ('Lines', 'lines'),
+        ('Job Cards', 'jobcard_count'),
+        *[(f'{label} Qty', f'{value}_quantity') for value, label in RequiredPart.STATUS_CHOICES],
+    ]
+
+    def get_queryset(self):
+        return JobCard.objects.all()
+
+    def filter_queryset(self, queryset, filters):
+        return parts_demand(super().filter_queryset(queryset, filters))
+
+    def format_row(self, row):
+        row = list(row)
+        row[5] = round(row[5], 3)
+        return row
+
+
+@login_required
+def parts_demand_report(request):
+    form = ExportFilterForm(request.GET)
+    jobcards = None
+    if form.is_valid() and form.cleaned_data['status']:
+        jobcards = JobCard.objects.filter(job_status=form.cleaned_data['status'])
+    return render(request, 'inspections/demand.html', {
+        'rows': parts_demand(jobcards),
+        'status_choices': JobCard._meta.get_field('job_status').choices,
+        'selected_status': form.cleaned_data.get('status', '') if form.is_valid() else '',
+    })
+
+
 @login_required
 def inspection_detail(request, pk):
     job_card = get_object_or_404(JobCard, id=pk)
@@ -124,19 +159,55 @@ def inspection_detail(request, pk):
     })
 
 
+def _job_payload(job):
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'error': job.error,
+        'status_url': reverse('inspections:inspection_pdf_job', args=[job.id]),
+        'download_url': reverse('inspections:inspection_pdf_download', args=[job.id]) if job.is_ready else None,
+    }
+
+
+def _pdf_file_response(job):
+    return FileResponse(
+        open(job.file_path, 'rb'),
+        as_attachment=True,
+        filename=f"inspection_report_{job.report_id}.pdf",
+        content_type='application/pdf',
+    )
+
+
 @login_required
 def inspection_pdf(request, pk):
+    """Serve the rendered PDF if it is current, otherwise queue it and show a waiting page."""
     inspection = get_object_or_404(InspectionReport, job_card=pk)
-    findings = inspection.findings.prefetch_related('parts', 'consumables')
-
-    html_string = render_to_string('inspections/pdf.html', {
+    job = pdf_jobs.enqueue(inspection)
+    if job.is_ready:
+        return _pdf_file_response(job)
+    return render(request, 'inspections/pdf_pending.html', {
         'inspection': inspection,
-        'findings': findings,
+        'job': _job_payload(job),
     })
 
-    html = HTML(string=html_string, base_url=request.build_absolute_uri())
-    pdf = html.write_pdf()
 
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="inspection_report_{inspection.id}.pdf"'
-    return response
+@login_required
+@require_POST
+def enqueue_inspection_pdf(request, pk):
+    inspection = get_object_or_404(InspectionReport, job_card=pk)
+    job = pdf_jobs.enqueue(inspection)
+    return JsonResponse(_job_payload(job), status=200 if job.is_ready else 202)
+
+
+@login_required
+def inspection_pdf_job(request, job_id):
+    job = get_object_or_404(InspectionPDFJob, pk=job_id)
+    return JsonResponse(_job_payload(job))
+
+
+@login_required
+def inspection_pdf_download(request, job_id):
+    job = get_object_or_404(InspectionPDFJob, pk=job_id)
+    if not job.is_ready:
+        return JsonResponse(_job_payload(job), status=409)
+    return _pdf_file_response(job)
@@ -0,0 +1,37 @@
+# inventory/admin.py
+from django.contrib import admin
+from .models import InventoryItem, StockMovement, StockSnapshot
+
+
+@admin.register(InventoryItem)
+class InventoryItemAdmin(admin.ModelAdmin):
+    list_display = ['name', 'category', 'quantity', 'reorder_level', 'unit_price', 'location']
+    list_filter = ['category']
+    search_fields = ['name']
+    # Stock changes go through the movement ledger
+    readonly_fields = ['quantity']
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'item', 'kind', 'quantity', 'jobcard', 'created_by']
+    list_filter = ['kind']
+    list_select_related = ['item', 'jobcard__customer', 'created_by']
+    raw_id_fields = ['item', 'jobcard']
+
+    # The ledger is append-only and movements must go through record() to move stock
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['taken_at', 'item', 'quantity']
+    list_select_related = ['item']
+    raw_id_fields = ['item']
@@ -0,0 +1,59 @@
+from django import forms
+from core.lookup import alnum_upper
+from jobcards.models import JobCard
+from .models import InventoryItem, StockMovement
+
+
+class InventoryItemForm(forms.ModelForm):
+    class Meta:
+        model = InventoryItem
+        fields = ['name', 'part_number', 'category', 'reorder_level', 'unit_price', 'location']
+
+    def clean_part_number(self):
+        # The unique constraint is on the normalized key, which the form does not include
+        part_number = self.cleaned_data['part_number']
+        key = alnum_upper(part_number)
+        if key and InventoryItem.objects.with_part_keys([key]).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError("Another item already has this part number.")
+        return part_number
+
+
+class StockMovementForm(forms.Form):
+    kind = forms.ChoiceField(choices=StockMovement.KINDS, widget=forms.Select(attrs={'class': 'form-select'}))
+    quantity = forms.IntegerField(
+        help_text="Adjustments take a signed change, e.g. -2 after a stock count.",
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    # Typed as a job card number; a select over every job card would not scale
+    jobcard = forms.ModelChoiceField(
+        queryset=JobCard.objects.all(), required=False, label="Job Card #",
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    note = forms.CharField(max_length=255, required=False, widget=forms.TextInput(attrs={'class': 'form-control'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        kind, quantity = cleaned_data.get('kind'), cleaned_data.get('quantity')
+        if kind in StockMovement.JOBCARD_KINDS and not cleaned_data.get('jobcard') and 'jobcard' not in self.errors:
+            self.add_error('jobcard', "Issues and returns must name a job card.")
+        if kind and quantity is not None:
+            try:
+                StockMovement.signed_quantity(kind, quantity)
+            except forms.ValidationError as e:
+                self.add_error('quantity', e)
+        return cleaned_data
+
+    def save(self, item, user=None):
+        """Record the movement; raises ValidationError when stock would go negative."""
+        return StockMovement.objects.record(
+            item,
+            self.cleaned_data['kind'],
+            self.cleaned_data['quantity'],
+            jobcard=self.cleaned_data.get('jobcard'),
+            user=user,
+            note=self.cleaned_data['note'],
+        )
+
+
+class OnHandAtForm(forms.Form):
+    at = forms.DateField(label="On hand at end of", widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
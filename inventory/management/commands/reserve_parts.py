@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.reservations import reserve_parts
+
+
+class Command(BaseCommand):
+    help = "Reserve inventory stock for the required parts of every active job card."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        reserved, unreserved = reserve_parts()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Reserved {reserved} part(s), {unreserved} left to order ({elapsed:.2f}s)."
+        ))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:07
+
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+
+
+def backfill_flags(apps, schema_editor):
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventoryItem.objects.update(
+        needs_reorder=Case(When(quantity__lt=F('reorder_level'), then=Value(True)), default=Value(False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='needs_reorder',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_flags, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('needs_reorder', True)), fields=['id'], name='inventoryitem_reorder_idx'),
+        ),
+    ]
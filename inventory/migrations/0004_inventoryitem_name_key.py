@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+from core.lookup import folded
+
+
+def backfill_name_keys(apps, schema_editor):
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    batch = []
+    for obj in InventoryItem.objects.only('name').iterator(chunk_size=2000):
+        obj.name_key = folded(obj.name)[:100]
+        batch.append(obj)
+        if len(batch) == 2000:
+            InventoryItem.objects.bulk_update(batch, ['name_key'])
+            batch = []
+    InventoryItem.objects.bulk_update(batch, ['name_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_inventoryitem_part_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='name_key',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(backfill_name_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['name_key'], name='inventoryitem_name_key_idx'),
+        ),
+    ]
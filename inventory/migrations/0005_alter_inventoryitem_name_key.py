@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+from core.lookup import folded
+
+
+def rebuild_truncated_name_keys(apps, schema_editor):
+    # Only keys cut at the old 100 characters can change
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    batch = []
+    for obj in InventoryItem.objects.filter(name_key__regex=r'^.{100}$').only('name').iterator(chunk_size=2000):
+        obj.name_key = folded(obj.name)[:255]
+        batch.append(obj)
+        if len(batch) == 2000:
+            InventoryItem.objects.bulk_update(batch, ['name_key'])
+            batch = []
+    InventoryItem.objects.bulk_update(batch, ['name_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_inventoryitem_name_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='name_key',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(rebuild_truncated_name_keys, migrations.RunPython.noop),
+    ]
@@ -1,18 +1,283 @@
-from django.db import models
+import datetime
 
-class InventoryItem(models.Model):
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from core.lookup import LookupKeysMixin, alnum_upper, folded
+
+# Taken as the previous snapshot of an item that has none yet
+LEDGER_START = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def reorder_flag(change=0):
+    """SQL for "below reorder level" once ``change`` is added to the row's current quantity."""
+    return Case(When(quantity__lt=F('reorder_level') - change, then=Value(True)), default=Value(False))
+
+
+class InventoryItemQuerySet(models.QuerySet):
+    def needing_reorder(self):
+        # Served by the partial index on flagged rows, however large the catalog
+        return self.filter(needs_reorder=True)
+
+    def with_part_keys(self, keys):
+        # Restating the index condition lets SQLite use the partial unique index on part_key
+        return self.filter(~Q(part_key=''), part_key__in=keys)
+
+    def with_purchase_suggestion(self, cover=2):
+        """Annotate ``suggested_quantity`` and its ``suggested_cost``.
+
+        The quantity brings stock back up to ``cover`` times the reorder level.
+        """
+        return self.annotate(
+            suggested_quantity=Greatest(F('reorder_level') * cover - F('quantity'), Value(1)),
+        ).annotate(
+            suggested_cost=ExpressionWrapper(
+                F('suggested_quantity') * F('unit_price'), output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+
+    def refresh_reorder_flags(self):
+        """Recompute needs_reorder for these items in one UPDATE."""
+        return self.update(needs_reorder=reorder_flag())
+
+
+class InventoryItem(LookupKeysMixin, models.Model):
     CATEGORIES = [
         ('part', 'Part'),
         ('consumable', 'Consumable'),
         ('tool', 'Tool'),
     ]
-    
+
     name = models.CharField(max_length=100)
+    part_number = models.CharField(max_length=100, blank=True)
     category = models.CharField(max_length=20, choices=CATEGORIES)
-    quantity = models.IntegerField(default=0)
+    # On hand; only StockMovement.objects.record() changes it
+    quantity = models.IntegerField(default=0, editable=False)
     reorder_level = models.IntegerField(default=5)
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     location = models.CharField(max_length=50, blank=True)
-    
+    # quantity < reorder_level, kept in step by record() and save()
+    needs_reorder = models.BooleanField(default=False, editable=False)
+    # Uppercased, separator-free part number that inspection parts are matched on
+    part_key = models.CharField(max_length=100, blank=True, editable=False)
+    # Case-folded name for the quotation price typeahead; as long as
+    # PriceSuggestion.key so the two line up for long names
+    name_key = models.CharField(max_length=255, blank=True, editable=False)
+
+    KEY_SOURCES = {'part_key': ('part_number', alnum_upper), 'name_key': ('name', folded)}
+    STOCK_FIELDS = ('quantity', 'needs_reorder')
+
+    objects = InventoryItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Only flagged items are indexed, so the alert list never walks the catalog
+            models.Index(fields=['id'], condition=Q(needs_reorder=True), name='inventoryitem_reorder_idx'),
+            models.Index(fields=['name_key'], name='inventoryitem_name_key_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['part_key'], condition=~Q(part_key=''), name='inventoryitem_part_key_uniq',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding:
+            self.needs_reorder = self.quantity < self.reorder_level
+            super().save(*args, **kwargs)
+            return
+        if update_fields is None:
+            # Stock only moves through record(); writing back this instance's
+            # quantity would undo concurrent movements
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.STOCK_FIELDS
+            ]
+        kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        if 'reorder_level' in update_fields:
+            type(self).objects.filter(pk=self.pk).refresh_reorder_flags()
+
+    def reserved_quantity(self):
+        """Units held for inspection parts (see inventory.reservations)."""
+        return self.reservations.filter(status='in_stock').aggregate(
+            total=Coalesce(Sum('quantity'), 0),
+        )['total']
+
+    def on_hand_at(self, when):
+        return StockMovement.objects.on_hand_at(self.pk, when)
+
+    def __str__(self):
+        return f"{self.name} (Qty: {self.quantity})"
+
+
+class StockMovementQuerySet(models.QuerySet):
+    def record(self, item, kind, quantity, jobcard=None, user=None, note=''):
+        """Append a movement and apply it to the item's on-hand quantity atomically.
+
+        ``quantity`` is the amount moved; its sign comes from ``kind`` except
+        for adjustments, which are signed as given. The on-hand change is one
+        ``UPDATE ... SET quantity = quantity + n`` so concurrent movements
+        never overwrite each other; the same statement moves the item in or
+        out of the reorder set. A movement that would take stock below
+        zero matches no row and is refused with a ValidationError. An issue
+        may not dip into units reserved for other jobcards' parts either;
+        that check is part of the same statement, so it cannot race a
+        reservation pass. An issue for ``jobcard`` also marks the parts it
+        reserved from the item installed, oldest first, as far as the issued
+        units cover them. ``item`` itself is not refreshed.
+        """
+        change = StockMovement.signed_quantity(kind, quantity)
+        item_id = getattr(item, 'pk', item)
+        with transaction.atomic():
+            rows = InventoryItem.objects.filter(pk=item_id)
+            if kind == StockMovement.ISSUE:
+                rows = rows.filter(quantity__gte=Value(-change) + self.held_elsewhere(jobcard))
+            elif change < 0:
+                rows = rows.filter(quantity__gte=-change)
+            if not rows.update(quantity=F('quantity') + change, needs_reorder=reorder_flag(change)):
+                raise ValidationError("Not enough stock on hand for this movement.", code='insufficient_stock')
+            if kind == StockMovement.ISSUE and jobcard is not None:
+                self.fulfil_reservations(item_id, jobcard, -change)
+            return self.create(
+                item_id=item_id, kind=kind, quantity=change, jobcard=jobcard, created_by=user, note=note,
+            )
+
+    @staticmethod
+    def _reservations():
+        # RequiredPart, reached through the relation to avoid importing inspections here
+        return InventoryItem._meta.get_field('reservations').related_model.objects.filter(status='in_stock')
+
+    def fulfil_reservations(self, item_id, jobcard, issued):
+        """Mark ``jobcard``'s parts reserved from the item installed while ``issued`` units cover them.
+
+        A part only partly covered keeps its reservation.
+        """
+        parts = (
+            self._reservations().filter(reserved_from=item_id, finding__inspection__job_card=jobcard)
+            .order_by('pk').values_list('pk', 'quantity')
+        )
+        installed = []
+        for pk, quantity in parts:
+            if quantity > issued:
+                break
+            installed.append(pk)
+            issued -= quantity
+        if installed:
+            self._reservations().filter(pk__in=installed).update(status='installed')
+
+    @classmethod
+    def held_elsewhere(cls, jobcard):
+        """Units of the outer item reserved for parts on jobcards other than ``jobcard``."""
+        reservations = cls._reservations().filter(reserved_from=OuterRef('pk'))
+        if jobcard is not None:
+            reservations = reservations.exclude(finding__inspection__job_card=jobcard)
+        return Coalesce(Subquery(
+            reservations.order_by().values('reserved_from').annotate(total=Sum('quantity')).values('total')
+        ), 0)
+
+    def on_hand_at(self, item_id, when):
+        """Quantity on hand at ``when``: the latest snapshot before it plus the movements since."""
+        snapshot = (
+            StockSnapshot.objects.filter(item_id=item_id, taken_at__lte=when)
+            .order_by('-taken_at').values('taken_at', 'quantity').first()
+        )
+        tail = self.filter(item_id=item_id, created_at__lte=when)
+        base = 0
+        if snapshot:
+            tail = tail.filter(created_at__gt=snapshot['taken_at'])
+            base = snapshot['quantity']
+        return base + tail.aggregate(total=Coalesce(Sum('quantity'), 0))['total']
+
+
+class StockMovement(models.Model):
+    """One change to an item's stock; rows are never edited or deleted.
+
+    Quantities are signed: receipts and returns are positive, issues
+    negative. The sum of an item's movements is its on-hand quantity.
+    """
+    RECEIVE = 'receive'
+    ISSUE = 'issue'
+    ADJUST = 'adjust'
+    RETURN = 'return'
+    KINDS = [
+        (RECEIVE, 'Receive'),
+        (ISSUE, 'Issue to job card'),
+        (ADJUST, 'Adjust'),
+        (RETURN, 'Return from job card'),
+    ]
+    JOBCARD_KINDS = (ISSUE, RETURN)
+
+    objects = StockMovementQuerySet.as_manager()
+
+    item = models.ForeignKey(InventoryItem, on_delete=models.PROTECT, related_name='movements')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    quantity = models.IntegerField()
+    jobcard = models.ForeignKey(
+        'jobcards.JobCard', on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements',
+    )
+    note = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'created_at', 'id'], name='stockmove_item_created_idx'),
+        ]
+
+    @classmethod
+    def signed_quantity(cls, kind, quantity):
+        if kind == cls.ADJUST:
+            if not quantity:
+                raise ValidationError("An adjustment must change the quantity.", code='invalid')
+            return quantity
+        if quantity <= 0:
+            raise ValidationError("Quantity must be positive.", code='invalid')
+        return -quantity if kind == cls.ISSUE else quantity
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} of item {self.item_id}"
+
+
+class StockSnapshotQuerySet(models.QuerySet):
+    def take(self, at):
+        """Record every item's on-hand quantity at ``at``; returns the number of items covered.
+
+        Each item's quantity is its previous snapshot plus the movements
+        after it up to ``at``, summed in SQL. It is not read from
+        InventoryItem.quantity, which may already include later movements.
+        Re-taking an existing snapshot is a no-op.
+        """
+        previous = self.filter(item=OuterRef('pk'), taken_at__lt=at).order_by('-taken_at')
+        items = InventoryItem.objects.annotate(
+            since=Coalesce(Subquery(previous.values('taken_at')[:1]), Value(LEDGER_START)),
+            base=Coalesce(Subquery(previous.values('quantity')[:1]), Value(0)),
+        )
+        tail = (
+            StockMovement.objects.filter(item=OuterRef('pk'), created_at__gt=OuterRef('since'), created_at__lte=at)
+            .order_by().values('item').annotate(total=Sum('quantity')).values('total')
+        )
+        rows = items.annotate(on_hand=F('base') + Coalesce(Subquery(tail), Value(0))).values_list('pk', 'on_hand')
+        snapshots = [StockSnapshot(item_id=pk, taken_at=at, quantity=on_hand) for pk, on_hand in rows]
+        self.bulk_create(snapshots, batch_size=1000, ignore_conflicts=True)
+        return len(snapshots)
+
+
+class StockSnapshot(models.Model):
+    """An item's on-hand quantity at ``taken_at``, so history queries only sum the movements after it."""
+    objects = StockSnapshotQuerySet.as_manager()
+
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='snapshots')
+    taken_at = models.DateTimeField()
+    quantity = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'taken_at'], name='stocksnapshot_item_taken_uniq'),
+        ]
+
     def __str__(self):
-        return f"{self.name} (Qty: {self.quantity})"
\ No newline at end of file
+        return f"Item {self.item_id}: {self.quantity} at {self.taken_at:%Y-%m-%d %H:%M}"
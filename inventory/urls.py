@@ -1,3 +1,15 @@
 from django.urls import path
+from .views import (
+    InventoryItemListView, InventoryItemCreateView, InventoryItemUpdateView,
+    InventoryItemDetailView, ReorderAlertListView, StockLedgerView, ToOrderListView,
+)
 
-urlpatterns = []
\ No newline at end of file
+urlpatterns = [
+    path("", InventoryItemListView.as_view(), name="inventory_list"),
+    path("reorder/", ReorderAlertListView.as_view(), name="inventory_reorder"),
+    path("to-order/", ToOrderListView.as_view(), name="inventory_to_order"),
+    path("create/", InventoryItemCreateView.as_view(), name="inventory_create"),
+    path("<int:pk>/", InventoryItemDetailView.as_view(), name="inventory_detail"),
+    path("<int:pk>/edit/", InventoryItemUpdateView.as_view(), name="inventory_edit"),
+    path("<int:pk>/ledger/", StockLedgerView.as_view(), name="inventory_ledger"),
+]
@@ -0,0 +1,126 @@
+import datetime
+
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils import timezone
+from django.views.generic import CreateView, DetailView, ListView, TemplateView, UpdateView
+from core.pagination import KeysetPaginationMixin
+from .forms import InventoryItemForm, OnHandAtForm, StockMovementForm
+from .models import InventoryItem, StockMovement
+from .reservations import reserve_parts, to_order_list
+
+RECENT_MOVEMENTS = 20
+
+
+def start_of_day(day):
+    """The instant a local calendar day starts; stock "at the end of" a day is stock at the next day's start."""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+class InventoryItemListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    model = InventoryItem
+    template_name = "inventory/list.html"
+    context_object_name = "items"
+    ordering = ["-id"]
+
+
+class ReorderAlertListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    """Items below their reorder level, with a suggested order quantity."""
+    template_name = "inventory/reorder.html"
+    context_object_name = "items"
+    ordering = ["-id"]
+
+    def get_queryset(self):
+        return InventoryItem.objects.needing_reorder().with_purchase_suggestion()
+
+
+class ToOrderListView(LoginRequiredMixin, TemplateView):
+    """Parts inspections need that stock cannot cover, one line per part number.
+
+    Posting reserves stock for every active jobcard first.
+    """
+    template_name = "inventory/to_order.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["lines"] = to_order_list()
+        return context
+
+    def post(self, request, *args, **kwargs):
+        reserved, unreserved = reserve_parts()
+        messages.success(request, f"Reserved stock for {reserved} part(s); {unreserved} still to order.")
+        return redirect("inventory_to_order")
+
+
+class InventoryItemCreateView(LoginRequiredMixin, CreateView):
+    model = InventoryItem
+    form_class = InventoryItemForm
+    template_name = "inventory/form.html"
+
+    def get_success_url(self):
+        return reverse("inventory_detail", args=[self.object.pk])
+
+
+class InventoryItemUpdateView(LoginRequiredMixin, UpdateView):
+    model = InventoryItem
+    form_class = InventoryItemForm
+    template_name = "inventory/form.html"
+
+    def get_success_url(self):
+        return reverse("inventory_detail", args=[self.object.pk])
+
+
+class InventoryItemDetailView(LoginRequiredMixin, DetailView):
+    """An item with its latest movements; posting records a new movement."""
+    model = InventoryItem
+    template_name = "inventory/detail.html"
+    context_object_name = "item"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.setdefault("movement_form", StockMovementForm())
+        context["movements"] = (
+            self.object.movements.select_related("jobcard", "created_by")
+            .order_by("-created_at", "-id")[:RECENT_MOVEMENTS]
+        )
+        on_hand_form = OnHandAtForm(self.request.GET or None)
+        if on_hand_form.is_valid():
+            day = on_hand_form.cleaned_data["at"]
+            context["on_hand_at"] = self.object.on_hand_at(start_of_day(day + datetime.timedelta(days=1)))
+        context["on_hand_form"] = on_hand_form
+        context["reserved"] = self.object.reserved_quantity()
+        context["available"] = self.object.quantity - context["reserved"]
+        return context
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        form = StockMovementForm(request.POST)
+        if form.is_valid():
+            try:
+                movement = form.save(self.object, request.user)
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(request, f"{movement.get_kind_display()} of {abs(movement.quantity)} recorded.")
+                return redirect("inventory_detail", pk=self.object.pk)
+        return self.render_to_response(self.get_context_data(movement_form=form))
+
+
+class StockLedgerView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    """Every movement of one item, newest first."""
+    template_name = "inventory/ledger.html"
+    context_object_name = "movements"
+    ordering = ["-created_at", "-id"]
+    paginate_by = 50
+
+    def get_queryset(self):
+        self.item = get_object_or_404(InventoryItem, pk=self.kwargs["pk"])
+        return StockMovement.objects.filter(item=self.item).select_related("jobcard", "created_by")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["item"] = self.item
+        return context
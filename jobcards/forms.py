@@ -2,7 +2,9 @@
 import logging
 from django import forms
 from django.utils import timezone
+from core.db import write_atomic
 from .models import JobCard, Customer, Vehicle
+from vehicles.models import MileageReading
 
 import sys
 logger = logging.getLogger("jobcard_debug")
@@ -12,6 +14,25 @@ if not logger.hasHandlers():
     logger.addHandler(handler)
 logger.setLevel(logging.WARNING)
 
+
+def upsert(model, lookup, values):
+    """Lock or create the row matching ``lookup`` and write only changed values.
+
+    Must run inside core.db.write_atomic(). The row is read with SELECT ... FOR UPDATE
+    (get_or_create retries the read if a concurrent insert wins the unique
+    constraint), so two users saving the same plate end up on one row; an
+    existing row is only written when a value actually differs.
+    """
+    obj, created = model.objects.select_for_update().get_or_create(**lookup, defaults=values)
+    if not created:
+        changed = [name for name, value in values.items() if getattr(obj, name) != value]
+        if changed:
+            for name in changed:
+                setattr(obj, name, values[name])
+            obj.save(update_fields=changed)
+    return obj
+
+
 class JobCardModelForm(forms.ModelForm):
     # Inline Customer fields
     customer_name = forms.CharField(max_length=100, label="Customer Name")
@@ -36,6 +57,11 @@ class JobCardModelForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         self.request = kwargs.pop("request", None)
         super().__init__(*args, **kwargs)
+        # Persisted values, so an edit only writes the jobcard columns that changed
+        self._stored_values = {
+            field.attname: getattr(self.instance, field.attname)
+            for field in JobCard._meta.concrete_fields
+        } if self.instance.pk else None
 
         if self.instance.pk:
             self.fields["customer_name"].initial = self.instance.customer.name
@@ -95,34 +121,26 @@ class JobCardModelForm(forms.ModelForm):
     def save(self, commit=True):
         # Use request to get dynamic job details fields
         instance = super().save(commit=False)
+        customer_values = {
+            "name": self.cleaned_data["customer_name"],
+            "phone": self.cleaned_data["customer_phone"],
+            "email": self.cleaned_data["customer_email"],
+            "company": self.cleaned_data["customer_company"],
+            "trn": self.cleaned_data["customer_trn"],
+        }
 
-        # Fix: On update, modify the existing customer; on create, use get_or_create
-        if self.instance.pk and self.instance.customer:
-            # Editing: update the linked customer
-            customer = self.instance.customer
-            customer.name = self.cleaned_data["customer_name"]
-            customer.phone = self.cleaned_data["customer_phone"]
-            customer.email = self.cleaned_data["customer_email"]
-            customer.company = self.cleaned_data["customer_company"]
-            customer.trn = self.cleaned_data["customer_trn"]
-            customer.save()
-            instance.customer = customer
-        else:
-            # Creating: get or create customer
-            customer, created = Customer.objects.get_or_create(
-                name=self.cleaned_data["customer_name"],
-                phone=self.cleaned_data["customer_phone"]
-            )
-            customer.email = self.cleaned_data["customer_email"]
-            customer.company = self.cleaned_data["customer_company"]
-            customer.trn = self.cleaned_data["customer_trn"]
-            customer.save()
+        with write_atomic():
+            if self.instance.pk and self.instance.customer_id:
+                # Editing: update the linked customer
+                customer = upsert(Customer, {"pk": self.instance.customer_id}, customer_values)
+            else:
+                # Creating: reuse the customer with this name and phone
+                lookup = {"name": customer_values.pop("name"), "phone": customer_values.pop("phone")}
+                customer = upsert(Customer, lookup, customer_values)
             instance.customer = customer
 
-        # Update or create vehicle
-        vehicle, created = Vehicle.objects.get_or_create(
-            plate=self.cleaned_data["vehicle_plate"],
-            defaults={
+            # Update or create vehicle by plate
+            vehicle = upsert(Vehicle, {"plate": self.cleaned_data["vehicle_plate"]}, {
                 "make": self.cleaned_data["vehicle_make"],
                 "model": self.cleaned_data["vehicle_model"],
                 "color": self.cleaned_data["vehicle_color"],
@@ -130,35 +148,37 @@ class JobCardModelForm(forms.ModelForm):
                 "vin": self.cleaned_data["vehicle_vin"],
                 "mileage": int(self.cleaned_data["vehicle_mileage"]),
                 "customer": customer,
-            }
-        )
-        # Update fields in case of edit
-        vehicle.make = self.cleaned_data["vehicle_make"]
-        vehicle.model = self.cleaned_data["vehicle_model"]
-        vehicle.color = self.cleaned_data["vehicle_color"]
-        vehicle.year = int(self.cleaned_data["vehicle_year"])
-        vehicle.vin = self.cleaned_data["vehicle_vin"]
-        vehicle.mileage = int(self.cleaned_data["vehicle_mileage"])
-        vehicle.customer = customer
-        vehicle.save()
-        instance.vehicle = vehicle
-
-        # Handle dynamic inputs from the form
-        # Robustly handle job details fields
-        def _get_list_or_cleaned(field):
-            vals = []
-            if self.request:
-                vals = self.request.POST.getlist(f"{field}[]")
-            if vals:
-                return "\n".join([v for v in vals if v.strip()])
-            # fallback to cleaned_data (single value)
-            return self.cleaned_data.get(field, "") or ""
-
-        instance.required_jobs = _get_list_or_cleaned("required_jobs")
-        instance.customer_comments = _get_list_or_cleaned("customer_comments")
-        instance.workshop_comments = _get_list_or_cleaned("workshop_comments")
-
-        if commit:
-            instance.save()
+            })
+            instance.vehicle = vehicle
+
+            # Handle dynamic inputs from the form
+            # Robustly handle job details fields
+            def _get_list_or_cleaned(field):
+                vals = []
+                if self.request:
+                    vals = self.request.POST.getlist(f"{field}[]")
+                if vals:
+                    return "\n".join([v for v in vals if v.strip()])
+                # fallback to cleaned_data (single value)
+                return self.cleaned_data.get(field, "") or ""
+
+            instance.required_jobs = _get_list_or_cleaned("required_jobs")
+            instance.customer_comments = _get_list_or_cleaned("customer_comments")
+            instance.workshop_comments = _get_list_or_cleaned("workshop_comments")
+
+            if commit:
+                if self._stored_values is None:
+                    instance.save()
+                else:
+                    changed = [
+                        field.name for field in JobCard._meta.concrete_fields
+                        if getattr(instance, field.attname) != self._stored_values[field.attname]
+                    ]
+                    if changed:
+                        instance.save(update_fields=changed)
+                # Vehicle.mileage above only keeps the latest value; the log keeps each visit's
+                MileageReading.record_visit(
+                    instance, vehicle.mileage, created=self._stored_values is None,
+                )
 
         return instance
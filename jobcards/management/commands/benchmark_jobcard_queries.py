@@ -0,0 +1,99 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from jobcards.models import COMPLETED_STATUSES, JobCard
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a synthetic jobcard table inside a transaction, print the query plan "
+        "and timings of the status/date queries, then roll everything back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500_000, help="Synthetic jobcards to insert (default: 500000).")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query (default: 20).")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._populate(options['rows'], options['seed'])
+            for label, queryset in self._queries():
+                self._report(label, queryset, options['repeat'])
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Synthetic rows rolled back."))
+
+    def _populate(self, rows, seed):
+        rng = random.Random(seed)
+        statuses = [value for value, _ in JobCard._meta.get_field('job_status').choices]
+        customer = Customer.objects.create(name="Benchmark", phone="0000000")
+        vehicles = Vehicle.objects.bulk_create(
+            Vehicle(customer=customer, make="Bench", model="Mark", color="Grey", year=2020, plate=f"BENCH-{i}")
+            for i in range(100)
+        )
+        start = datetime.date.today() - datetime.timedelta(days=3650)
+        started = time.perf_counter()
+        batch = []
+        for _ in range(rows):
+            # Most historical jobs are finished; only a small tail is still in the workshop
+            status = rng.choice(COMPLETED_STATUSES) if rng.random() < 0.95 else rng.choice(statuses)
+            batch.append(JobCard(
+                customer=customer,
+                vehicle=rng.choice(vehicles),
+                date=start + datetime.timedelta(days=rng.randrange(3650)),
+                job_status=status,
+                is_active=status not in COMPLETED_STATUSES,
+            ))
+            if len(batch) == 5000:
+                JobCard.objects.bulk_create(batch)
+                batch = []
+        JobCard.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {JobCard._meta.db_table}")
+        self.stdout.write(f"Inserted {rows} jobcards in {time.perf_counter() - started:.1f}s\n")
+
+    def _queries(self):
+        ordering = ('-date', '-id')
+        deep = JobCard.active.order_by(*ordering).values_list('date', 'id')[5000:5001]
+        deep = deep[0] if deep else None
+        queries = [
+            ("active page 1 (legacy exclude)",
+             JobCard.objects.exclude(job_status__in=COMPLETED_STATUSES).order_by(*ordering)[:50]),
+            ("active page 1 (is_active)", JobCard.active.order_by(*ordering)[:50]),
+            ("completed page 1 (is_active)", JobCard.completed.order_by(*ordering)[:50]),
+            ("active count (is_active)", JobCard.active.all()),
+            ("status filter (job_status, date)",
+             JobCard.objects.filter(job_status='parts_sourcing').order_by('-date')[:50]),
+            ("dashboard recent (created_at)", JobCard.objects.order_by('-created_at')[:5]),
+        ]
+        if deep:
+            date, pk = deep
+            queries.append((
+                "active keyset page 101 (is_active, date, id)",
+                JobCard.active.filter(date__lte=date).exclude(date=date, id__gte=pk).order_by(*ordering)[:50],
+            ))
+        return queries
+
+    def _report(self, label, queryset, repeat):
+        count_only = label.startswith("active count")
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        plan_source = queryset if not count_only else JobCard.active.values('id')
+        self.stdout.write(plan_source.explain())
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            if count_only:
+                queryset.count()
+            else:
+                list(queryset.all())  # fresh clone, so the result cache is not reused
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"median {timings[len(timings) // 2]:.2f} ms, best {timings[0]:.2f} ms over {repeat} runs\n"
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+        ('jobcards', '0001_initial'),
+        ('vehicles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['-date', '-id'], name='jobcard_date_id_idx'),
+        ),
+    ]
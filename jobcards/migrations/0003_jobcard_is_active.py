@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+def backfill_is_active(apps, schema_editor):
+    JobCard = apps.get_model('jobcards', 'JobCard')
+    JobCard.objects.filter(job_status__in=['ready_collection', 'delivered']).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+        ('jobcards', '0002_jobcard_jobcard_date_id_idx'),
+        ('vehicles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobcard',
+            name='is_active',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.RunPython(backfill_is_active, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-date', '-id'], name='jobcard_active_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['-date', '-id'], name='jobcard_done_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['job_status', '-date'], name='jobcard_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['-created_at'], name='jobcard_created_idx'),
+        ),
+    ]
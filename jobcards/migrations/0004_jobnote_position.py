@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobcards', '0003_jobcard_is_active'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='jobnote',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AddField(
+            model_name='jobnote',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
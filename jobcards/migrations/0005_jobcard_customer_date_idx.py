@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_customer_lookup_keys'),
+        ('jobcards', '0004_jobnote_position'),
+        ('vehicles', '0002_vehicle_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['customer', '-date', '-id'], name='jobcard_customer_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobcards', '0005_jobcard_customer_date_idx'),
+        ('vehicles', '0002_vehicle_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['vehicle', '-date', '-id'], name='jobcard_vehicle_date_idx'),
+        ),
+    ]
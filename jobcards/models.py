@@ -1,20 +1,59 @@
 # jobcards/models.py
 import datetime
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Prefetch, Q
+from core import search
 from customers.models import Customer
 from vehicles.models import Vehicle
 
-class ActiveJobCardManager(models.Manager):
+COMPLETED_STATUSES = ['ready_collection', 'delivered']
+
+class JobCardQuerySet(models.QuerySet):
+    # Columns rendered by the jobcard list tables (list.html, dashboard, select_jobcard)
+    LIST_FIELDS = (
+        'id', 'date', 'job_status', 'created_at',
+        'customer', 'customer__name',
+        'vehicle', 'vehicle__make', 'vehicle__model',
+    )
+
+    def for_list(self):
+        """Join customer and vehicle and load only the columns list rows show."""
+        return self.select_related('customer', 'vehicle').only(*self.LIST_FIELDS)
+
+    HISTORY_FIELDS = ('id', 'date', 'job_status', 'vehicle', 'vehicle__make', 'vehicle__model', 'vehicle__plate')
+
+    def for_history(self):
+        """Rows of a customer's history: vehicle joined, quotation numbers and totals in one prefetch."""
+        Quotation = self.model._meta.get_field('quotations').related_model
+        quotations = Quotation.objects.only('id', 'jobcard', 'quotation_number', 'grand_total').order_by('id')
+        return (
+            self.select_related('vehicle').only(*self.HISTORY_FIELDS)
+            .prefetch_related(Prefetch('quotations', queryset=quotations))
+        )
+
+    def for_detail(self):
+        """Load everything the detail/print pages touch in a fixed number of queries."""
+        return (
+            self.select_related('customer', 'vehicle', 'inspection_report')
+            .prefetch_related('job_notes', 'quotations')
+        )
+
+
+class JobCardManager(models.Manager.from_queryset(JobCardQuerySet)):
+    pass
+
+
+class ActiveJobCardManager(JobCardManager):
     def get_queryset(self):
-        return super().get_queryset().exclude(job_status__in=['ready_collection', 'delivered'])
+        return super().get_queryset().filter(is_active=True)
 
-class CompletedJobCardManager(models.Manager):
+class CompletedJobCardManager(JobCardManager):
     def get_queryset(self):
-        return super().get_queryset().filter(job_status__in=['ready_collection', 'delivered'])
+        return super().get_queryset().filter(is_active=False)
 
 class JobCard(models.Model):
     """JobCard model with custom managers for Active and Completed jobs."""
-    objects = models.Manager()  # Default manager for admin, migrations, and normal queries
+    objects = JobCardManager()  # Default manager for admin, migrations, and normal queries
     active = ActiveJobCardManager()
     completed = CompletedJobCardManager()
 
@@ -44,6 +83,40 @@ class JobCard(models.Model):
     workshop_comments = models.TextField(blank=True, null=True)
     required_jobs = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Derived from job_status in save() so the managers filter on an indexable equality
+    is_active = models.BooleanField(default=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='jobcard_date_id_idx'),
+            # Django renders filter(is_active=True) as a bare ``WHERE is_active``,
+            # which matches these partial indexes on both SQLite and PostgreSQL
+            models.Index(fields=['-date', '-id'], condition=Q(is_active=True), name='jobcard_active_date_id_idx'),
+            models.Index(fields=['-date', '-id'], condition=Q(is_active=False), name='jobcard_done_date_id_idx'),
+            models.Index(fields=['job_status', '-date'], name='jobcard_status_date_idx'),
+            models.Index(fields=['-created_at'], name='jobcard_created_idx'),
+            models.Index(fields=['customer', '-date', '-id'], name='jobcard_customer_date_idx'),
+            models.Index(fields=['vehicle', '-date', '-id'], name='jobcard_vehicle_date_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted status and customer so saves can detect changes
+        instance._stored_job_status = instance.__dict__.get('job_status')
+        instance._stored_customer_id = instance.__dict__.get('customer_id')
+        return instance
+
+    @property
+    def is_completed(self):
+        return self.job_status in COMPLETED_STATUSES
+
+    def save(self, *args, **kwargs):
+        self.is_active = not self.is_completed
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'job_status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'is_active'}
+        super().save(*args, **kwargs)
 
     def get_default_quotation_description(self):
         """Generate default description for quotation items"""
@@ -60,10 +133,55 @@ class JobCard(models.Model):
     def get_job_notes(self):
         return self.job_notes.all()
 
+    def save_job_notes(self, notes, note_ids=(), created=False):
+        """Store the submitted notes, touching only rows that changed.
+
+        ``notes`` are the note texts in display order and ``note_ids`` the
+        matching JobNote ids ('' for rows added in the form). Blank notes are
+        dropped. Existing notes keep their ids; edited or moved ones are
+        written with one bulk UPDATE, new ones with one bulk INSERT and
+        removed ones with one DELETE. Pass ``created=True`` for a jobcard that
+        cannot have notes yet to skip reading the current ones.
+        """
+        existing = {} if created else {note.pk: note for note in self.job_notes.all()}
+        kept, to_create, to_update = set(), [], []
+        position = 0
+        for index, text in enumerate(notes):
+            text = text.strip()
+            if not text:
+                continue
+            raw_id = note_ids[index] if index < len(note_ids) else ''
+            note = existing.get(int(raw_id)) if str(raw_id).isdigit() else None
+            if note is None or note.pk in kept:
+                to_create.append(JobNote(jobcard=self, note=text, position=position))
+            else:
+                kept.add(note.pk)
+                if note.note != text or note.position != position:
+                    note.note = text
+                    note.position = position
+                    to_update.append(note)
+            position += 1
+
+        removed = [pk for pk in existing if pk not in kept]
+        with transaction.atomic():
+            if removed:
+                JobNote.objects.filter(pk__in=removed).delete()
+            if to_update:
+                JobNote.objects.bulk_update(to_update, ['note', 'position'])
+            if to_create:
+                JobNote.objects.bulk_create(to_create)
+            # Bulk writes send no post_save; the DELETE above does send post_delete
+            search.index_on_commit(to_update + to_create)
+
 
 class JobNote(models.Model):
     jobcard = models.ForeignKey(JobCard, on_delete=models.CASCADE, related_name='job_notes')
     note = models.TextField()
+    position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Notes saved before positions existed are all 0 and keep their id order
+        ordering = ['position', 'id']
 
     def __str__(self):
         return f"Note for JobCard #{self.jobcard.id}: {self.note[:30]}"
@@ -41,6 +41,7 @@ function addInputRow(containerId, value = "") {
         case "customer_comments_list": input.name = "customer_comments[]"; break;
         case "workshop_comments_list": input.name = "workshop_comments[]"; break;
         case "job-notes-container": input.name = "job_notes[]"; break;
+        case "job_notes_list": input.name = "job_notes[]"; break;
         default: input.name = ""; break;
     }
 
@@ -97,3 +98,50 @@ function handleFormSubmit(e) {
     if (hiddenWorkshopComments) hiddenWorkshopComments.value = workshopCommentsValue;
     if (hiddenJobNotes) hiddenJobNotes.value = jobNotesValue;
 }
+
+// Intake lookup: search existing customers/vehicles and reload the form prefilled
+document.addEventListener("DOMContentLoaded", () => {
+    const input = document.getElementById("intake-lookup");
+    const results = document.getElementById("intake-lookup-results");
+    if (!input || !results) return;
+
+    let timer = null;
+    let controller = null;
+
+    function addResult(label, detail, url) {
+        const link = document.createElement("a");
+        link.className = "list-group-item list-group-item-action";
+        link.href = url;
+        const title = document.createElement("strong");
+        title.textContent = label;
+        const small = document.createElement("small");
+        small.className = "text-muted ms-2";
+        small.textContent = detail;
+        link.appendChild(title);
+        link.appendChild(small);
+        results.appendChild(link);
+    }
+
+    input.addEventListener("input", () => {
+        clearTimeout(timer);
+        const term = input.value.trim();
+        if (term.length < 2) {
+            results.innerHTML = "";
+            return;
+        }
+        timer = setTimeout(() => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            fetch(`${input.dataset.url}?q=${encodeURIComponent(term)}`, { signal: controller.signal })
+                .then(response => response.json())
+                .then(data => {
+                    results.innerHTML = "";
+                    data.vehicles.forEach(v => addResult(
+                        `${v.plate} - ${v.make} ${v.model}`, `${v.customer.name} · ${v.customer.phone}`, v.prefill_url
+                    ));
+                    data.customers.forEach(c => addResult(c.name, c.phone, c.prefill_url));
+                })
+                .catch(() => {});
+        }, 150);
+    });
+});
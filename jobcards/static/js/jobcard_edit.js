@@ -43,7 +43,14 @@ document.addEventListener("DOMContentLoaded", () => {
         });
 
         inputGroup.appendChild(input);
-        if (containerId !== "job-notes-container") {
+        if (containerId === "job-notes-container") {
+            // New notes have no id yet; the server matches rows to notes by this field
+            const idInput = document.createElement("input");
+            idInput.type = "hidden";
+            idInput.name = "job_note_ids[]";
+            idInput.value = "";
+            inputGroup.appendChild(idInput);
+        } else {
             inputGroup.appendChild(addBtn);
         }
         inputGroup.appendChild(removeBtn);
@@ -3,7 +3,8 @@ from django.urls import path
 from .views import (
     JobCardCreateView, JobCardListView, JobCardDetailView, 
     JobCardUpdateView, JobCardDeleteView, ActiveJobCardListView, 
-    CompletedJobCardListView, JobCardPrintView
+    CompletedJobCardListView, JobCardPrintView, JobCardExportView,
+    IntakeLookupView,
 )
 
 urlpatterns = [
@@ -11,6 +12,8 @@ urlpatterns = [
     path('completed/', CompletedJobCardListView.as_view(), name='completed_jobcards'),
     path('', JobCardListView.as_view(), name='jobcard_list'),
     path('create/', JobCardCreateView.as_view(), name='jobcard_create'),
+    path('export/', JobCardExportView.as_view(), name='jobcard_export'),
+    path('lookup/', IntakeLookupView.as_view(), name='jobcard_intake_lookup'),
     path('<int:pk>/', JobCardDetailView.as_view(), name='jobcard_detail'),
     path('<int:pk>/print/', JobCardPrintView.as_view(), name='jobcard_print'),
     path('<int:pk>/edit/', JobCardUpdateView.as_view(), name='jobcard_edit'),
@@ -1,34 +1,45 @@
 # jobcards/views.py
-from django.urls import reverse_lazy
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponseRedirect, JsonResponse
+from django.urls import reverse, reverse_lazy
+from django.views import View
 from django.views.generic import CreateView, UpdateView, DetailView, DeleteView, ListView
 from .models import JobCard
+from customers.models import Customer
+from vehicles.models import Vehicle
+from core.lookup import alnum_upper, digits_only, folded, prefix_q
 from quotations.models import Quotation
 from .forms import JobCardModelForm
+from core.pagination import KeysetPaginationMixin
+from core.exports import StreamingExportView
 
-class ActiveJobCardListView(ListView):
+class ActiveJobCardListView(KeysetPaginationMixin, ListView):
     model = JobCard
     template_name = 'jobcards/list.html'
     context_object_name = 'jobcards'
     ordering = ['-date', '-id']
 
     def get_queryset(self):
-        return JobCard.active.all().order_by('-date', '-id')
+        return JobCard.active.for_list().order_by('-date', '-id')
 
-class CompletedJobCardListView(ListView):
+class CompletedJobCardListView(KeysetPaginationMixin, ListView):
     model = JobCard
     template_name = 'jobcards/list.html'
     context_object_name = 'jobcards'
     ordering = ['-date', '-id']
 
     def get_queryset(self):
-        return JobCard.completed.all().order_by('-date', '-id')
+        return JobCard.completed.for_list().order_by('-date', '-id')
 
-class JobCardListView(ListView):
+class JobCardListView(KeysetPaginationMixin, ListView):
     model = JobCard
     template_name = 'jobcards/list.html'
     context_object_name = 'jobcards'
     ordering = ['-date', '-id']
 
+    def get_queryset(self):
+        return JobCard.objects.for_list().order_by('-date', '-id')
+
 class JobCardCreateView(CreateView):
     model = JobCard
     form_class = JobCardModelForm
@@ -43,14 +54,11 @@ class JobCardCreateView(CreateView):
     def form_valid(self, form):
         self.object = form.save()
         
-        # Save job notes (many-to-one)
-        job_notes = self.request.POST.getlist('job_notes[]')
-        for note in job_notes:
-            note_text = note.strip()
-            if note_text:
-                self.object.job_notes.create(note=note_text)
-                
-        return super().form_valid(form)
+        # Save job notes (many-to-one) in one INSERT
+        self.object.save_job_notes(self.request.POST.getlist('job_notes[]'), created=True)
+
+        # Not super().form_valid(), which would save the form a second time
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_success_url(self):
         return reverse_lazy('jobcard_detail', kwargs={'pk': self.object.pk})
@@ -60,9 +68,12 @@ class JobCardDetailView(DetailView):
     template_name = 'jobcards/detail.html'
     context_object_name = 'jobcard'
 
+    def get_queryset(self):
+        return JobCard.objects.for_detail()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['quotation_exists'] = hasattr(self.object, 'quotation')
+        context['quotation_exists'] = bool(self.object.quotations.all())
         return context
     
     def get_form_kwargs(self):
@@ -75,10 +86,13 @@ class JobCardPrintView(DetailView):
     model = JobCard
     template_name = 'jobcards/print_jobcard.html'
     context_object_name = 'jobcard'
+
+    def get_queryset(self):
+        return JobCard.objects.for_detail()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['quotation_exists'] = hasattr(self.object, 'quotation')
+        context['quotation_exists'] = bool(self.object.quotations.all())
         return context
 
 
@@ -88,6 +102,10 @@ class JobCardUpdateView(UpdateView):
     template_name = 'jobcards/edit.html'
     context_object_name = 'jobcard'
 
+    def get_queryset(self):
+        # The form prefills from and compares against the linked customer and vehicle
+        return JobCard.objects.select_related('customer', 'vehicle')
+
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs["request"] = self.request
@@ -96,14 +114,11 @@ class JobCardUpdateView(UpdateView):
     def form_valid(self, form):
         response = super().form_valid(form)
 
-        # Save job notes (many-to-one)
-        job_notes = self.request.POST.getlist('job_notes[]')  # <- note the '[]'
-        self.object.job_notes.all().delete()  # Clear existing notes
-
-        for note in job_notes:
-            note_text = note.strip()
-            if note_text:
-                self.object.job_notes.create(note=note_text)
+        # Save job notes (many-to-one); each row posts its text and id, in display order
+        self.object.save_job_notes(
+            self.request.POST.getlist('job_notes[]'),
+            self.request.POST.getlist('job_note_ids[]'),
+        )
 
         return response
 
@@ -113,4 +128,103 @@ class JobCardUpdateView(UpdateView):
 class JobCardDeleteView(DeleteView):
     model = JobCard
     template_name = 'jobcards/delete_confirm.html'
-    success_url = reverse_lazy('jobcard_list')
\ No newline at end of file
+    success_url = reverse_lazy('jobcard_list')
+
+
+class JobCardExportView(StreamingExportView):
+    """CSV/XLSX export of jobcards, filterable by date, status and customer."""
+    filename = 'jobcards'
+    date_field = 'date'
+    status_field = 'job_status'
+    customer_field = 'customer_id'
+    columns = [
+        ('Job Card', 'id'),
+        ('Date', 'date'),
+        ('Time', 'time'),
+        ('Status', 'job_status'),
+        ('Customer', 'customer__name'),
+        ('Phone', 'customer__phone'),
+        ('Company', 'customer__company'),
+        ('Make', 'vehicle__make'),
+        ('Model', 'vehicle__model'),
+        ('Plate', 'vehicle__plate'),
+        ('Required Jobs', 'required_jobs'),
+        ('Customer Comments', 'customer_comments'),
+        ('Workshop Comments', 'workshop_comments'),
+    ]
+    status_labels = dict(JobCard._meta.get_field('job_status').choices)
+
+    def get_queryset(self):
+        return JobCard.objects.order_by('date', 'id')
+
+    def format_row(self, row):
+        row = list(row)
+        row[3] = self.status_labels.get(row[3], row[3])
+        return row
+
+
+class IntakeLookupView(LoginRequiredMixin, View):
+    """Autocomplete for jobcard intake: prefix search on phone, name, plate and VIN.
+
+    Each key is matched with its own index-ordered range query capped at the
+    limit, so the cost does not grow with the table. Vehicles come back with
+    their customer joined in the same query.
+    """
+    default_limit = 10
+    max_limit = 25
+    min_length = 2
+
+    def get(self, request, *args, **kwargs):
+        term = request.GET.get('q', '').strip()
+        try:
+            limit = max(1, min(int(request.GET.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            limit = self.default_limit
+
+        vehicles, customers = {}, {}
+        if len(term) >= self.min_length:
+            plate = alnum_upper(term)
+            if plate:
+                for key in ('plate_key', 'vin_key'):
+                    for vehicle in self._search(Vehicle.objects.select_related('customer'), key, plate, limit):
+                        vehicles.setdefault(vehicle.pk, vehicle)
+
+            digits = digits_only(term)
+            if len(digits) >= 3:
+                for customer in self._search(Customer.objects.all(), 'phone_key', digits, limit):
+                    customers.setdefault(customer.pk, customer)
+            if not term.replace('+', '').replace(' ', '').isdigit():
+                for customer in self._search(Customer.objects.all(), 'name_key', folded(term), limit):
+                    customers.setdefault(customer.pk, customer)
+
+        return JsonResponse({
+            'vehicles': [self._vehicle_json(v) for v in list(vehicles.values())[:limit]],
+            'customers': [self._customer_json(c) for c in list(customers.values())[:limit]],
+        })
+
+    def _search(self, queryset, key, prefix, limit):
+        return queryset.filter(prefix_q(key, prefix)).order_by(key)[:limit]
+
+    def _customer_json(self, customer):
+        return {
+            'id': customer.id,
+            'name': customer.name,
+            'phone': customer.phone,
+            'email': customer.email,
+            'company': customer.company,
+            'prefill_url': f"{reverse('jobcard_create')}?customer={customer.id}",
+        }
+
+    def _vehicle_json(self, vehicle):
+        return {
+            'id': vehicle.id,
+            'plate': vehicle.plate,
+            'vin': vehicle.vin,
+            'make': vehicle.make,
+            'model': vehicle.model,
+            'year': vehicle.year,
+            'color': vehicle.color,
+            'mileage': vehicle.mileage,
+            'customer': self._customer_json(vehicle.customer),
+            'prefill_url': f"{reverse('jobcard_create')}?vehicle={vehicle.id}&customer={vehicle.customer_id}",
+        }
@@ -4,18 +4,63 @@ from django.core.validators import RegexValidator
 from django.forms.models import inlineformset_factory
 from decimal import Decimal
 import logging
-from .models import Quotation, QuotationItem
+from .models import PriceSuggestion, Quotation, QuotationItem
 from jobcards.models import JobCard
 from customers.models import Customer
 from vehicles.models import Vehicle
+from core import search
+from core.formsets import BaseBulkInlineFormSet, bulk_write
 
 logger = logging.getLogger(__name__)
 
+
+class BaseBulkItemFormSet(BaseBulkInlineFormSet):
+    """Quotation item formset that validates and persists in a fixed number of queries."""
+
+    def bulk_save(self, **field_values):
+        """Save the formset with one INSERT, one UPDATE and one DELETE.
+
+        Follows save(): unchanged extra forms are skipped and forms marked
+        for deletion are removed, but rows are written with bulk_create,
+        bulk_update and a single ``DELETE ... WHERE id IN``. ``field_values``
+        are set on every created or changed item. Bulk writes bypass
+        QuotationItem.save()/delete(), so the change in the sum of line totals
+        is returned for the caller to apply to the quotation once.
+        """
+        created, updated, deleted = self.collect_changes()
+        for obj in created + updated:
+            for name, value in field_values.items():
+                setattr(obj, name, value)
+            obj.sync_lookup_keys()
+
+        delta = Decimal('0.00')
+        delta += sum((obj.line_total for obj in created), Decimal('0.00'))
+        delta += sum((obj.line_total - obj._stored_total() for obj in updated), Decimal('0.00'))
+        delta -= sum((obj._stored_total() for obj in deleted), Decimal('0.00'))
+
+        # Rows are inserted in form order, so item ids keep the entered order
+        fields = self.editable_fields()
+        fields += [name for name in field_values if name not in fields]
+        fields += [key for key in QuotationItem.KEY_SOURCES if key not in fields]
+        bulk_write(self.model, created, updated, deleted, fields)
+        # Bulk writes send no post_save; the DELETE does send post_delete
+        search.index_on_commit(created + updated)
+        PriceSuggestion.objects.refresh_on_commit(
+            [obj.price_key() for obj in created + updated]
+            + [getattr(obj, '_stored_price_key', None) for obj in updated]
+        )
+
+        for obj in created + updated:
+            obj._remember_stored_state()
+        return delta
+
+
 def create_quotation_item_formset(item_type='part'):
     """Create a formset for parts or services."""
     return inlineformset_factory(
         Quotation,
         QuotationItem,
+        formset=BaseBulkItemFormSet,
         fields=['description', 'quantity', 'unit_price'],
         widgets={
             'quantity': forms.NumberInput(attrs={
@@ -37,10 +82,6 @@ def create_quotation_item_formset(item_type='part'):
             })
         },
         extra=0,
-        formfield_callback=lambda field, **kwargs: {
-            **kwargs,
-            'initial': kwargs.get('initial', {'item_type': item_type})
-        }
     )
 
 # Create default formsets
@@ -151,7 +192,7 @@ class VehicleForm(forms.ModelForm):
             'mileage': forms.NumberInput(attrs={'class': 'form-control'}),
         }
 
-class BaseQuotationItemFormSet(forms.BaseInlineFormSet):
+class BaseQuotationItemFormSet(BaseBulkItemFormSet):
     def __init__(self, *args, **kwargs):
         self.item_type = kwargs.pop('item_type', 'part')
         super().__init__(*args, **kwargs)
@@ -223,6 +264,8 @@ def get_quotation_item_formset(extra=0, can_delete=True, **kwargs):
         }
     )
 
+QuotationItemFormSet = get_quotation_item_formset()
+
 def create_quotation_formset(instance=None, data=None, jobcard=None, prefix='items'):
     """Create a formset with proper initial configuration"""
     FormSet = get_quotation_item_formset(extra=0 if not instance else 0)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quotations.models import PriceSuggestion, QuotationItem
+
+
+class Command(BaseCommand):
+    help = "Rebuild the quotation price suggestions from the full item history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Description keys refreshed per query (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        keys = (
+            QuotationItem.objects.order_by('item_type', 'description_key')
+            .values_list('item_type', 'description_key').distinct()
+        )
+        total = 0
+        with transaction.atomic():
+            PriceSuggestion.objects.all().delete()
+            batch = []
+            for key in keys.iterator(chunk_size=2000):
+                batch.append(key)
+                if len(batch) == batch_size:
+                    total += PriceSuggestion.objects.refresh(batch)
+                    batch = []
+            total += PriceSuggestion.objects.refresh(batch)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} price suggestions."))
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from customers.models import Customer
+from quotations.models import Quotation, cents_to_amount
+
+
+class Command(BaseCommand):
+    help = "Verify the stored quotation totals against their items and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report quotations whose stored totals have drifted.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of quotations checked per query (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        checked = drifted = 0
+        last_pk = 0
+
+        while True:
+            # Keyset batches keep each grouped aggregation bounded
+            batch = list(
+                Quotation.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .with_totals()[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            checked += len(batch)
+
+            stale = []
+            for quotation in batch:
+                expected = {
+                    'subtotal': cents_to_amount(quotation._subtotal_cents),
+                    'discount_amount': cents_to_amount(quotation._discount_cents),
+                    'vat_amount': cents_to_amount(quotation._vat_cents),
+                    'grand_total': cents_to_amount(quotation._grand_total_cents),
+                }
+                if any(getattr(quotation, field) != value for field, value in expected.items()):
+                    self.stdout.write(
+                        f"{quotation.quotation_number}: stored {quotation.grand_total} "
+                        f"!= computed {expected['grand_total']}"
+                    )
+                    for field, value in expected.items():
+                        setattr(quotation, field, value)
+                    stale.append(quotation)
+
+            drifted += len(stale)
+            if stale and not dry_run:
+                with transaction.atomic():
+                    Quotation.objects.bulk_update(stale, Quotation.TOTAL_FIELDS)
+                    # bulk_update sends no signals, so refresh the owners' quoted totals here
+                    Customer.objects.filter(jobcards__quotations__in=stale).rebuild_stats()
+
+        action = "found" if dry_run else "repaired"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} quotations, {action} {drifted} with drifted totals."
+        ))
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:24
+
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+
+
+def backfill_totals(apps, schema_editor):
+    Quotation = apps.get_model('quotations', 'Quotation')
+    cent = Decimal('0.01')
+    batch = []
+    for quotation in Quotation.objects.prefetch_related('items').iterator(chunk_size=500):
+        subtotal = sum(
+            (Decimal(item.quantity) * item.unit_price for item in quotation.items.all()),
+            Decimal('0'),
+        ).quantize(cent)
+        discount = (subtotal * quotation.discount_percentage / 100).quantize(cent, rounding=ROUND_HALF_UP)
+        vat = ((subtotal - discount) * quotation.vat_percentage / 100).quantize(cent, rounding=ROUND_HALF_UP)
+        quotation.subtotal = subtotal
+        quotation.discount_amount = discount
+        quotation.vat_amount = vat
+        quotation.grand_total = subtotal - discount + vat
+        batch.append(quotation)
+    Quotation.objects.bulk_update(
+        batch, ['subtotal', 'discount_amount', 'vat_amount', 'grand_total'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quotation',
+            name='discount_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='quotation',
+            name='grand_total',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='quotation',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='quotation',
+            name='vat_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
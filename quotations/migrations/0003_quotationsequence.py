@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:24
+
+import datetime
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    """Start each day's counter after the highest serial already issued."""
+    Quotation = apps.get_model('quotations', 'Quotation')
+    QuotationSequence = apps.get_model('quotations', 'QuotationSequence')
+    last_values = {}
+    for number in Quotation.objects.values_list('quotation_number', flat=True).iterator():
+        try:
+            prefix, serial = number.split('-', 1)
+            day = datetime.datetime.strptime(prefix[1:], '%y%m%d').date()
+            serial = int(serial)
+        except (AttributeError, ValueError):
+            continue
+        last_values[day] = max(serial, last_values.get(day, 0))
+    QuotationSequence.objects.bulk_create(
+        QuotationSequence(day=day, last_value=value) for day, value in last_values.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotations', '0002_quotation_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuotationSequence',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
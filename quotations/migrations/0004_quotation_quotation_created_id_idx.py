@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobcards', '0002_jobcard_jobcard_date_id_idx'),
+        ('quotations', '0003_quotationsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['-created_at', '-id'], name='quotation_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+from core.lookup import folded
+
+
+def backfill_description_keys(apps, schema_editor):
+    QuotationItem = apps.get_model('quotations', 'QuotationItem')
+    batch = []
+    for obj in QuotationItem.objects.only('description').iterator(chunk_size=2000):
+        obj.description_key = folded(obj.description)[:255]
+        batch.append(obj)
+        if len(batch) == 2000:
+            QuotationItem.objects.bulk_update(batch, ['description_key'])
+            batch = []
+    QuotationItem.objects.bulk_update(batch, ['description_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotations', '0004_quotation_quotation_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_type', models.CharField(choices=[('part', 'Part'), ('service', 'Service')], max_length=10)),
+                ('key', models.CharField(max_length=255)),
+                ('description', models.CharField(max_length=255)),
+                ('times_quoted', models.PositiveIntegerField()),
+                ('last_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('last_quoted_on', models.DateField()),
+                ('median_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('common_price', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='quotationitem',
+            name='description_key',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_description_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='quotationitem',
+            index=models.Index(fields=['item_type', 'description_key'], name='quotationitem_price_key_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='pricesuggestion',
+            constraint=models.UniqueConstraint(fields=('item_type', 'key'), name='pricesuggestion_type_key_uniq'),
+        ),
+    ]
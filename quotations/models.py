@@ -1,63 +1,187 @@
 # quotations/models.py
 
 import datetime
-from django.db import models
-from decimal import Decimal
+import statistics
+import time
+from collections import Counter, defaultdict
+from django.db import IntegrityError, OperationalError, models, transaction
+from django.db.models import BigIntegerField, F, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Round
 from jobcards.models import JobCard
 from django.utils import timezone
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from core.db import write_atomic
+from core.lookup import LookupKeysMixin, folded
+
+
+CENT = Decimal('0.01')
+
+
+def cents_to_amount(cents):
+    """Convert an integer amount in cents (as annotated in SQL) to a Decimal."""
+    return (Decimal(int(cents or 0)) / 100).quantize(CENT)
+
+
+def _percent_of(cents, percentage):
+    """Half-up integer percentage of an amount in cents (percentage has 2 dp)."""
+    basis_points = Cast(Round(F(percentage) * 100), BigIntegerField())
+    return Cast(
+        (cents * basis_points + Value(5000)) / Value(10000),
+        BigIntegerField(),
+    )
+
+
+class QuotationQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate subtotal, discount, VAT and grand total (in cents) in SQL."""
+        subtotal = Cast(
+            Coalesce(
+                Sum(F('items__quantity') * Round(F('items__unit_price') * 100)),
+                Value(0),
+            ),
+            BigIntegerField(),
+        )
+        qs = self.annotate(_subtotal_cents=subtotal)
+        qs = qs.annotate(
+            _discount_cents=_percent_of(F('_subtotal_cents'), 'discount_percentage'),
+        )
+        qs = qs.annotate(
+            _vat_cents=_percent_of(
+                F('_subtotal_cents') - F('_discount_cents'), 'vat_percentage'
+            ),
+        )
+        return qs.annotate(
+            _grand_total_cents=F('_subtotal_cents') - F('_discount_cents') + F('_vat_cents'),
+        )
+
+    def apply_item_delta(self, pk, delta):
+        """Add ``delta`` to a quotation's stored subtotal and refresh its totals.
+
+        The row is locked for the read-modify-write so concurrent item edits
+        cannot lose updates. Returns the updated quotation, or None if it no
+        longer exists (e.g. its items are being deleted in a cascade).
+        """
+        with write_atomic():
+            quotation = self.select_for_update().filter(pk=pk).first()
+            if quotation is None:
+                return None
+            quotation.set_subtotal(quotation.subtotal + delta)
+            quotation.save(update_fields=Quotation.TOTAL_FIELDS)
+        return quotation
+
+
+class QuotationSequence(models.Model):
+    """Per-day counter that hands out quotation serial numbers."""
+    day = models.DateField(primary_key=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    MAX_RETRIES = 5
+
+    @classmethod
+    def next_value(cls, day):
+        """Atomically allocate the next serial for ``day``.
+
+        The increment is a single ``UPDATE ... SET last_value = last_value + 1``,
+        which row-locks on PostgreSQL/MySQL until the surrounding transaction
+        ends. SQLite locks the whole database instead and may report it as
+        busy, in which case the allocation is retried with a short backoff.
+        """
+        for attempt in range(cls.MAX_RETRIES):
+            try:
+                with transaction.atomic():
+                    updated = cls.objects.filter(day=day).update(last_value=F('last_value') + 1)
+                    if not updated:
+                        cls.objects.create(day=day, last_value=1)
+                        return 1
+                    return cls.objects.filter(day=day).values_list('last_value', flat=True).get()
+            except (IntegrityError, OperationalError):
+                # Another request created today's row first, or SQLite was busy
+                if attempt == cls.MAX_RETRIES - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+
+    def __str__(self):
+        return f"{self.day}: {self.last_value}"
 
 
 class Quotation(models.Model):
+    TOTAL_FIELDS = ['subtotal', 'discount_amount', 'vat_amount', 'grand_total']
+
     jobcard = models.ForeignKey(JobCard, on_delete=models.CASCADE, related_name="quotations")
     quotation_number = models.CharField(max_length=20, unique=True, blank=True)
     date_created = models.DateField(default=datetime.date.today)
     vat_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=5.00)
     discount_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
 
+    # Denormalized totals, kept in step with the items by QuotationItem.save()/delete()
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), editable=False)
+    discount_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), editable=False)
+    vat_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), editable=False)
+    grand_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), editable=False, db_index=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
-    @property
-    def subtotal(self):
+    objects = QuotationQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Persisted owner and total, diffed on save to keep Customer.quoted_total in step
+        instance._stored_jobcard_id = instance.__dict__.get('jobcard_id')
+        instance._stored_grand_total = instance.__dict__.get('grand_total')
+        return instance
+
+    def compute_subtotal(self):
+        """Sum the line totals of the items (one query)."""
         total = Decimal('0')
         for item in self.items.all():
-            if hasattr(item, 'total'):
-                total += Decimal(str(item.total))
-        return total.quantize(Decimal('0.01'))
+            total += item.line_total
+        return total.quantize(CENT)
 
-    @property
-    def discount_amount(self):
+    def set_subtotal(self, subtotal):
+        """Set the subtotal and recompute discount, VAT and grand total from it."""
+        self.subtotal = Decimal(str(subtotal)).quantize(CENT)
         discount = (self.subtotal * Decimal(str(self.discount_percentage))) / Decimal('100')
-        return discount.quantize(Decimal('0.01'))
-
-    @property
-    def vat_amount(self):
+        self.discount_amount = discount.quantize(CENT, rounding=ROUND_HALF_UP)
         subtotal_after_discount = self.subtotal - self.discount_amount
         vat = (subtotal_after_discount * Decimal(str(self.vat_percentage))) / Decimal('100')
-        return vat.quantize(Decimal('0.01'))
-
-    @property
-    def grand_total(self):
-        total = self.subtotal - self.discount_amount + self.vat_amount
-        return total.quantize(Decimal('0.01'))
+        self.vat_amount = vat.quantize(CENT, rounding=ROUND_HALF_UP)
+        self.grand_total = (self.subtotal - self.discount_amount + self.vat_amount).quantize(CENT)
 
     def save(self, *args, **kwargs):
         if not self.quotation_number:
-            today = timezone.now().strftime('%y%m%d')
-            prefix = f"Q{today}"
-            count_today = Quotation.objects.filter(quotation_number__startswith=prefix).count() + 1
-            serial = f"{count_today:02d}"  # formats to 01, 02, etc.
+            today = timezone.now().date()
+            prefix = f"Q{today.strftime('%y%m%d')}"
+            serial = f"{QuotationSequence.next_value(today):02d}"  # formats to 01, 02, etc.
             self.quotation_number = f"{prefix}-{serial}"
-        super().save(*args, **kwargs)
+        with write_atomic():
+            if not self._state.adding and kwargs.get('update_fields') is None:
+                # Item changes move the stored subtotal under this row lock
+                # (apply_item_delta); start from the committed totals, not from
+                # this instance's copy, which may predate them
+                stored = (
+                    type(self).objects.select_for_update().filter(pk=self.pk)
+                    .values('jobcard_id', 'subtotal', 'grand_total').first()
+                )
+                if stored is not None:
+                    self.subtotal = stored['subtotal']
+                    self._stored_jobcard_id = stored['jobcard_id']
+                    self._stored_grand_total = stored['grand_total']
+            # Percentages may have changed, so derived amounts always follow the subtotal
+            self.set_subtotal(self.subtotal or 0)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.quotation_number
 
     class Meta:
         verbose_name_plural = "Quotations"
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='quotation_created_id_idx'),
+        ]
 
 
-class QuotationItem(models.Model):
+class QuotationItem(LookupKeysMixin, models.Model):
     ITEM_TYPE_CHOICES = [
         ('part', 'Part'),
         ('service', 'Service'),
@@ -68,6 +192,13 @@ class QuotationItem(models.Model):
     description = models.CharField(max_length=255)
     quantity = models.PositiveIntegerField(default=1)
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Case-folded description that price history is grouped on
+    description_key = models.CharField(max_length=255, blank=True, editable=False)
+
+    KEY_SOURCES = {'description_key': ('description', folded)}
+
+    def price_key(self):
+        return (self.item_type, folded(self.description)[:255])
 
     @property
     def line_total(self):
@@ -82,8 +213,166 @@ class QuotationItem(models.Model):
     def total(self):
         return self.line_total
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stored_state()
+        return instance
+
+    def _remember_stored_state(self):
+        """Record the persisted quotation and line total to diff on save/delete."""
+        self._stored_quotation_id = self.quotation_id
+        if 'item_type' in self.__dict__ and 'description' in self.__dict__:
+            self._stored_price_key = self.price_key()
+        else:
+            self._stored_price_key = None
+        if 'quantity' in self.__dict__ and 'unit_price' in self.__dict__:
+            self._stored_line_total = self.line_total
+        else:
+            self._stored_line_total = None
+
+    def _apply_total_delta(self, quotation_id, delta):
+        if not quotation_id or not delta:
+            return
+        quotation = Quotation.objects.apply_item_delta(quotation_id, delta)
+        # Keep an in-memory parent (e.g. a view's self.object) from going stale
+        if quotation is not None and QuotationItem.quotation.is_cached(self):
+            cached = self.quotation
+            if cached is not None and cached.pk == quotation.pk:
+                for field in Quotation.TOTAL_FIELDS:
+                    setattr(cached, field, getattr(quotation, field))
+
+    def _stored_total(self):
+        stored = getattr(self, '_stored_line_total', None)
+        if stored is None and self.pk:
+            stored = QuotationItem.objects.get(pk=self.pk).line_total
+        return stored or Decimal('0.00')
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            old_quotation_id = getattr(self, '_stored_quotation_id', None)
+            old_total = self._stored_total() if old_quotation_id else Decimal('0.00')
+            PriceSuggestion.objects.refresh_on_commit([getattr(self, '_stored_price_key', None), self.price_key()])
+            super().save(*args, **kwargs)
+            new_total = self.line_total
+            if old_quotation_id and old_quotation_id != self.quotation_id:
+                self._apply_total_delta(old_quotation_id, -old_total)
+                self._apply_total_delta(self.quotation_id, new_total)
+            else:
+                self._apply_total_delta(self.quotation_id, new_total - old_total)
+            self._remember_stored_state()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            old_total = self._stored_total()
+            quotation_id = self.quotation_id
+            result = super().delete(*args, **kwargs)
+            self._apply_total_delta(quotation_id, -old_total)
+        return result
+
     def __str__(self):
         return self.description
 
     class Meta:
         verbose_name_plural = "Quotation Items"
+        indexes = [
+            models.Index(fields=['item_type', 'description_key'], name='quotationitem_price_key_idx'),
+        ]
+
+
+class PriceSuggestionQuerySet(models.QuerySet):
+    def refresh(self, keys):
+        """Recompute the suggestions for ``(item_type, description_key)`` pairs from their item history.
+
+        Reads only the items under those keys (one indexed query per item
+        type) and upserts their rows; keys with no items left are removed.
+        """
+        by_type = defaultdict(set)
+        for item_type, key in keys:
+            by_type[item_type].add(key)
+        history = defaultdict(list)
+        for item_type, type_keys in by_type.items():
+            rows = (
+                QuotationItem.objects.filter(item_type=item_type, description_key__in=type_keys)
+                .order_by('quotation__date_created', 'id')
+                .values_list('description_key', 'description', 'unit_price', 'quotation__date_created')
+            )
+            for key, description, price, quoted_on in rows:
+                history[item_type, key].append((description, price, quoted_on))
+
+        suggestions = [
+            PriceSuggestion.from_history(item_type, key, entries)
+            for (item_type, key), entries in history.items()
+        ]
+        self.bulk_create(
+            suggestions,
+            update_conflicts=True,
+            unique_fields=['item_type', 'key'],
+            update_fields=PriceSuggestion.HISTORY_FIELDS,
+        )
+        for item_type, type_keys in by_type.items():
+            gone = type_keys - {key for t, key in history if t == item_type}
+            if gone:
+                self.filter(item_type=item_type, key__in=gone).delete()
+        return len(suggestions)
+
+    def refresh_on_commit(self, keys):
+        """Refresh ``keys`` once the surrounding transaction commits; ``None`` entries are skipped.
+
+        Bulk writers pass all their keys in one call, so a formset's saved
+        rows, or the items of a deleted quotation, cost one refresh rather
+        than one per item.
+        """
+        keys = {key for key in keys if key is not None}
+        if keys:
+            transaction.on_commit(lambda: self.refresh(keys), using=self.db)
+
+
+class PriceSuggestion(models.Model):
+    """What we have charged for one line item description, derived from QuotationItem.
+
+    Rows are keyed by item type and case-folded description and rebuilt
+    per key whenever an item under it is saved or deleted.
+    """
+    item_type = models.CharField(max_length=10, choices=QuotationItem.ITEM_TYPE_CHOICES)
+    key = models.CharField(max_length=255)
+    # Most recently quoted spelling
+    description = models.CharField(max_length=255)
+    times_quoted = models.PositiveIntegerField()
+    last_price = models.DecimalField(max_digits=10, decimal_places=2)
+    last_quoted_on = models.DateField()
+    median_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Most frequent price; ties go to the most recently quoted one
+    common_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    HISTORY_FIELDS = [
+        'description', 'times_quoted', 'last_price', 'last_quoted_on', 'median_price', 'common_price',
+    ]
+
+    objects = PriceSuggestionQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also serves the typeahead's item type + key prefix range scan
+            models.UniqueConstraint(fields=['item_type', 'key'], name='pricesuggestion_type_key_uniq'),
+        ]
+
+    @classmethod
+    def from_history(cls, item_type, key, entries):
+        """Build a row from ``(description, unit_price, quoted_on)`` entries, oldest first."""
+        prices = [price for _, price, _ in entries]
+        description, last_price, last_quoted_on = entries[-1]
+        counts = Counter(reversed(prices))
+        return cls(
+            item_type=item_type,
+            key=key,
+            description=description,
+            times_quoted=len(entries),
+            last_price=last_price,
+            last_quoted_on=last_quoted_on,
+            median_price=Decimal(statistics.median(prices)).quantize(CENT, rounding=ROUND_HALF_UP),
+            common_price=counts.most_common(1)[0][0],
+        )
+
+    def __str__(self):
+        return f"{self.description} ({self.get_item_type_display()}): {self.last_price}"
@@ -0,0 +1,104 @@
+# quotations/pdf_cache.py
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+
+# Bump when the PDF layout changes so previously cached files stop matching
+LAYOUT_VERSION = 1
+
+
+def quotation_fingerprint(quotation):
+    """Hash everything the quotation PDF draws.
+
+    Expects the quotation loaded with its jobcard's customer/vehicle and its
+    items prefetched, so hashing costs no extra queries. Any change to an item,
+    the customer or the vehicle yields a new key, which is how stale PDFs are
+    invalidated; the old file simply ages out of the LRU.
+    """
+    customer = quotation.jobcard.customer
+    vehicle = quotation.jobcard.vehicle
+    payload = {
+        'layout': LAYOUT_VERSION,
+        'quotation': [
+            quotation.pk, quotation.quotation_number, quotation.date_created,
+            quotation.vat_percentage, quotation.discount_percentage,
+            quotation.subtotal, quotation.discount_amount,
+            quotation.vat_amount, quotation.grand_total,
+        ],
+        'items': [
+            [item.pk, item.item_type, item.description, item.quantity, item.unit_price]
+            for item in quotation.items.all()
+        ],
+        'customer': [customer.name, customer.phone, customer.company, customer.trn],
+        'vehicle': [
+            vehicle.make, vehicle.model, vehicle.year,
+            vehicle.plate, vehicle.vin, vehicle.mileage,
+        ],
+    }
+    raw = json.dumps(payload, default=str, sort_keys=True).encode()
+    return hashlib.sha256(raw).hexdigest()
+
+
+class PDFCache:
+    """Size-bounded on-disk LRU of rendered PDFs, keyed by content hash.
+
+    File modification times serve as the recency list: a hit touches the
+    file, and storing a new file evicts the least recently used ones until
+    the directory fits in ``max_bytes``.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = str(directory or settings.PDF_CACHE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.PDF_CACHE_MAX_BYTES
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def get(self, key):
+        """Return the cached PDF for ``key`` opened for reading, or None on a miss.
+
+        The file is opened before it is touched, so an eviction by a
+        concurrent put() cannot remove it between the lookup and the read.
+        """
+        try:
+            f = open(self.path_for(key), 'rb')
+        except FileNotFoundError:
+            return None
+        os.utime(f.fileno())
+        return f
+
+    def put(self, key, data):
+        """Store ``data`` under ``key`` atomically and return its path."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        path = self.path_for(key)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                stat = entry.stat()
+                total += stat.st_size
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
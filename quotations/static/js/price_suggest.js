@@ -0,0 +1,106 @@
+// Price typeahead for quotation line items: suggests past prices (and stock
+// prices for parts) while a description is typed; picking one fills the row
+document.addEventListener("DOMContentLoaded", () => {
+    const form = document.querySelector("form[data-price-suggest-url]");
+    if (!form) return;
+
+    const results = document.createElement("div");
+    results.className = "list-group position-absolute shadow d-none";
+    results.style.zIndex = 1000;
+    document.body.appendChild(results);
+
+    let timer = null;
+    let controller = null;
+    let target = null;
+
+    function hide() {
+        results.classList.add("d-none");
+        results.innerHTML = "";
+    }
+
+    function pick(field, suggestion) {
+        field.value = suggestion.description;
+        const price = suggestion.last_price ?? suggestion.stock_price;
+        const priceInput = field.closest("tr")?.querySelector('[name$="-unit_price"]');
+        if (priceInput && price !== null) {
+            priceInput.value = price;
+            priceInput.dispatchEvent(new Event("input", { bubbles: true }));
+        }
+        hide();
+    }
+
+    function detail(suggestion) {
+        const parts = [];
+        if (suggestion.times_quoted) {
+            parts.push(`last AED ${suggestion.last_price} (${suggestion.last_quoted_on})`);
+            parts.push(`median ${suggestion.median_price}`);
+            parts.push(`usual ${suggestion.common_price}`);
+            parts.push(`${suggestion.times_quoted}x`);
+        }
+        if (suggestion.stock_price !== null) parts.push(`stock AED ${suggestion.stock_price}`);
+        if (suggestion.part_number) parts.push(suggestion.part_number);
+        return parts.join(" · ");
+    }
+
+    function show(field, suggestions) {
+        results.innerHTML = "";
+        if (!suggestions.length) {
+            hide();
+            return;
+        }
+        suggestions.forEach(suggestion => {
+            const button = document.createElement("button");
+            button.type = "button";
+            button.className = "list-group-item list-group-item-action";
+            const title = document.createElement("strong");
+            title.textContent = suggestion.description;
+            const small = document.createElement("small");
+            small.className = "text-muted ms-2";
+            small.textContent = detail(suggestion);
+            button.appendChild(title);
+            button.appendChild(small);
+            // mousedown fires before the field's blur hides the list
+            button.addEventListener("mousedown", e => {
+                e.preventDefault();
+                pick(field, suggestion);
+            });
+            results.appendChild(button);
+        });
+        const rect = field.getBoundingClientRect();
+        results.style.left = `${rect.left + window.scrollX}px`;
+        results.style.top = `${rect.bottom + window.scrollY}px`;
+        results.style.width = `${Math.max(rect.width, 320)}px`;
+        results.classList.remove("d-none");
+    }
+
+    // Delegated, so rows added from the empty form template work too
+    form.addEventListener("input", e => {
+        const field = e.target;
+        if (!field.name || !field.name.endsWith("-description")) return;
+        clearTimeout(timer);
+        target = field;
+        const term = field.value.trim();
+        if (term.length < 2) {
+            hide();
+            return;
+        }
+        timer = setTimeout(() => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            const params = new URLSearchParams({ q: term, type: field.dataset.itemType || "" });
+            fetch(`${form.dataset.priceSuggestUrl}?${params}`, { signal: controller.signal })
+                .then(response => response.json())
+                .then(data => {
+                    if (target === field) show(field, data.suggestions);
+                })
+                .catch(() => {});
+        }, 150);
+    });
+
+    form.addEventListener("focusout", e => {
+        if (e.target === target) hide();
+    });
+    document.addEventListener("keydown", e => {
+        if (e.key === "Escape") hide();
+    });
+});
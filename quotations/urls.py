@@ -6,11 +6,17 @@ from .views import (
     QuotationUpdateView,
     QuotationPDFView,
     SelectJobcardView,
+    QuotationExportView,
+    QuotationItemExportView,
+    PriceSuggestionLookupView,
 )
 
 urlpatterns = [
     path('select-jobcard/', SelectJobcardView.as_view(), name='select_jobcard'),
     path('', QuotationListView.as_view(), name='quotation_list'),
+    path('export/', QuotationExportView.as_view(), name='quotation_export'),
+    path('items/export/', QuotationItemExportView.as_view(), name='quotation_item_export'),
+    path('price-suggestions/', PriceSuggestionLookupView.as_view(), name='quotation_price_suggestions'),
     path('<int:pk>/', QuotationDetailView.as_view(), name='quotation_detail'),
     path('<int:pk>/edit/', QuotationUpdateView.as_view(), name='quotation_edit'),
     path('quotations/create/<int:jobcard_pk>/', QuotationCreateView.as_view(), name='quotation_create'),
@@ -1,10 +1,14 @@
 # quotations/views.py
 from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.generic import ListView, CreateView, UpdateView, DetailView
 from django.urls import reverse_lazy
 from django.views import View
-from django.http import HttpResponse
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Q
+from django.http import FileResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
 from django.contrib import messages
 from django.conf import settings
 from reportlab.lib.pagesizes import A4
@@ -13,12 +17,18 @@ from reportlab.lib.units import mm
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import os
+from io import BytesIO
 from decimal import Decimal
 import logging
 
-from .models import Quotation, QuotationItem
+from .models import CENT, PriceSuggestion, Quotation, QuotationItem
+from .pdf_cache import PDFCache, quotation_fingerprint
 from .forms import *
 from jobcards.models import JobCard
+from core.pagination import KeysetPaginationMixin
+from core.exports import StreamingExportView
+from core.lookup import alnum_upper, folded, prefix_q
+from inventory.models import InventoryItem
 
 logger = logging.getLogger(__name__)
 
@@ -29,19 +39,17 @@ class SelectJobcardView(ListView):
     context_object_name = 'jobcards'
 
     def get_queryset(self):
-        return JobCard.active.filter(quotations__isnull=True).order_by('-date', '-id')
+        return JobCard.active.for_list().filter(quotations__isnull=True).order_by('-date', '-id')
 
 
-class QuotationListView(ListView):
+class QuotationListView(KeysetPaginationMixin, ListView):
     model = Quotation
     template_name = 'quotations/list.html'
     context_object_name = 'quotations'
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['jobcards'] = JobCard.active.all().order_by('-date', '-id')
-        return context
+    def get_queryset(self):
+        return super().get_queryset().select_related('jobcard__customer')
 
 
 class QuotationDetailView(DetailView):
@@ -49,6 +57,12 @@ class QuotationDetailView(DetailView):
     template_name = 'quotations/detail.html'
     context_object_name = 'quotation'
 
+    def get_queryset(self):
+        return (
+            Quotation.objects.select_related('jobcard__customer', 'jobcard__vehicle')
+            .prefetch_related('items')
+        )
+
 class QuotationCreateView(CreateView):
     model = Quotation
     form_class = QuotationForm
@@ -139,28 +153,16 @@ class QuotationCreateView(CreateView):
                 self.object.jobcard = self.jobcard
                 self.object.save()
 
-                # Save parts
-                parts_instances = parts_formset.save(commit=False)
-                for instance in parts_instances:
-                    instance.quotation = self.object
-                    instance.item_type = 'part'
-                    instance.save()
-
-                # Save services
-                services_instances = services_formset.save(commit=False)
-                for instance in services_instances:
-                    instance.quotation = self.object
-                    instance.item_type = 'service'
-                    instance.save()
-
-                # Delete any marked for deletion
-                for obj in parts_formset.deleted_objects:
-                    obj.delete()
-                for obj in services_formset.deleted_objects:
-                    obj.delete()
+                # Save parts and services in bulk, then update the totals once
+                parts_formset.instance = self.object
+                services_formset.instance = self.object
+                delta = parts_formset.bulk_save(item_type='part')
+                delta += services_formset.bulk_save(item_type='service')
+                if delta:
+                    Quotation.objects.apply_item_delta(self.object.pk, delta)
 
                 messages.success(self.request, 'Quotation created successfully!')
-                return redirect('quotations:detail', pk=self.object.pk)
+                return redirect('quotation_detail', pk=self.object.pk)
 
         except Exception as e:
             logger.error(f"Error creating quotation: {str(e)}", exc_info=True)
@@ -252,7 +254,9 @@ class QuotationUpdateView(UpdateView):
                 with transaction.atomic():
                     self.object = form.save()
                     formset.instance = self.object
-                    formset.save()
+                    delta = formset.bulk_save()
+                    if delta:
+                        Quotation.objects.apply_item_delta(self.object.pk, delta)
                     messages.success(request, 'Quotation updated successfully.')
                     return redirect('quotation_detail', pk=self.object.pk)
             except Exception as e:
@@ -265,6 +269,141 @@ class QuotationUpdateView(UpdateView):
         context['formset'] = formset
         return self.render_to_response(context)
 
+class QuotationExportView(StreamingExportView):
+    """CSV/XLSX export of quotations with their stored totals."""
+    filename = 'quotations'
+    date_field = 'date_created'
+    status_field = 'jobcard__job_status'
+    customer_field = 'jobcard__customer_id'
+    columns = [
+        ('Quotation No.', 'quotation_number'),
+        ('Date', 'date_created'),
+        ('Job Card', 'jobcard_id'),
+        ('Customer', 'jobcard__customer__name'),
+        ('Plate', 'jobcard__vehicle__plate'),
+        ('Subtotal', 'subtotal'),
+        ('Discount %', 'discount_percentage'),
+        ('Discount', 'discount_amount'),
+        ('VAT %', 'vat_percentage'),
+        ('VAT', 'vat_amount'),
+        ('Grand Total', 'grand_total'),
+    ]
+
+    def get_queryset(self):
+        return Quotation.objects.order_by('date_created', 'id')
+
+
+class QuotationItemExportView(StreamingExportView):
+    """CSV/XLSX export of quotation line items."""
+    filename = 'quotation_items'
+    date_field = 'quotation__date_created'
+    status_field = 'quotation__jobcard__job_status'
+    customer_field = 'quotation__jobcard__customer_id'
+    columns = [
+        ('Quotation No.', 'quotation__quotation_number'),
+        ('Date', 'quotation__date_created'),
+        ('Type', 'item_type'),
+        ('Description', 'description'),
+        ('Quantity', 'quantity'),
+        ('Unit Price', 'unit_price'),
+        ('Line Total', 'line_amount'),
+    ]
+
+    def get_queryset(self):
+        return QuotationItem.objects.annotate(
+            line_amount=ExpressionWrapper(
+                F('quantity') * F('unit_price'),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            )
+        ).order_by('quotation__date_created', 'quotation_id', 'id')
+
+    def format_row(self, row):
+        row = list(row)
+        row[-1] = Decimal(row[-1] or 0).quantize(CENT)
+        return row
+
+
+class PriceSuggestionLookupView(LoginRequiredMixin, View):
+    """Typeahead for quotation line items: past prices for descriptions starting with ``q``.
+
+    History comes from PriceSuggestion with one range query on its
+    (item_type, key) index. Unless ``type=service``, inventory items whose
+    name or part number starts with the term are folded in. Matching parts
+    get the item's ``stock_price``; items never quoted are listed after the
+    history rows.
+    """
+    default_limit = 8
+    max_limit = 20
+    min_length = 2
+
+    def get(self, request, *args, **kwargs):
+        term = request.GET.get('q', '').strip()
+        item_type = request.GET.get('type', '')
+        try:
+            limit = max(1, min(int(request.GET.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            limit = self.default_limit
+        key = folded(term)
+        if len(key) < self.min_length:
+            return JsonResponse({'suggestions': []})
+
+        types = [item_type] if item_type in dict(QuotationItem.ITEM_TYPE_CHOICES) else ['part', 'service']
+        history = list(
+            PriceSuggestion.objects.filter(prefix_q('key', key), item_type__in=types)
+            .order_by('-times_quoted', 'key')[:limit]
+        )
+        stock = {}
+        if 'part' in types:
+            stock = self._stock_items(key, alnum_upper(term), limit)
+
+        suggestions = []
+        for suggestion in history:
+            item = stock.pop(suggestion.key, None) if suggestion.item_type == 'part' else None
+            suggestions.append(self._suggestion_json(suggestion, item))
+        for item in list(stock.values())[:limit - len(suggestions)]:
+            suggestions.append(self._stock_json(item))
+        return JsonResponse({'suggestions': suggestions})
+
+    def _stock_items(self, key, part_key, limit):
+        """Inventory items by name prefix, then part number prefix, keyed by name_key."""
+        fields = ('name', 'name_key', 'part_number', 'unit_price', 'quantity')
+        items = {}
+        for item in InventoryItem.objects.filter(prefix_q('name_key', key)).order_by('name_key').only(*fields)[:limit]:
+            items.setdefault(item.name_key, item)
+        if len(part_key) >= self.min_length:
+            # The restated condition lets SQLite use the partial index on part_key
+            by_part = InventoryItem.objects.filter(~Q(part_key=''), prefix_q('part_key', part_key))
+            for item in by_part.order_by('part_key').only(*fields)[:limit]:
+                items.setdefault(item.name_key, item)
+        return items
+
+    def _suggestion_json(self, suggestion, item=None):
+        return {
+            'description': suggestion.description,
+            'item_type': suggestion.item_type,
+            'times_quoted': suggestion.times_quoted,
+            'last_price': str(suggestion.last_price),
+            'last_quoted_on': suggestion.last_quoted_on.isoformat(),
+            'median_price': str(suggestion.median_price),
+            'common_price': str(suggestion.common_price),
+            'stock_price': str(item.unit_price) if item else None,
+            'part_number': item.part_number if item else '',
+        }
+
+    def _stock_json(self, item):
+        return {
+            'description': item.name,
+            'item_type': 'part',
+            'times_quoted': 0,
+            'last_price': None,
+            'last_quoted_on': None,
+            'median_price': None,
+            'common_price': None,
+            'stock_price': str(item.unit_price),
+            'part_number': item.part_number,
+        }
+
+
 class QuotationPDFView(View):
     """Generate PDF version of quotation"""
     font_dir = os.path.join(settings.BASE_DIR, 'static', 'fonts')
@@ -276,15 +415,46 @@ class QuotationPDFView(View):
     pdfmetrics.registerFont(TTFont('Poppins', os.path.join(font_dir, 'Poppins-Regular.ttf')))
 
     def get(self, request, pk, *args, **kwargs):
-        quotation = get_object_or_404(Quotation, pk=pk)
+        quotation = get_object_or_404(
+            Quotation.objects.select_related('jobcard__customer', 'jobcard__vehicle')
+            .prefetch_related('items'),
+            pk=pk,
+        )
+        key = quotation_fingerprint(quotation)
+        etag = f'"{key}"'
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        cache = PDFCache()
+        pdf = cache.get(key)
+        if pdf is None:
+            data = self.render_pdf(quotation)
+            cache.put(key, data)
+            pdf = BytesIO(data)
+
+        response = FileResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename=Quotation-{quotation.quotation_number}.pdf'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def render_pdf(self, quotation):
+        """Draw the quotation with ReportLab and return the PDF bytes."""
+        output = BytesIO()
+        buffer = canvas.Canvas(output, pagesize=A4)
+        self.draw(buffer, quotation)
+        buffer.save()
+        return output.getvalue()
+
+    def draw(self, buffer, quotation):
+        """Draw the quotation's pages onto an open canvas (also used by the day sheet)."""
         jobcard = quotation.jobcard
         customer = jobcard.customer
         vehicle = jobcard.vehicle
 
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename=Quotation-{quotation.quotation_number}.pdf'
-
-        buffer = canvas.Canvas(response, pagesize=A4)
         width, height = A4
         x_margin = 30
         y = height - 30
@@ -299,8 +469,6 @@ class QuotationPDFView(View):
         self._draw_items_table(buffer, width, x_margin, y, quotation)
         
         buffer.showPage()
-        buffer.save()
-        return response
 
     def _draw_header(self, buffer, width, x_margin, y, quotation):
         """Draw company header and quotation info"""
@@ -359,7 +527,8 @@ class QuotationPDFView(View):
         for item in quotation.items.all():
             if y < 100:  # Check for page break
                 buffer.showPage()
-                y = height - 100
+                buffer.setFont("Poppins", 9)
+                y = A4[1] - 100
             buffer.drawString(x_margin, y, str(item.quantity))
             buffer.drawString(x_margin + 50, y, item.description)
             buffer.drawRightString(width - 90, y, f"AED {item.unit_price:.2f}")
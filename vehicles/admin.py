@@ -1,5 +1,15 @@
 # vehicles/admin.py
 from django.contrib import admin
-from .models import Vehicle
+from .models import MileageReading, Vehicle
 
 admin.site.register(Vehicle)
+
+
+@admin.register(MileageReading)
+class MileageReadingAdmin(admin.ModelAdmin):
+    list_display = ['vehicle', 'date', 'mileage', 'jobcard', 'recorded_at']
+    raw_id_fields = ['vehicle', 'jobcard']
+
+    def has_change_permission(self, request, obj=None):
+        # The log is append-only; a wrong reading is corrected by adding another
+        return False
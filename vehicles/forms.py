@@ -1,7 +1,19 @@
 from django import forms
-from .models import Vehicle
+from django.db import transaction
+from django.utils import timezone
+from .models import MileageReading, Vehicle
 
 class VehicleForm(forms.ModelForm):
     class Meta:
         model = Vehicle
         fields = ["customer", "make", "model", "year", "color", "plate", "vin", "mileage"]
+
+    def save(self, commit=True):
+        if not commit:
+            return super().save(commit=False)
+        with transaction.atomic():
+            vehicle = super().save()
+            # A reading entered outside a visit is logged without a jobcard
+            if "mileage" in self.changed_data and vehicle.mileage is not None:
+                MileageReading.objects.create(vehicle=vehicle, date=timezone.localdate(), mileage=vehicle.mileage)
+        return vehicle
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+from core.lookup import alnum_upper
+
+
+def backfill_lookup_keys(apps, schema_editor):
+    Vehicle = apps.get_model('vehicles', 'Vehicle')
+    batch = []
+    for obj in Vehicle.objects.only('plate', 'vin').iterator(chunk_size=2000):
+        obj.plate_key = alnum_upper(obj.plate)
+        obj.vin_key = alnum_upper(obj.vin)
+        batch.append(obj)
+        if len(batch) == 2000:
+            Vehicle.objects.bulk_update(batch, ['plate_key', 'vin_key'])
+            batch = []
+    Vehicle.objects.bulk_update(batch, ['plate_key', 'vin_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_customer_lookup_keys'),
+        ('vehicles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='plate_key',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='vin_key',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.RunPython(backfill_lookup_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['plate_key'], name='vehicle_plate_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['vin_key'], name='vehicle_vin_key_idx'),
+        ),
+    ]
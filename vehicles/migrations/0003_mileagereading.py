@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:56
+
+import django.db.models.deletion
+import datetime
+
+from django.db import migrations, models
+
+
+def seed_readings(apps, schema_editor):
+    # Only each vehicle's current mileage survives from before the log; record
+    # it against the vehicle's latest jobcard (or today when it has none)
+    Vehicle = apps.get_model('vehicles', 'Vehicle')
+    JobCard = apps.get_model('jobcards', 'JobCard')
+    MileageReading = apps.get_model('vehicles', 'MileageReading')
+    batch = []
+    vehicles = Vehicle.objects.filter(mileage__isnull=False).only('id', 'mileage')
+    for vehicle in vehicles.iterator(chunk_size=2000):
+        latest = (
+            JobCard.objects.filter(vehicle_id=vehicle.id).order_by('-date', '-id')
+            .values('id', 'date').first()
+        )
+        batch.append(MileageReading(
+            vehicle_id=vehicle.id,
+            jobcard_id=latest['id'] if latest else None,
+            date=latest['date'] if latest else datetime.date.today(),
+            mileage=vehicle.mileage,
+        ))
+        if len(batch) == 2000:
+            MileageReading.objects.bulk_create(batch)
+            batch = []
+    MileageReading.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobcards', '0006_jobcard_vehicle_date_idx'),
+        ('vehicles', '0002_vehicle_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MileageReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('mileage', models.PositiveIntegerField(help_text='Odometer reading in KM')),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('jobcard', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mileage_readings', to='jobcards.jobcard')),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mileage_readings', to='vehicles.vehicle')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vehicle', '-date', '-id'], name='mileage_vehicle_date_idx')],
+            },
+        ),
+        migrations.RunPython(seed_readings, migrations.RunPython.noop),
+    ]
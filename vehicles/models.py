@@ -1,7 +1,8 @@
 from django.db import models
 from customers.models import Customer
+from core.lookup import LookupKeysMixin, alnum_upper
 
-class Vehicle(models.Model):
+class Vehicle(LookupKeysMixin, models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="vehicles")
     make = models.CharField(max_length=50)
     model = models.CharField(max_length=50)
@@ -11,6 +12,57 @@ class Vehicle(models.Model):
     vin = models.CharField(help_text="16 digits", max_length=50, blank=True, null=True)
     mileage = models.PositiveIntegerField(help_text="Enter current mileage in KM", null=True, blank=True)
 
+    # Uppercased, separator-free plate/VIN for indexed prefix lookups (see core.lookup)
+    plate_key = models.CharField(max_length=20, blank=True, editable=False)
+    vin_key = models.CharField(max_length=50, blank=True, editable=False)
+
+    KEY_SOURCES = {'plate_key': ('plate', alnum_upper), 'vin_key': ('vin', alnum_upper)}
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['plate_key'], name='vehicle_plate_key_idx'),
+            models.Index(fields=['vin_key'], name='vehicle_vin_key_idx'),
+        ]
 
     def __str__(self):
         return f"{self.make} {self.model} ({self.plate})"
+
+
+class MileageReading(models.Model):
+    """One odometer reading, appended per visit; rows are never edited.
+
+    Vehicle.mileage only holds the latest value. Readings taken at a visit
+    link to its jobcard; readings entered on the vehicle form have none.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='mileage_readings')
+    jobcard = models.ForeignKey(
+        'jobcards.JobCard', on_delete=models.SET_NULL, null=True, blank=True, related_name='mileage_readings',
+    )
+    date = models.DateField()
+    mileage = models.PositiveIntegerField(help_text="Odometer reading in KM")
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vehicle', '-date', '-id'], name='mileage_vehicle_date_idx'),
+        ]
+
+    @classmethod
+    def record_visit(cls, jobcard, mileage, created=False):
+        """Append ``mileage`` for ``jobcard`` unless its latest reading already says so.
+
+        Pass ``created=True`` for a new jobcard to skip reading its (empty) log.
+        """
+        if mileage is None:
+            return None
+        if not created:
+            latest = (
+                cls.objects.filter(jobcard=jobcard).order_by('-id')
+                .values_list('mileage', flat=True).first()
+            )
+            if latest == mileage:
+                return None
+        return cls.objects.create(vehicle_id=jobcard.vehicle_id, jobcard=jobcard, date=jobcard.date, mileage=mileage)
+
+    def __str__(self):
+        return f"{self.vehicle_id}: {self.mileage} km on {self.date}"
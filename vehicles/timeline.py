@@ -0,0 +1,189 @@
+# vehicles/timeline.py
+"""A vehicle's service history as one stream of jobcards, findings and quotation items.
+
+Events are grouped by visit, newest first. The sort key is (jobcard date,
+jobcard id, kind, object id), so a jobcard is followed by its inspection
+findings and then its quotation items. Each kind is read with its own
+query. That query is filtered to rows past the cursor and capped at one
+page, and it walks the jobcard (vehicle, date, id) index. The three sorted
+runs are merged in Python. A page therefore costs three bounded range
+scans however long the vehicle's history is.
+"""
+import base64
+import heapq
+import json
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.db.models import OuterRef, Q, Subquery
+from django.http import Http404
+
+from inspections.models import InspectionFinding
+from jobcards.models import JobCard
+from quotations.models import QuotationItem
+
+from .models import MileageReading
+
+STATUS_LABELS = dict(JobCard._meta.get_field('job_status').flatchoices)
+
+
+@dataclass(order=True)
+class Event:
+    # Only the sort key takes part in comparisons
+    key: tuple
+    kind: str = field(compare=False)
+    jobcard_id: int = field(compare=False)
+    date: date = field(compare=False)
+    text: str = field(compare=False)
+    detail: dict = field(compare=False, default_factory=dict)
+
+
+class TimelineSource:
+    """One kind of event: its queryset and the field paths of its sort key."""
+    kind = None
+    rank = None  # orders kinds within a visit, highest first
+    date_field = None
+    jobcard_field = None
+
+    def queryset(self, vehicle_id):
+        raise NotImplementedError
+
+    def event(self, row):
+        raise NotImplementedError
+
+    def after(self, cursor):
+        """Rows that sort after ``cursor`` (date, jobcard id, rank, id) in newest-first order."""
+        day, jobcard_id, rank, object_id = cursor
+        condition = (
+            Q(**{f'{self.date_field}__lt': day})
+            | Q(**{self.date_field: day, f'{self.jobcard_field}__lt': jobcard_id})
+        )
+        same_visit = Q(**{self.date_field: day, self.jobcard_field: jobcard_id})
+        if self.rank < rank:
+            condition |= same_visit
+        elif self.rank == rank:
+            condition |= same_visit & Q(pk__lt=object_id)
+        return condition
+
+    def page(self, vehicle_id, cursor, size):
+        queryset = self.queryset(vehicle_id)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+        queryset = queryset.order_by(f'-{self.date_field}', f'-{self.jobcard_field}', '-pk')
+        return [self.event(row) for row in queryset[:size]]
+
+    def key(self, day, jobcard_id, object_id):
+        # Negated so that ascending Event order is newest first
+        return (-day.toordinal(), -jobcard_id, -self.rank, -object_id)
+
+
+class JobCardEvents(TimelineSource):
+    kind = 'jobcard'
+    rank = 3
+    date_field = 'date'
+    jobcard_field = 'id'
+
+    def queryset(self, vehicle_id):
+        # Latest reading logged at each visit (MileageReading is append-only)
+        mileage = (
+            MileageReading.objects.filter(jobcard=OuterRef('pk'))
+            .order_by('-id').values('mileage')[:1]
+        )
+        return (
+            JobCard.objects.filter(vehicle_id=vehicle_id)
+            .annotate(visit_mileage=Subquery(mileage))
+            .values('id', 'date', 'job_status', 'required_jobs', 'visit_mileage')
+        )
+
+    def event(self, row):
+        return Event(
+            key=self.key(row['date'], row['id'], row['id']),
+            kind=self.kind,
+            jobcard_id=row['id'],
+            date=row['date'],
+            text=row['required_jobs'] or '',
+            detail={
+                'status': STATUS_LABELS.get(row['job_status'], row['job_status']),
+                'mileage': row['visit_mileage'],
+            },
+        )
+
+
+class FindingEvents(TimelineSource):
+    kind = 'finding'
+    rank = 2
+    date_field = 'inspection__job_card__date'
+    jobcard_field = 'inspection__job_card_id'
+
+    def queryset(self, vehicle_id):
+        return InspectionFinding.objects.filter(inspection__job_card__vehicle_id=vehicle_id).values(
+            'id', 'description', 'severity', 'inspection__job_card', 'inspection__job_card__date',
+        )
+
+    def event(self, row):
+        jobcard_id = row['inspection__job_card']
+        return Event(
+            key=self.key(row['inspection__job_card__date'], jobcard_id, row['id']),
+            kind=self.kind,
+            jobcard_id=jobcard_id,
+            date=row['inspection__job_card__date'],
+            text=row['description'],
+            detail={'severity': row['severity']},
+        )
+
+
+class QuotationItemEvents(TimelineSource):
+    kind = 'quotation_item'
+    rank = 1
+    date_field = 'quotation__jobcard__date'
+    jobcard_field = 'quotation__jobcard_id'
+
+    def queryset(self, vehicle_id):
+        return QuotationItem.objects.filter(quotation__jobcard__vehicle_id=vehicle_id).values(
+            'id', 'description', 'item_type', 'quantity', 'unit_price',
+            'quotation', 'quotation__quotation_number', 'quotation__jobcard', 'quotation__jobcard__date',
+        )
+
+    def event(self, row):
+        jobcard_id = row['quotation__jobcard']
+        return Event(
+            key=self.key(row['quotation__jobcard__date'], jobcard_id, row['id']),
+            kind=self.kind,
+            jobcard_id=jobcard_id,
+            date=row['quotation__jobcard__date'],
+            text=row['description'],
+            detail={
+                'item_type': row['item_type'],
+                'quantity': row['quantity'],
+                'unit_price': str(row['unit_price']),
+                'quotation_id': row['quotation'],
+                'quotation_number': row['quotation__quotation_number'],
+            },
+        )
+
+
+SOURCES = [JobCardEvents(), FindingEvents(), QuotationItemEvents()]
+
+
+def encode_cursor(event):
+    day, jobcard_id, rank, object_id = event.key
+    raw = json.dumps([-day, -jobcard_id, -rank, -object_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        ordinal, jobcard_id, rank, object_id = (int(value) for value in json.loads(raw))
+        return date.fromordinal(ordinal), jobcard_id, rank, object_id
+    except (ValueError, TypeError) as e:
+        raise Http404("Invalid cursor") from e
+
+
+def timeline_page(vehicle_id, cursor=None, size=25):
+    """Return ``(events, next_cursor)`` for the page after ``cursor`` (a token or None)."""
+    position = decode_cursor(cursor) if cursor else None
+    runs = [source.page(vehicle_id, position, size + 1) for source in SOURCES]
+    events = list(heapq.merge(*runs))[:size + 1]
+    next_cursor = encode_cursor(events[size - 1]) if len(events) > size else None
+    return events[:size], next_cursor
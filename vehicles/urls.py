@@ -1,13 +1,14 @@
 from django.urls import path
 from .views import (
     VehicleListView, VehicleCreateView, VehicleUpdateView,
-    VehicleDetailView, VehicleDeleteView
+    VehicleDetailView, VehicleDeleteView, VehicleTimelineView
 )
 
 urlpatterns = [
     path("", VehicleListView.as_view(), name="vehicle_list"),
     path("create/", VehicleCreateView.as_view(), name="vehicle_create"),
     path("<int:pk>/", VehicleDetailView.as_view(), name="vehicle_detail"),
+    path("<int:pk>/timeline/", VehicleTimelineView.as_view(), name="vehicle_timeline"),
     path("<int:pk>/edit/", VehicleUpdateView.as_view(), name="vehicle_edit"),
     path("<int:pk>/delete/", VehicleDeleteView.as_view(), name="vehicle_delete"),
 ]
@@ -1,12 +1,19 @@
+from django.http import JsonResponse
+from django.views import View
 from django.views.generic import CreateView, ListView, UpdateView, DetailView, DeleteView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from .models import Vehicle
 from .forms import VehicleForm
+from .timeline import timeline_page
+from core.pagination import KeysetPaginationMixin
 
-class VehicleListView(ListView):
+TIMELINE_PAGE_SIZE = 25
+
+class VehicleListView(KeysetPaginationMixin, ListView):
     model = Vehicle
     template_name = "vehicles/list.html"
     context_object_name = "vehicles"
+    ordering = ["-id"]
 
 class VehicleCreateView(CreateView):
     model = Vehicle
@@ -22,9 +29,42 @@ class VehicleUpdateView(UpdateView):
 
 class VehicleDetailView(DetailView):
     model = Vehicle
+    queryset = Vehicle.objects.select_related("customer")
     template_name = "vehicles/detail.html"
     context_object_name = "vehicle"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        events, next_cursor = timeline_page(
+            self.object.pk, self.request.GET.get("cursor"), TIMELINE_PAGE_SIZE,
+        )
+        context["timeline"] = events
+        context["timeline_next"] = next_cursor
+        return context
+
+class VehicleTimelineView(View):
+    """Older timeline events for the detail page's "Load older" button, as JSON."""
+
+    def get(self, request, pk):
+        events, next_cursor = timeline_page(pk, request.GET.get("cursor"), TIMELINE_PAGE_SIZE)
+        next_url = None
+        if next_cursor:
+            next_url = f"{reverse('vehicle_timeline', args=[pk])}?cursor={next_cursor}"
+        return JsonResponse({"results": [self._event_json(e) for e in events], "next": next_url})
+
+    def _event_json(self, event):
+        data = {
+            "kind": event.kind,
+            "date": event.date.isoformat(),
+            "jobcard_id": event.jobcard_id,
+            "jobcard_url": reverse("jobcard_detail", args=[event.jobcard_id]),
+            "text": event.text,
+            **event.detail,
+        }
+        if event.kind == "quotation_item":
+            data["quotation_url"] = reverse("quotation_detail", args=[event.detail["quotation_id"]])
+        return data
+
 class VehicleDeleteView(DeleteView):
     model = Vehicle
     template_name = "vehicles/delete_confirm.html"
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -133,6 +134,20 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # Where collectstatic will put files
 
+# Rendered quotation PDFs, reused until the quotation's content changes
+PDF_CACHE_DIR = BASE_DIR / 'cache' / 'quotation_pdfs'
+PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024  # evict least recently used beyond 200 MB
+
+# Inspection PDFs rendered by `manage.py run_inspection_pdf_worker`
+INSPECTION_PDF_DIR = BASE_DIR / 'cache' / 'inspection_pdfs'
+
+# Worker processes used to draw large day sheets (core/day_sheet.py)
+DAY_SHEET_WORKERS = min(4, os.cpu_count() or 1)
+
+# Full-text search (core/search.py). SQLiteFTSBackend needs SQLite with FTS5;
+# use 'core.search.LikeSearchBackend' on other databases.
+SEARCH_BACKEND = 'core.search.SQLiteFTSBackend'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -30,6 +30,7 @@ urlpatterns = [
     path('jobcards/', include('jobcards.urls')),
     path('quotations/', include('quotations.urls')),
     path('inspections/', include('inspections.urls')),
+    path('inventory/', include('inventory.urls')),
     # Auth routes with styled forms
     path('accounts/login/', auth_views.LoginView.as_view(authentication_form=StyledAuthenticationForm, template_name='registration/login.html'), name='login'),
     path('accounts/logout/', auth_views.LogoutView.as_view(), name='logout'),